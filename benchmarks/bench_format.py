@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Format parsing benchmark - throughput of TmuxFormat on list-panes output
+Parses a synthetic 10,000-line SNAPSHOT_FORMAT output with the shared
+field-spec parser, as records and as columns, next to the per-line '|'
+splitting the snapshot parser did before
+
+Usage: python benchmarks/bench_format.py [lines]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tmux_core import TmuxCommand, TmuxFormat, ColumnarSnapshot  # noqa: E402
+from bench_records import synthetic_output  # noqa: E402
+
+
+def split_on_pipes(output: str) -> list:
+    """The former hand-written parser: '|' fields, names re-joined from the middle"""
+    intern = sys.intern
+    rows = []
+    for line in output.split('\n'):
+        parts = line.split('|')
+        if len(parts) < 15:
+            continue
+        rows.append((
+            *map(intern, parts[:4]),
+            int(parts[4]) if parts[4].isdigit() else 0, parts[5], parts[6] == '1',
+            int(parts[7]) if parts[7].isdigit() else 0,
+            intern('|'.join(parts[8:len(parts) - 6])),
+            parts[-6] == '1', int(parts[-5]) if parts[-5].isdigit() else 1, parts[-4],
+            int(parts[-3]) if parts[-3].isdigit() else 0, parts[-2] == '1', intern(parts[-1])
+        ))
+    return rows
+
+
+def measure(label: str, parse, lines: int, runs: int = 20) -> None:
+    """Report the best of several runs as time per parse and lines per second"""
+    best = float('inf')
+    for _ in range(runs):
+        started = time.perf_counter()
+        parse()
+        best = min(best, time.perf_counter() - started)
+    print(f"{label:<32} {best * 1000:7.2f} ms   {lines / best / 1e6:6.2f} M lines/s")
+
+
+def main() -> None:
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    output = synthetic_output(lines)
+    piped = output.replace(TmuxFormat.SEPARATOR, '|')
+    cmd = TmuxCommand()
+    
+    print(f"Parsing {lines} list-panes lines")
+    measure("'|' split per line (before)", lambda: split_on_pipes(piped), lines)
+    measure("TmuxFormat.parse (records)", lambda: TmuxCommand.SNAPSHOT.parse(output), lines)
+    measure("TmuxFormat.parse_columns", lambda: TmuxCommand.SNAPSHOT.parse_columns(output), lines)
+    measure("snapshot index", lambda: cmd._parse_snapshot(output), lines)
+    measure("columnar snapshot", lambda: ColumnarSnapshot.from_output(output), lines)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Record memory benchmark - per-tick allocation of the collector's state
+Compares, on a synthetic 1,000-pane fleet, the nested dict tree the
+collector used to build every tick with the slotted id index it keeps
+now, and with the columnar snapshot (get_snapshot(columnar=True))
+
+Usage: python benchmarks/bench_records.py [panes]
+"""
+
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tmux_core import TmuxCommand, TmuxFormat, ColumnarSnapshot  # noqa: E402
+from event_collector import TmuxEventCollector  # noqa: E402
+
+
+def synthetic_output(panes: int, windows_per_session: int = 5, panes_per_window: int = 2) -> str:
+    """list-panes -a output in SNAPSHOT_FORMAT for a fleet of the given size"""
+    lines = []
+    for pane in range(panes):
+        window = pane // panes_per_window
+        session = window // windows_per_session
+        lines.append(TmuxFormat.SEPARATOR.join(map(str, [
+            f"${session}", f"@{window}", f"%{pane}", f"project-{session}", windows_per_session,
+            1700000000, 0, window % windows_per_session, f"Claude-Agent-{window % windows_per_session}",
+            int(window % windows_per_session == 0), panes_per_window, "tiled",
+            pane % panes_per_window, int(pane % panes_per_window == 0), "node"
+        ])))
+    return '\n'.join(lines)
+
+
+def measure(label: str, tick, ticks: int = 20) -> None:
+    """Report allocation peak per tick, memory retained across ticks and time"""
+    previous = tick()
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    current = tick()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del previous, current
+    
+    started = time.perf_counter()
+    for _ in range(ticks):
+        tick()
+    elapsed = (time.perf_counter() - started) / ticks
+    
+    print(f"{label:<28} peak/tick {(peak - baseline) / 1024:9.1f} KiB   "
+          f"retained {(retained - baseline) / 1024:9.1f} KiB   {elapsed * 1000:7.2f} ms/tick")
+
+
+def main() -> None:
+    panes = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    output = synthetic_output(panes)
+    cmd = TmuxCommand()
+    
+    def records_and_dicts():
+        # The snapshot stays cached next to the dict tree built from it
+        index = cmd._parse_snapshot(output)['index']
+        return index, TmuxEventCollector.state_to_dict(index)
+    
+    print(f"Collector state for {panes} panes")
+    measure("records + nested dicts", records_and_dicts)
+    measure("slotted id index", lambda: cmd._parse_snapshot(output)['index'])
+    measure("columnar snapshot", lambda: ColumnarSnapshot.from_output(output))
+
+
+if __name__ == '__main__':
+    main()
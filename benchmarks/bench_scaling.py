@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark - cost of every public entry point by fleet size
+Runs `claude_control.py status/health/json`, TmuxManager.get_all_sessions,
+TmuxEventCollector.detect_changes and websocket fanout against 10, 100 and
+1,000 panes, reporting wall time, tmux subprocess count, CPU time (own and
+children's) and peak RSS. Every scenario runs in its own worker process so
+RSS and caches do not leak between them.
+
+Results are compared with a stored baseline and the run exits 1 when a
+scenario regressed: any extra subprocess, or time/RSS beyond the tolerance.
+A scenario that was skipped, e.g. fanout without websockets installed, or
+that has no baseline entry fails the run as well.
+Timings are machine-specific; re-record the baseline with --save on the
+machine that checks it.
+
+--tmux fake (default) serves tmux from the in-memory fake_tmux server, with
+--latency seconds per call standing in for a tmux client round trip; the
+subprocess count is then the number of tmux processes the subprocess
+backend would have started. --tmux path uses whatever `tmux` is on PATH
+(a real tmux, or benchmarks/bin/tmux) on a server isolated by TMUX_TMPDIR.
+
+Usage: python benchmarks/bench_scaling.py [--tmux fake|path] [--sizes 10,100,1000]
+                                          [--scenarios status,...] [--save]
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tmux_core import TmuxCommand  # noqa: E402
+
+
+BASELINE_DIR = Path(__file__).resolve().parent / "baselines"
+SCENARIOS = ['status', 'health', 'json', 'get_all_sessions', 'detect_changes', 'fanout']
+SIZES = [10, 100, 1000]
+
+# One pane per window, three windows per session
+WINDOW_NAMES = ("Claude-Agent", "Shell", "Dev-Server")
+# What real panes run: a screenful of output, then nothing
+PANE_COMMAND = "seq 30; exec cat"
+
+# Relative slack before a metric counts as regressed, and the absolute
+# difference below which noise is ignored
+TOLERANCE = 0.5
+RSS_TOLERANCE = 0.25
+FLOORS = {'wall_ms': 5.0, 'cpu_ms': 5.0, 'rss_kib': 4096}
+
+# Subscribers receiving every event in the fanout scenario
+FANOUT_CLIENTS = 10
+
+
+class ScenarioSkipped(Exception):
+    pass
+
+
+class CountingConnection:
+    """Websocket stand-in that only counts what it is sent"""
+    
+    def __init__(self):
+        self.messages = 0
+        self.bytes = 0
+    
+    async def send(self, message: str) -> None:
+        self.messages += 1
+        self.bytes += len(message)
+
+
+def build_fleet(panes: int) -> None:
+    """Create `panes` single-pane windows, three per session"""
+    batch = TmuxCommand().batch()
+    for window in range(panes):
+        session, index = divmod(window, len(WINDOW_NAMES))
+        if index == 0:
+            batch.add('new-session', '-d', '-s', f"project-{session}", '-n', WINDOW_NAMES[index],
+                      '-x', '120', '-y', '40', PANE_COMMAND)
+        else:
+            batch.add('new-window', '-d', '-t', f"project-{session}", '-n', WINDOW_NAMES[index],
+                      PANE_COMMAND)
+    batch.execute(check=True, timeout=60)
+
+
+def cli_scenario(command: str, tmpdir: str):
+    from claude_control import ClaudeMonitor, format_status
+    registry = Path(tmpdir) / "sessions.json"
+    
+    def run():
+        # A fresh monitor per run, like one CLI invocation
+        monitor = ClaudeMonitor(registry_path=registry)
+        if command == 'status':
+            agents = monitor.get_all_agents()
+            monitor.save_status(agents)
+            format_status(agents)
+        elif command == 'health':
+            monitor.health_check()
+        else:
+            monitor.get_status_json()
+    return run
+
+
+def sessions_scenario(tmpdir: str):
+    from tmux_utils import TmuxManager
+    return lambda: TmuxManager().get_all_sessions()
+
+
+def detect_changes_scenario(tmpdir: str):
+    from event_collector import TmuxEventCollector
+    loop = asyncio.new_event_loop()
+    collector = TmuxEventCollector(use_hooks=False, use_taps=False)
+    # Steady state: the warm-up run takes the first, structure-only tick
+    return lambda: loop.run_until_complete(collector.detect_changes())
+
+
+def fanout_scenario(tmpdir: str):
+    try:
+        from websocket_server import WebSocketServer, WebSocketClient
+    except ImportError as e:
+        raise ScenarioSkipped(f"websocket_server unavailable: {e}")
+    from event_collector import TmuxEventCollector
+    
+    loop = asyncio.new_event_loop()
+    collector = TmuxEventCollector(use_hooks=False, use_taps=False)
+    # The first two ticks: every session created, then pane output
+    events = [event.to_dict()
+              for _ in range(2) for event in loop.run_until_complete(collector.detect_changes())]
+    server = WebSocketServer()
+    for i in range(FANOUT_CLIENTS):
+        client_id = f"bench-{i}"
+        server.clients[client_id] = WebSocketClient(
+            connection=CountingConnection(), client_id=client_id,
+            authenticated=True, subscriptions={"*"}
+        )
+    
+    async def broadcast():
+        for event in events:
+            await server.broadcast_event(event)
+    return lambda: loop.run_until_complete(broadcast())
+
+
+SCENARIO_FACTORIES = {
+    'status': lambda tmpdir: cli_scenario('status', tmpdir),
+    'health': lambda tmpdir: cli_scenario('health', tmpdir),
+    'json': lambda tmpdir: cli_scenario('json', tmpdir),
+    'get_all_sessions': sessions_scenario,
+    'detect_changes': detect_changes_scenario,
+    'fanout': fanout_scenario,
+}
+
+
+def cpu_seconds() -> float:
+    """User and system time of this process and its finished children"""
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def measure(run, repeats: int) -> dict:
+    """Median wall time, and per-run subprocesses and CPU, after one warm-up run"""
+    run()
+    metrics = TmuxCommand.metrics
+    metrics.reset()
+    walls = []
+    cpu_started = cpu_seconds()
+    for _ in range(repeats):
+        started = time.perf_counter()
+        run()
+        walls.append(time.perf_counter() - started)
+    return {
+        'wall_ms': round(statistics.median(walls) * 1000, 3),
+        'processes': round(metrics.processes / repeats, 1),
+        'cpu_ms': round((cpu_seconds() - cpu_started) / repeats * 1000, 3),
+        'rss_kib': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def worker(scenario: str, panes: int, args) -> dict:
+    """Build a fleet on an isolated server and measure one scenario on it"""
+    logging.disable(logging.WARNING)
+    os.environ.pop('TMUX', None)
+    os.environ.pop('TMUX_SOCKETS', None)
+    os.environ['TMUX_HOOKS'] = '0'
+    os.environ['TMUX_PIPE_PANES'] = '0'
+    tmpdir = tempfile.mkdtemp(prefix='bench-scaling-')
+    
+    if args.tmux == 'fake':
+        from fake_tmux import FakeTmuxServer
+        os.environ['TMUX_BACKEND'] = TmuxCommand.BACKEND_FAKE
+        FakeTmuxServer._servers[None] = FakeTmuxServer(latency=args.latency)
+    else:
+        os.environ['TMUX_TMPDIR'] = tmpdir
+    
+    TmuxCommand.metrics.enable()
+    try:
+        build_fleet(panes)
+        try:
+            run = SCENARIO_FACTORIES[scenario](tmpdir)
+        except ScenarioSkipped as e:
+            return {'skipped': str(e)}
+        return measure(run, args.repeats)
+    finally:
+        if args.tmux == 'path':
+            subprocess.run(['tmux', 'kill-server'], capture_output=True)
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+
+def run_worker(scenario: str, panes: int, args) -> dict:
+    argv = [sys.executable, __file__, '--worker', scenario, str(panes), '--tmux', args.tmux,
+            '--repeats', str(args.repeats), '--latency', str(args.latency)]
+    result = subprocess.run(argv, capture_output=True, text=True)
+    if result.returncode != 0 or not result.stdout.strip():
+        return {'error': (result.stderr.strip().splitlines() or ["no output"])[-1]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions of one scenario/size against its baseline, as messages"""
+    regressions = []
+    if result.get('processes', 0) > baseline.get('processes', float('inf')):
+        regressions.append(f"processes {baseline['processes']} -> {result['processes']}")
+    for key, slack in (('wall_ms', tolerance), ('cpu_ms', tolerance), ('rss_kib', RSS_TOLERANCE)):
+        if key not in result or key not in baseline:
+            continue
+        old, new = baseline[key], result[key]
+        if new > old * (1 + slack) and new - old > FLOORS[key]:
+            regressions.append(f"{key} {old} -> {new} (+{(new / old - 1) * 100:.0f}%)")
+    return regressions
+
+
+def report(results: dict, baseline: dict, tolerance: float, strict: bool = True) -> int:
+    """
+    Print the results table; returns the number of regressions
+    Unless strict is off, a skipped scenario or one missing from the
+    baseline counts as one too, so nothing goes unchecked silently
+    """
+    print(f"{'scenario':<18}{'panes':>6}{'wall ms':>10}{'procs':>7}{'cpu ms':>10}"
+          f"{'RSS MiB':>9}  vs baseline")
+    regressions = 0
+    for scenario, sizes in results.items():
+        for panes, result in sizes.items():
+            if 'skipped' in result or 'error' in result:
+                print(f"{scenario:<18}{panes:>6}  {'SKIPPED' if 'skipped' in result else 'ERROR'}: "
+                      f"{result.get('skipped') or result.get('error')}")
+                regressions += strict or 'error' in result
+                continue
+            previous = baseline.get(scenario, {}).get(panes)
+            problems = compare(result, previous, tolerance) if previous else []
+            regressions += len(problems) + (strict and not previous)
+            verdict = ("REGRESSION " + "; ".join(problems) if problems
+                       else "ok" if previous else "NO BASELINE")
+            print(f"{scenario:<18}{panes:>6}{result['wall_ms']:>10.2f}{result['processes']:>7g}"
+                  f"{result['cpu_ms']:>10.2f}{result['rss_kib'] / 1024:>9.1f}  {verdict}")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--tmux', choices=['fake', 'path'], default='fake')
+    parser.add_argument('--sizes', default=','.join(map(str, SIZES)), help="pane counts")
+    parser.add_argument('--scenarios', default=','.join(SCENARIOS))
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--latency', type=float, default=0.001,
+                        help="seconds per tmux call with --tmux fake")
+    parser.add_argument('--tolerance', type=float, default=TOLERANCE,
+                        help="relative wall/CPU slack before failing")
+    parser.add_argument('--baseline', type=Path, help="baseline file to compare with or save to")
+    parser.add_argument('--save', action='store_true', help="record the results as the baseline")
+    parser.add_argument('--worker', nargs=2, metavar=('SCENARIO', 'PANES'), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    
+    if args.worker:
+        print(json.dumps(worker(args.worker[0], int(args.worker[1]), args)))
+        return 0
+    
+    baseline_path = args.baseline or BASELINE_DIR / f"scaling-{args.tmux}.json"
+    stored = json.loads(baseline_path.read_text()) if baseline_path.exists() else {}
+    # Baselines are keyed by pane count as strings, like JSON keys
+    baseline = stored.get('results', {}) if stored.get('latency') == args.latency else {}
+    
+    results = {}
+    for scenario in args.scenarios.split(','):
+        for panes in args.sizes.split(','):
+            results.setdefault(scenario, {})[panes] = run_worker(scenario, int(panes), args)
+    
+    if args.save:
+        report(results, {}, args.tolerance, strict=False)
+        merged = baseline
+        for scenario, sizes in results.items():
+            merged.setdefault(scenario, {}).update(
+                {panes: result for panes, result in sizes.items() if 'wall_ms' in result}
+            )
+        baseline_path.parent.mkdir(parents=True, exist_ok=True)
+        baseline_path.write_text(json.dumps({
+            'tmux': args.tmux, 'latency': args.latency,
+            'python': sys.version.split()[0], 'results': merged
+        }, indent=2, sort_keys=True) + '\n')
+        print(f"\nBaseline saved to {baseline_path}")
+        return 0
+    
+    regressions = report(results, baseline, args.tolerance)
+    if regressions:
+        print(f"\nFAILED: {regressions} regression(s) against {baseline_path}")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
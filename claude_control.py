@@ -6,6 +6,7 @@ Reduces subprocess calls by 80-90% through batching
 
 import json
 import logging
+import time
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any
@@ -13,7 +14,7 @@ from typing import Dict, List, Optional, Any
 # Import shared components
 from tmux_core import (
     TmuxCommand, TmuxPatterns, TmuxValidation, 
-    TmuxCommandError, AgentStatus
+    TmuxCommandError, AgentStatus, TmuxServerPool
 )
 
 
@@ -23,8 +24,11 @@ class ClaudeMonitor(TmuxCommand):
     Inherits from TmuxCommand to eliminate duplicate code
     """
     
-    def __init__(self, registry_path: Optional[Path] = None):
+    def __init__(self, registry_path: Optional[Path] = None,
+                 sockets: Optional[List[Optional[str]]] = None):
         super().__init__()
+        # Servers listed in TMUX_SOCKETS; this instance serves the default one if listed
+        self.server_pool = TmuxServerPool(sockets, primary=self)
         self.base_dir = Path(__file__).parent.resolve()
         self.registry_path = registry_path or self.base_dir / "registry" / "sessions.json"
         
@@ -34,19 +38,24 @@ class ClaudeMonitor(TmuxCommand):
     def get_all_agents(self) -> List[Dict[str, Any]]:
         """
         Get all Claude agents across all sessions using batch operations
-        Replaces multiple loops with single batch call
+        Every configured tmux server is queried concurrently
         """
+        agents_by_server = self.server_pool.map(self._get_server_agents)
+        return [agent for agents in agents_by_server.values() for agent in agents]
+    
+    def _get_server_agents(self, runner: TmuxCommand) -> List[Dict[str, Any]]:
+        """Claude agents of one tmux server"""
         agents = []
         
         # Get all data in one batch call
-        data = self.batch_get_all_sessions_and_windows()
+        data = runner.batch_get_all_sessions_and_windows()
         
         # Process sessions and windows
         for session_name, windows in data['windows'].items():
             session_info = data['sessions'].get(session_name)
             if not session_info:
                 continue
-                
+            
             for window in windows:
                 # Use shared pattern detection
                 if TmuxPatterns.is_claude_process(window.current_command):
@@ -54,11 +63,13 @@ class ClaudeMonitor(TmuxCommand):
                     status = self._determine_agent_status(
                         session_name, 
                         window,
-                        cached_output=None  # Could add caching here
+                        cached_output=None,  # Could add caching here
+                        runner=runner
                     )
                     
                     agents.append({
-                        'session': session_name,
+                        'session': TmuxServerPool.qualify(runner.server, session_name),
+                        'server': runner.server,
                         'window': window.index,
                         'name': window.name,
                         'status': status,
@@ -72,7 +83,8 @@ class ClaudeMonitor(TmuxCommand):
         return agents
     
     def _determine_agent_status(self, session: str, window: Any, 
-                               cached_output: Optional[str] = None) -> str:
+                               cached_output: Optional[str] = None,
+                               runner: Optional[TmuxCommand] = None) -> str:
         """
         Determine agent status with optional cached output
         Can be optimized further with batch pane capture
@@ -82,7 +94,7 @@ class ClaudeMonitor(TmuxCommand):
             try:
                 cmd = ['tmux', 'capture-pane', '-t', f"{session}:{window.index}", 
                        '-p', '-S', '-5']
-                result = self.execute_command(cmd, check=False)
+                result = (runner or self).execute_command(cmd, check=False)
                 output = result.stdout
             except Exception:
                 return AgentStatus.UNKNOWN
@@ -99,9 +111,10 @@ class ClaudeMonitor(TmuxCommand):
         else:
             return AgentStatus.UNKNOWN
     
-    def health_check(self) -> Dict[str, Any]:
+    def health_check(self, agents: Optional[List[Dict[str, Any]]] = None) -> Dict[str, Any]:
         """Perform system-wide health check using batch operations"""
-        agents = self.get_all_agents()
+        if agents is None:
+            agents = self.get_all_agents()
         
         # Group by status efficiently
         status_counts = {
@@ -165,7 +178,23 @@ class ClaudeMonitor(TmuxCommand):
         # Return JSON for easy parsing
         return json.dumps({
             'agents': agents,
-            'health': self.health_check(),
+            'health': self.health_check(agents),
+            'timestamp': datetime.now().isoformat()
+        }, indent=2)
+    
+    def get_stats_json(self) -> str:
+        """tmux calls, latency and output size of one status run, as JSON"""
+        self.metrics.reset()
+        self.metrics.enable()
+        started = time.perf_counter()
+        agents = self.get_all_agents()
+        elapsed = time.perf_counter() - started
+        
+        return json.dumps({
+            'agents': len(agents),
+            'elapsed_ms': round(elapsed * 1000, 3),
+            'tmux': self.metrics.to_dict(),
+            'snapshot_cache': self.snapshot_cache.stats(),
             'timestamp': datetime.now().isoformat()
         }, indent=2)
 
@@ -230,7 +259,7 @@ def main():
             agents = monitor.get_all_agents()
             monitor.save_status(agents)
             print(format_status(agents, detailed))
-            
+        
         elif command == "health":
             health = monitor.health_check()
             if health['healthy']:
@@ -238,16 +267,20 @@ def main():
             else:
                 print(f"❌ System unhealthy - errors detected")
             print(f"   Status: {health['status_breakdown']}")
-            
+        
         elif command == "json":
             # New JSON output mode for shell scripts
             print(monitor.get_status_json())
-            
+        
+        elif command == "stats":
+            # tmux calls made by one status run
+            print(monitor.get_stats_json())
+        
         else:
             print(f"Unknown command: {command}")
-            print("Usage: claude_control.py [status|health|json] [detailed]")
+            print("Usage: claude_control.py [status|health|json|stats] [detailed]")
             sys.exit(1)
-            
+    
     except Exception as e:
         logging.error(f"Error: {e}")
         sys.exit(1)
@@ -0,0 +1,60 @@
+"""
+Event Buffer - Recent events kept for replay
+Every event is numbered per tmux server; the websocket server keeps the
+latest ones so a reconnecting client can be sent what it missed instead
+of re-snapshotting the whole tmux state
+"""
+
+import json
+import os
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+
+class EventRingBuffer:
+    """
+    The most recent events, bounded by count and by serialized size
+    Oldest events are dropped first. Replay from a position older than
+    the oldest event kept reports a gap rather than a partial answer.
+    """
+    
+    max_events = int(os.environ.get('EVENT_BUFFER_SIZE', '1000'))
+    max_bytes = int(os.environ.get('EVENT_BUFFER_BYTES', str(4 * 1024 * 1024)))
+    
+    def __init__(self, max_events: Optional[int] = None, max_bytes: Optional[int] = None):
+        if max_events is not None:
+            self.max_events = max_events
+        if max_bytes is not None:
+            self.max_bytes = max_bytes
+        self.events: Deque[Tuple[Dict, int]] = deque()
+        self.size = 0
+        # Per server: newest sequence number seen, and newest one dropped
+        self.latest: Dict[str, int] = {}
+        self.evicted: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self.events)
+    
+    def append(self, event: Dict, size: Optional[int] = None) -> None:
+        """Keep an event; size is its serialized length if already known"""
+        if size is None:
+            size = len(json.dumps(event))
+        self.events.append((event, size))
+        self.size += size
+        if "seq" in event:
+            self.latest[event.get("server")] = event["seq"]
+        while self.events and (len(self.events) > self.max_events or self.size > self.max_bytes):
+            dropped, dropped_size = self.events.popleft()
+            self.size -= dropped_size
+            if "seq" in dropped:
+                self.evicted[dropped.get("server")] = dropped["seq"]
+    
+    def since(self, server: str, seq: int) -> Optional[List[Dict]]:
+        """
+        Events from server numbered after seq, or None when some of them
+        were already dropped or seq is from before a restart
+        """
+        if self.evicted.get(server, 0) > seq or seq > self.latest.get(server, 0):
+            return None
+        return [event for event, _ in self.events
+                if event.get("server") == server and event.get("seq", 0) > seq]
@@ -6,17 +6,32 @@ Detects changes in tmux sessions and generates events
 import asyncio
 import json
 import hashlib
+import itertools
 import logging
-from typing import Dict, Any, Optional, List, Set
-from dataclasses import dataclass, asdict
+import os
+import time
+from typing import Dict, Any, Optional, List, Set, Callable, Awaitable
+from dataclasses import dataclass
 from datetime import datetime
-from tmux_core import TmuxCommand
+from tmux_core import (
+    AsyncTmuxCommand, TmuxPatterns, TmuxServerPool, TmuxIndex, PaneInfo, TmuxFormat,
+    TmuxTimeoutError, slotted
+)
+from tmux_hooks import TmuxHookListener, HookRecord
+from tmux_notifications import Notification, TmuxNotificationListener
+from tmux_scrollback import ScrollbackReader, PaneCursor, PaneMirror
+from tmux_polling import PanePollSchedule
+from tmux_normalize import ContentNormalizer
+from tmux_taps import TmuxPaneTaps
+from tmux_coalesce import EventCoalescer
+from event_requests import RequestChannel
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+@slotted
 @dataclass
 class TmuxEvent:
     """Represents a tmux event"""
@@ -26,293 +41,781 @@ class TmuxEvent:
     window: Optional[int] = None
     pane: Optional[int] = None
     data: Optional[Dict[str, Any]] = None
+    server: Optional[str] = None
+    # Position in the server's event stream, assigned when queued
+    seq: Optional[int] = None
     
     def to_dict(self) -> Dict:
         """Convert event to dictionary"""
-        return {k: v for k, v in asdict(self).items() if v is not None}
+        # Shallow: asdict() would deep-copy the data dict of every event
+        values = ((name, getattr(self, name)) for name in self.__slots__)
+        return {name: value for name, value in values if value is not None}
 
 
 class TmuxEventCollector:
     """Collects events from tmux sessions"""
     
-    def __init__(self, poll_interval=0.5):
+    # Windows whose panes are streamed with pipe-pane when taps are enabled
+    TAP_WINDOW_TYPES = ('CLAUDE_AGENT', 'DEV_SERVER')
+    WINDOW_LIST = TmuxFormat('WindowRow', [('window_index', int), ('window_name', str)],
+                             free_text='window_name')
+    # Control-mode notifications that change sessions or windows; the
+    # unlinked- variants concern sessions other than the monitor's own
+    STRUCTURE_NOTIFICATIONS = frozenset({
+        'window-add', 'window-close', 'window-renamed', 'unlinked-window-add',
+        'unlinked-window-close', 'unlinked-window-renamed', 'session-renamed',
+        'sessions-changed', 'layout-change', 'exit'
+    })
+    
+    def __init__(self, poll_interval=0.5, use_hooks: Optional[bool] = None,
+                 reconcile_interval=10.0, use_taps: Optional[bool] = None,
+                 socket_name: Optional[str] = None, metrics_interval: Optional[float] = 10.0,
+                 tick_budget: Optional[float] = None, use_push: Optional[bool] = None):
         self.poll_interval = poll_interval
-        self.tmux_cmd = TmuxCommand()
-        self.previous_state = {}
+        self.tmux_cmd = AsyncTmuxCommand(socket_name=socket_name)
+        self.server = self.tmux_cmd.server
+        self.previous_state = TmuxIndex()
         self.previous_pane_content = {}
+        # Spinners, timers and counters are masked before content is hashed
+        self.normalizer = ContentNormalizer()
+        # Output last sent per pane, so pane events carry only new lines
+        self.pane_mirrors: Dict[str, PaneMirror] = {}
+        # Captures only the lines written since the previous tick
+        self.scrollback = ScrollbackReader(self.tmux_cmd, lines=10)
+        # Idle panes are read less and less often, changing ones every tick
+        self.schedule = PanePollSchedule(poll_interval)
         self.running = False
         
-    async def start_collecting(self, event_queue: asyncio.Queue):
-        """Start collecting tmux events"""
+        # With tmux hooks installed, structure is only re-listed when a hook
+        # fires, plus a periodic reconciliation pass
+        if use_hooks is None:
+            use_hooks = os.environ.get('TMUX_HOOKS', '1') != '0'
+        self.use_hooks = use_hooks
+        self.reconcile_interval = reconcile_interval
+        self.hook_listener: Optional[TmuxHookListener] = None
+        self.structure_dirty = True
+        self.last_reconcile = 0.0
+        self._wakeup: Optional[asyncio.Event] = None
+        
+        # Opt-in: stream agent and dev-server panes through pipe-pane
+        # instead of capturing them every tick
+        if use_taps is None:
+            use_taps = os.environ.get('TMUX_PIPE_PANES', '0') == '1'
+        self.use_taps = use_taps
+        self.taps: Optional[TmuxPaneTaps] = None
+        self.pane_targets: Dict[str, PaneInfo] = {}
+        self._event_queue: Optional[asyncio.Queue] = None
+        # Answers snapshot requests from the request channel; None leaves
+        # them to another collector sharing the channel
+        self.request_handler: Optional[Callable[[Dict], Awaitable[List[TmuxEvent]]]] = \
+            self.handle_snapshot_request
+        
+        # tmux call metrics are broadcast this often while TMUX_METRICS=1;
+        # None leaves them to another collector in the same process
+        self.metrics_interval = metrics_interval
+        self.last_metrics = time.monotonic()
+        
+        # Seconds a tick may spend reading panes; panes not read in time are
+        # deferred to the front of the next tick and reported
+        if tick_budget is None:
+            tick_budget = float(os.environ.get('TMUX_TICK_BUDGET', '2.0'))
+        self.tick_budget = tick_budget or None
+        self.tick_deadline: Optional[float] = None
+        self.deferred_panes: List[str] = []
+        self.structure_timed_out = False
+        # Pane cursors listed with this tick's structure, for the scrollback reader
+        self.listed_cursors: Optional[Dict[str, PaneCursor]] = None
+        
+        # Opt-in: read-only control-mode monitors push pane output and
+        # structural changes; polling drops to a reconciliation pass every
+        # reconcile_interval once every pane is covered
+        if use_push is None:
+            use_push = os.environ.get('TMUX_PUSH', '0') == '1'
+        self.use_push = use_push
+        self.notifications: Optional[TmuxNotificationListener] = None
+        self.polled_panes = 0
+        
+        # Bursts of pane events are merged into one per TMUX_COALESCE_WINDOW
+        self.coalescer = EventCoalescer()
+        self._flush_handle: Optional[asyncio.TimerHandle] = None
+        # Numbers every event queued for this server, so clients can spot
+        # and replay gaps
+        self.sequence = itertools.count(1)
+    
+    async def start_collecting(self, event_queue: asyncio.Queue,
+                               requests: Optional[RequestChannel] = None):
+        """Start collecting tmux events, answering requests on their own task"""
         self.running = True
         logger.info(f"Starting event collection with {self.poll_interval}s interval")
         
+        self._wakeup = asyncio.Event()
+        self._event_queue = event_queue
+        if self.use_hooks:
+            self.start_hooks()
+        if self.use_taps:
+            self.start_taps()
+        if self.use_push:
+            self.start_push()
+        request_task = None
+        if requests is not None and self.request_handler is not None:
+            request_task = asyncio.create_task(requests.serve(self.request_handler))
+        
+        try:
+            await self._collect_loop(event_queue)
+        finally:
+            if request_task is not None:
+                request_task.cancel()
+            self.stop_hooks()
+            self.stop_taps()
+            self.stop_push()
+            self._flush_coalesced(drain=True)
+    
+    def start_hooks(self) -> bool:
+        """Install tmux hooks that wake the collector on structural changes"""
+        listener = TmuxHookListener(self.tmux_cmd)
+        if not listener.install():
+            logger.info("tmux hooks unavailable, polling structure every tick")
+            return False
+        listener.add_callback(self.on_hook_record)
+        listener.attach()
+        self.hook_listener = listener
+        return True
+    
+    def stop_hooks(self) -> None:
+        """Remove tmux hooks installed by start_hooks"""
+        if self.hook_listener is not None:
+            self.hook_listener.uninstall()
+            self.hook_listener = None
+    
+    def start_taps(self) -> None:
+        """Stream selected panes through pipe-pane from now on"""
+        self.taps = TmuxPaneTaps(self.tmux_cmd, lines=10)
+        self.taps.add_callback(self.on_tap_output)
+        self.taps.attach()
+    
+    def stop_taps(self) -> None:
+        """Close every pipe-pane tap opened by start_taps"""
+        if self.taps is not None:
+            self.taps.close()
+            self.taps = None
+    
+    def start_push(self) -> bool:
+        """Receive pane output and structural changes from control-mode monitors"""
+        if self.tmux_cmd.backend == self.tmux_cmd.BACKEND_FAKE:
+            logger.info("Push collection needs tmux control mode, polling instead")
+            return False
+        max_sessions = int(os.environ.get('TMUX_PUSH_SESSIONS', '64'))
+        self.notifications = TmuxNotificationListener(self.tmux_cmd, max_sessions, lines=10)
+        self.notifications.add_callback(self.on_notification)
+        self.notifications.attach()
+        return True
+    
+    def stop_push(self) -> None:
+        """Close every monitor opened since start_push"""
+        if self.notifications is not None:
+            self.notifications.close()
+            self.notifications = None
+    
+    def select_tap_panes(self, current_state: TmuxIndex) -> List[str]:
+        """Panes of Claude agent and dev server windows"""
+        return [
+            pane_id
+            for pane_id, pane in current_state.panes.items()
+            if TmuxPatterns.detect_window_type(
+                current_state.windows[pane.window_id].name, pane.current_command
+            ) in self.TAP_WINDOW_TYPES
+        ]
+    
+    def on_tap_output(self, pane_id: str, lines: List[str]) -> None:
+        """Emit a pane event as soon as a tapped pane writes output"""
+        pane = self.pane_targets.get(pane_id)
+        if pane is None or self.taps is None or pane_id not in self.taps:
+            return
+        event = self.check_pane_content(pane_id, pane, self.taps.taps[pane_id].text)
+        if event is not None:
+            event.data["new_lines"] = len(lines)
+            self._emit(event)
+    
+    def _emit(self, event: TmuxEvent) -> None:
+        """Queue an event produced outside a tick"""
+        self._publish([event])
+    
+    def _publish(self, events: List[TmuxEvent]) -> None:
+        """Queue events, holding back pane events inside a coalescing window"""
+        if self._event_queue is None:
+            return
+        for event in events:
+            for ready in self.coalescer.add(event):
+                self._queue_event(ready)
+                logger.debug(f"Generated event: {ready.type}")
+        self._schedule_flush()
+    
+    def _queue_event(self, event: TmuxEvent) -> None:
+        """Number an event and put it on the queue"""
+        event.server = self.server
+        event.seq = next(self.sequence)
+        self._event_queue.put_nowait(event.to_dict())
+    
+    def _schedule_flush(self) -> None:
+        deadline = self.coalescer.next_deadline()
+        if deadline is None or self._flush_handle is not None:
+            return
+        self._flush_handle = asyncio.get_running_loop().call_later(
+            max(0.0, deadline - time.monotonic()), self._flush_coalesced)
+    
+    def _flush_coalesced(self, drain: bool = False) -> None:
+        """Queue events whose coalescing window closed, or all held ones"""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        ready = self.coalescer.drain() if drain else self.coalescer.flush()
+        if self._event_queue is not None:
+            for event in ready:
+                self._queue_event(event)
+        if not drain:
+            self._schedule_flush()
+    
+    def on_notification(self, notification: Notification) -> None:
+        """
+        Turn pushed pane output into events as it arrives
+        Structural notifications run a structure pass right away rather than
+        being translated one by one: %window-add carries neither index nor
+        name, and diffing a fresh listing reports every change exactly once
+        """
+        if notification.name == 'output':
+            pane_id = notification.args[0] if notification.args else ""
+            pane = self.pane_targets.get(pane_id)
+            if pane is None:
+                # A pane created since the last listing
+                self.request_structure()
+            elif notification.lines and self.notifications is not None:
+                event = self.check_pane_content(pane_id, pane, self.notifications.tail(pane_id))
+                if event is not None:
+                    event.data["new_lines"] = len(notification.lines)
+                    self._emit(event)
+        elif notification.name in self.STRUCTURE_NOTIFICATIONS:
+            self.request_structure()
+    
+    def on_hook_record(self, record: HookRecord) -> None:
+        """Mark structure stale and run the next tick immediately"""
+        self.request_structure()
+    
+    def request_structure(self) -> None:
+        """Re-list structure on a tick that starts now"""
+        self.structure_dirty = True
+        if self._wakeup is not None:
+            self._wakeup.set()
+    
+    def tick_interval(self) -> float:
+        """poll_interval, or reconcile_interval while every pane is pushed or tapped"""
+        if self.notifications is not None and self.pane_targets and not self.polled_panes:
+            return self.reconcile_interval
+        return self.poll_interval
+    
+    async def _wait_for_next_tick(self) -> None:
+        """Sleep for tick_interval, or less if a hook or notification fires"""
+        if self._wakeup is None:
+            await asyncio.sleep(self.tick_interval())
+            return
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=self.tick_interval())
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+    
+    async def _collect_loop(self, event_queue: asyncio.Queue):
+        """Poll loop shared by start_collecting"""
         # Get initial state
         self.previous_state = await self.get_current_state()
         
         while self.running:
             try:
-                events = await self.detect_changes()
-                for event in events:
-                    await event_queue.put(event.to_dict())
-                    logger.debug(f"Generated event: {event.type}")
-                    
-                # Handle snapshot requests
-                try:
-                    # Check for snapshot requests with zero timeout
-                    while True:
-                        snapshot_request = event_queue.get_nowait()
-                        if snapshot_request.get("type") == "snapshot.request":
-                            snapshot_events = await self.handle_snapshot_request(snapshot_request)
-                            for event in snapshot_events:
-                                await event_queue.put(event.to_dict())
-                except asyncio.QueueEmpty:
-                    pass
-                    
+                self._publish(await self.detect_changes())
+                
+                metrics_event = self.metrics_event()
+                if metrics_event is not None:
+                    self._queue_event(metrics_event)
+            
             except Exception as e:
                 logger.error(f"Error in event collection: {e}")
-                
-            await asyncio.sleep(self.poll_interval)
+            
+            await self._wait_for_next_tick()
     
-    async def get_current_state(self) -> Dict[str, Any]:
-        """Get current tmux state"""
-        state = {}
-        
+    def metrics_event(self) -> Optional[TmuxEvent]:
+        """tmux call metrics, when enabled and metrics_interval has passed"""
+        metrics = self.tmux_cmd.metrics
+        if not metrics.enabled or self.metrics_interval is None:
+            return None
+        now = time.monotonic()
+        if now - self.last_metrics < self.metrics_interval:
+            return None
+        self.last_metrics = now
+        return TmuxEvent(
+            type="metrics",
+            timestamp=datetime.now().isoformat(),
+            data=metrics.to_dict()
+        )
+    
+    async def get_current_state(self, cursors: bool = False) -> TmuxIndex:
+        """
+        Get current tmux state
+        The snapshot's id index is used as is: sessions, windows and panes
+        keyed by $session_id, @window_id and %pane_id, so renames and
+        renumbering are reported as changes rather than remove + create.
+        With cursors set, the same call lists every pane's scrollback cursor
+        into listed_cursors
+        """
         try:
-            # Get all sessions
-            sessions_result = self.tmux_cmd.execute_command(
-                ["tmux", "list-sessions", "-F", "#{session_name}:#{session_attached}"],
-                check=False
-            )
-            
-            if sessions_result.returncode == 0 and sessions_result.stdout:
-                for line in sessions_result.stdout.strip().split('\n'):
-                    if line and ':' in line:
-                        session_name, attached = line.split(':', 1)
-                        
-                        # Get windows for this session
-                        windows_result = self.tmux_cmd.execute_command(
-                            ["tmux", "list-windows", "-t", session_name,
-                             "-F", "#{window_index}:#{window_name}:#{window_active}"],
-                            check=False
-                        )
-                        
-                        session_state = {
-                            "info": {"attached": attached == "1"},
-                            "windows": {}
-                        }
-                        
-                        if windows_result.returncode == 0 and windows_result.stdout:
-                            for window_line in windows_result.stdout.strip().split('\n'):
-                                if window_line and ':' in window_line:
-                                    parts = window_line.split(':')
-                                    if len(parts) >= 3:
-                                        window_id = int(parts[0])
-                                        window_name = parts[1]
-                                        window_active = parts[2] == "1"
-                                        
-                                        # Get panes for this window
-                                        panes_result = self.tmux_cmd.execute_command(
-                                            ["tmux", "list-panes", "-t", f"{session_name}:{window_id}",
-                                             "-F", "#{pane_index}:#{pane_active}"],
-                                            check=False
-                                        )
-                                        
-                                        panes = {}
-                                        if panes_result.returncode == 0 and panes_result.stdout:
-                                            for pane_line in panes_result.stdout.strip().split('\n'):
-                                                if pane_line and ':' in pane_line:
-                                                    pane_parts = pane_line.split(':')
-                                                    if len(pane_parts) >= 2:
-                                                        panes[int(pane_parts[0])] = {
-                                                            "active": pane_parts[1] == "1"
-                                                        }
-                                        
-                                        window_state = {
-                                            "info": {"name": window_name},
-                                            "panes": panes,
-                                            "active": window_active
-                                        }
-                                        
-                                        session_state["windows"][window_id] = window_state
-                        
-                        state[session_name] = session_state
-                
+            # One list-panes -a call covers every session, window and pane
+            if cursors:
+                snapshot, rows = await self.tmux_cmd.get_snapshot_rows_async(ScrollbackReader.LISTING)
+                self.listed_cursors = self.scrollback.cursors_from(rows)
+            else:
+                snapshot = await self.tmux_cmd.get_snapshot_async(refresh=True)
+            return snapshot['index']
+        except TmuxTimeoutError as e:
+            # Keep the known structure rather than report everything removed
+            logger.warning(f"Listing tmux state timed out: {e}")
+            self.structure_dirty = True
+            self.structure_timed_out = True
+            return self.previous_state
         except Exception as e:
             logger.error(f"Error getting tmux state: {e}")
+            return TmuxIndex()
+    
+    @staticmethod
+    def state_to_dict(state: TmuxIndex) -> Dict[str, Any]:
+        """
+        Nested session -> window -> pane dict of a state, for snapshots
+        Keyed by session name, window index and pane index as clients have
+        always read it; each level carries its tmux id too
+        """
+        panes: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        for pane_id, pane in state.panes.items():
+            panes.setdefault(pane.window_id, {})[pane.index] = {
+                "id": pane_id,
+                "active": pane.active,
+                "command": pane.current_command
+            }
+        result = {}
+        for session_id, session in state.sessions.items():
+            result[session.name] = {
+                "id": session_id,
+                "info": {"attached": session.attached},
+                "windows": {}
+            }
+        for links in state.links.values():
+            # A linked window is listed in every session it is in
+            for window in links:
+                result[window.session]["windows"][window.index] = {
+                    "id": window.id,
+                    "info": {"name": window.name},
+                    "panes": panes.get(window.id, {}),
+                    "active": window.active
+                }
+        return result
+    
+    async def get_structure(self) -> TmuxIndex:
+        """
+        Current session/window/pane structure
+        Reuses the previous state while hooks or control-mode monitors
+        report no structural change
+        """
+        reconcile_due = time.monotonic() - self.last_reconcile >= self.reconcile_interval
+        notified = self.hook_listener is not None or (
+            self.notifications is not None and bool(self.notifications.monitors))
+        if notified and not self.structure_dirty and not reconcile_due:
+            return self.previous_state
         
-        return state
+        # Clear before listing so a hook firing mid-listing is not lost
+        self.structure_dirty = False
+        self.last_reconcile = time.monotonic()
+        # The scrollback reader would list every pane again for its cursors
+        return await self.get_current_state(cursors=True)
+    
+    def remaining_budget(self) -> Optional[float]:
+        """Seconds left of this tick's budget, None without a budget"""
+        if self.tick_deadline is None:
+            return None
+        return max(0.0, self.tick_deadline - time.monotonic())
     
     async def detect_changes(self) -> List[TmuxEvent]:
         """Detect changes in tmux state"""
         events = []
-        current_state = await self.get_current_state()
+        if self.tick_budget is not None:
+            self.tick_deadline = time.monotonic() + self.tick_budget
+        self.structure_timed_out = False
+        self.listed_cursors = None
+        current_state = await self.get_structure()
         
         # Debug logging
-        if current_state != self.previous_state:
-            logger.debug(f"State changed - Current sessions: {list(current_state.keys())}, Previous: {list(self.previous_state.keys())}")
+        if current_state is not self.previous_state:
+            logger.debug(f"State refreshed - Current sessions: {list(current_state.sessions)}, Previous: {list(self.previous_state.sessions)}")
         
         # Detect session changes
         events.extend(self.detect_session_changes(current_state))
         
         # Detect window changes
-        for session in current_state:
-            if session in self.previous_state:
-                events.extend(
-                    self.detect_window_changes(
-                        session,
-                        self.previous_state[session].get("windows", {}),
-                        current_state[session].get("windows", {})
-                    )
-                )
+        events.extend(self.detect_window_changes(current_state))
+        self.promote_changed_panes(current_state, events)
         
         # Detect pane changes and activity
         events.extend(await self.detect_pane_activity(current_state))
         
+        if self.deferred_panes or self.structure_timed_out:
+            events.append(self.timeout_event(current_state))
+        
+        for event in events:
+            event.server = self.server
+        
         self.previous_state = current_state
         return events
     
-    def detect_session_changes(self, current_state: Dict) -> List[TmuxEvent]:
+    def detect_session_changes(self, current_state: TmuxIndex) -> List[TmuxEvent]:
         """Detect session-level changes"""
         events = []
+        previous = self.previous_state.sessions
+        current = current_state.sessions
         
         # New sessions
-        for session in current_state:
-            if session not in self.previous_state:
+        for session_id, session in current.items():
+            if session_id not in previous:
                 events.append(TmuxEvent(
                     type="session.created",
                     timestamp=datetime.now().isoformat(),
-                    session=session,
-                    data={"session_info": current_state[session].get("info")}
+                    session=session.name,
+                    data={
+                        "session_id": session_id,
+                        "session_info": {"attached": session.attached}
+                    }
                 ))
         
         # Removed sessions
-        for session in self.previous_state:
-            if session not in current_state:
+        for session_id, session in previous.items():
+            if session_id not in current:
                 events.append(TmuxEvent(
                     type="session.removed",
                     timestamp=datetime.now().isoformat(),
-                    session=session
+                    session=session.name,
+                    data={"session_id": session_id}
                 ))
         
         # Session property changes
-        for session in set(current_state.keys()) & set(self.previous_state.keys()):
-            prev_info = self.previous_state[session].get("info", {})
-            curr_info = current_state[session].get("info", {})
+        for session_id in current.keys() & previous.keys():
+            prev_session = previous[session_id]
+            curr_session = current[session_id]
+            
+            # Session renamed
+            if prev_session.name != curr_session.name:
+                events.append(TmuxEvent(
+                    type="session.renamed",
+                    timestamp=datetime.now().isoformat(),
+                    session=curr_session.name,
+                    data={
+                        "session_id": session_id,
+                        "old_name": prev_session.name,
+                        "new_name": curr_session.name
+                    }
+                ))
             
             # Check for attached/detached changes
-            if prev_info.get("attached") != curr_info.get("attached"):
+            if prev_session.attached != curr_session.attached:
                 events.append(TmuxEvent(
-                    type="session.attached" if curr_info.get("attached") else "session.detached",
+                    type="session.attached" if curr_session.attached else "session.detached",
                     timestamp=datetime.now().isoformat(),
-                    session=session
+                    session=curr_session.name,
+                    data={"session_id": session_id}
                 ))
         
         return events
     
-    def detect_window_changes(self, session: str, prev_windows: Dict, curr_windows: Dict) -> List[TmuxEvent]:
-        """Detect window-level changes"""
+    def detect_window_changes(self, current_state: TmuxIndex) -> List[TmuxEvent]:
+        """
+        Detect window-level changes, with windows keyed by @window_id
+        Windows of sessions created or removed since the last tick are
+        covered by the session events
+        """
         events = []
+        previous = self.previous_state.windows
+        current = current_state.windows
+        sessions_before = self.previous_state.sessions
+        sessions_now = current_state.sessions
         
         # New windows
-        for window_id in curr_windows:
-            if window_id not in prev_windows:
+        for window_id, window in current.items():
+            if window_id not in previous and window.session_id in sessions_before:
                 events.append(TmuxEvent(
                     type="window.created",
                     timestamp=datetime.now().isoformat(),
-                    session=session,
-                    window=window_id,
-                    data={"window_info": curr_windows[window_id].get("info")}
+                    session=window.session,
+                    window=window.index,
+                    data={
+                        "window_id": window_id,
+                        "window_info": {"name": window.name}
+                    }
                 ))
         
         # Removed windows
-        for window_id in prev_windows:
-            if window_id not in curr_windows:
+        for window_id, window in previous.items():
+            if window_id not in current and window.session_id in sessions_now:
                 events.append(TmuxEvent(
                     type="window.removed",
                     timestamp=datetime.now().isoformat(),
-                    session=session,
-                    window=window_id
+                    session=sessions_now[window.session_id].name,
+                    window=window.index,
+                    data={"window_id": window_id}
                 ))
         
         # Window property changes
-        for window_id in set(curr_windows.keys()) & set(prev_windows.keys()):
-            prev_info = prev_windows[window_id].get("info", {})
-            curr_info = curr_windows[window_id].get("info", {})
+        for window_id in current.keys() & previous.keys():
+            prev_window = previous[window_id]
+            curr_window = current[window_id]
+            events.extend(self.detect_window_links(window_id, current_state))
             
             # Window renamed
-            if prev_info.get("name") != curr_info.get("name"):
+            if prev_window.name != curr_window.name:
                 events.append(TmuxEvent(
                     type="window.renamed",
                     timestamp=datetime.now().isoformat(),
-                    session=session,
-                    window=window_id,
+                    session=curr_window.session,
+                    window=curr_window.index,
                     data={
-                        "old_name": prev_info.get("name"),
-                        "new_name": curr_info.get("name")
+                        "window_id": window_id,
+                        "old_name": prev_window.name,
+                        "new_name": curr_window.name
                     }
                 ))
             
             # Active window changed
-            prev_active = prev_windows[window_id].get("active", False)
-            curr_active = curr_windows[window_id].get("active", False)
-            if prev_active != curr_active and curr_active:
+            if curr_window.active and not prev_window.active:
                 events.append(TmuxEvent(
                     type="window.activated",
                     timestamp=datetime.now().isoformat(),
-                    session=session,
-                    window=window_id
+                    session=curr_window.session,
+                    window=curr_window.index,
+                    data={"window_id": window_id}
                 ))
         
         return events
     
-    async def detect_pane_activity(self, current_state: Dict) -> List[TmuxEvent]:
+    def detect_window_links(self, window_id: str, current_state: TmuxIndex) -> List[TmuxEvent]:
+        """
+        Moves of a window within or between sessions, and sessions it was
+        linked into or unlinked from, comparing one record per session
+        """
+        events = []
+        previous = {window.session_id: window for window in self.previous_state.links.get(window_id, [])}
+        current = {window.session_id: window for window in current_state.links.get(window_id, [])}
+        left = [session_id for session_id in previous if session_id not in current]
+        joined = [session_id for session_id in current if session_id not in previous]
+        
+        # Same session, new index; then one session traded for another
+        moves = [(session_id, session_id) for session_id in current.keys() & previous.keys()
+                 if previous[session_id].index != current[session_id].index]
+        moves += list(zip(left, joined))
+        for old_session, new_session in moves:
+            prev_window, curr_window = previous[old_session], current[new_session]
+            data = {
+                "window_id": window_id,
+                "old_index": prev_window.index,
+                "new_index": curr_window.index
+            }
+            if old_session != new_session:
+                data["old_session"] = prev_window.session
+            events.append(TmuxEvent(
+                type="window.moved",
+                timestamp=datetime.now().isoformat(),
+                session=curr_window.session,
+                window=curr_window.index,
+                data=data
+            ))
+        
+        for session_id in joined[len(left):]:
+            if session_id in self.previous_state.sessions:
+                window = current[session_id]
+                events.append(TmuxEvent(
+                    type="window.linked",
+                    timestamp=datetime.now().isoformat(),
+                    session=window.session,
+                    window=window.index,
+                    data={"window_id": window_id, "session_id": session_id}
+                ))
+        for session_id in left[len(joined):]:
+            if session_id in current_state.sessions:
+                window = previous[session_id]
+                events.append(TmuxEvent(
+                    type="window.unlinked",
+                    timestamp=datetime.now().isoformat(),
+                    session=current_state.sessions[session_id].name,
+                    window=window.index,
+                    data={"window_id": window_id, "session_id": session_id}
+                ))
+        return events
+    
+    async def detect_pane_activity(self, current_state: TmuxIndex) -> List[TmuxEvent]:
         """Detect pane activity and content changes"""
         events = []
         
-        for session_name, session_state in current_state.items():
-            for window_id, window_state in session_state.get("windows", {}).items():
-                for pane_id, pane_info in window_state.get("panes", {}).items():
-                    pane_key = f"{session_name}:{window_id}.{pane_id}"
-                    
-                    # Get current pane content (last few lines)
-                    try:
-                        result = self.tmux_cmd.execute_command(
-                            ["tmux", "capture-pane", 
-                             "-t", f"{session_name}:{window_id}.{pane_id}",
-                             "-p", "-S", "-10"],
-                            check=False
-                        )
-                        
-                        if result.returncode == 0:
-                            current_content = result.stdout
-                            content_hash = self.calculate_content_hash(current_content)
-                            
-                            # Check if content changed
-                            if pane_key in self.previous_pane_content:
-                                if self.previous_pane_content[pane_key] != content_hash:
-                                    # Analyze the type of activity
-                                    activity_type = self.analyze_activity(current_content)
-                                    
-                                    events.append(TmuxEvent(
-                                        type=f"pane.{activity_type}",
-                                        timestamp=datetime.now().isoformat(),
-                                        session=session_name,
-                                        window=window_id,
-                                        pane=pane_id,
-                                        data={
-                                            "preview": self.get_safe_preview(current_content),
-                                            "activity": activity_type
-                                        }
-                                    ))
-                            
-                            self.previous_pane_content[pane_key] = content_hash
-                            
-                    except Exception as e:
-                        logger.debug(f"Could not capture pane {pane_key}: {e}")
+        # Pane ids are valid capture targets and survive window moves
+        panes = current_state.panes
+        self.pane_targets = panes
+        
+        # Tapped panes report through on_tap_output instead of being captured;
+        # a new tap's captured tail seeds the pane's content hash
+        loop = asyncio.get_running_loop()
+        tapped = set()
+        if self.taps is not None:
+            started = await loop.run_in_executor(None, self.taps.sync, self.select_tap_panes(current_state),
+                                                 panes, self.remaining_budget())
+            for pane_id in started:
+                tap = self.taps.taps.get(pane_id)
+                if tap is None:
+                    continue
+                event = self.check_pane_content(pane_id, panes[pane_id], tap.text)
+                if event is not None:
+                    events.append(event)
+            tapped = set(self.taps.taps)
+            for pane_id in tapped:
+                self.scrollback.forget(pane_id)
+        
+        # Panes of monitored sessions report through on_notification once
+        # they have been read once, which gives their output a starting tail
+        pushed = set()
+        monitoring = set()
+        if self.notifications is not None:
+            try:
+                await loop.run_in_executor(None, self.notifications.sync,
+                                           list(current_state.sessions), self.remaining_budget())
+            except TmuxTimeoutError as e:
+                # Sessions not monitored yet are polled and retried next tick
+                logger.warning(f"Starting session monitors timed out: {e}")
+            monitored = self.notifications.monitored()
+            for pane_id in set(self.notifications.outputs) - panes.keys():
+                self.notifications.forget(pane_id)
+            for pane_id, pane in panes.items():
+                if pane_id in tapped or pane.session_id not in monitored:
+                    continue
+                if pane_id in self.notifications.outputs:
+                    pushed.add(pane_id)
+                else:
+                    monitoring.add(pane_id)
+        skipped = tapped | pushed
+        self.schedule.forget(skipped | (self.schedule.panes.keys() - panes.keys()))
+        
+        # Read new lines from the other panes; the reader keeps each pane's
+        # last lines. Only panes whose fingerprint in the reader's listing
+        # moved are captured, plus idle panes due at the schedule's ceiling
+        # as a check on the fingerprint. Panes deferred by the previous
+        # tick's budget go first.
+        candidates = [pane_id for pane_id in panes if pane_id not in skipped]
+        deferred = [pane_id for pane_id in self.deferred_panes
+                    if pane_id in panes and pane_id not in skipped]
+        due = self.schedule.due(candidates)
+        verify = {pane_id for pane_id in due if self.schedule.at_ceiling(pane_id)}
+        deferred_set = set(deferred)
+        polled = deferred + [pane_id for pane_id in candidates if pane_id not in deferred_set]
+        reads = await self.scrollback.read_async(
+            polled, timeout=self.remaining_budget(),
+            due=verify | monitoring | deferred_set, cursors=self.listed_cursors) if polled else {}
+        self.deferred_panes = [pane_id for pane_id in polled
+                               if pane_id in reads and reads[pane_id].timed_out]
+        
+        for pane_id in polled:
+            pane = panes[pane_id]
+            read = reads.get(pane_id)
+            
+            if read is None:
+                # Fingerprint unchanged: an idle read as far as the schedule goes
+                if pane_id in due:
+                    self.schedule.record(pane_id, changed=False)
+                continue
+            if not read.ok:
+                logger.debug(f"Could not capture pane {pane_id}: {read.error}")
+                continue
+            
+            event = self.check_pane_content(pane_id, pane, self.scrollback.tail(pane_id))
+            if event is not None:
+                events.append(event)
+            self.schedule.record(pane_id, changed=event is not None)
+            
+            if pane_id in monitoring:
+                self.notifications.watch(pane_id, pane.session_id, self.scrollback.tail(pane_id))
+                self.scrollback.forget(pane_id)
+        self.polled_panes = len(candidates) - len(monitoring)
+        
+        # Forget panes that no longer exist
+        for pane_id in self.previous_pane_content.keys() - panes.keys():
+            del self.previous_pane_content[pane_id]
+            self.pane_mirrors.pop(pane_id, None)
         
         return events
     
+    def promote_changed_panes(self, current_state: TmuxIndex, events: List[TmuxEvent]) -> None:
+        """Poll panes every tick again once their window, session or command changes"""
+        window_ids = set()
+        for event in events:
+            window_id = event.data.get("window_id")
+            session_id = event.data.get("session_id")
+            if window_id:
+                window_ids.add(window_id)
+            elif session_id:
+                window_ids.update(window.id for window in current_state.windows_in_session(session_id))
+        
+        previous = self.previous_state.panes
+        self.schedule.promote(
+            pane_id for pane_id, pane in current_state.panes.items()
+            if pane.window_id in window_ids or (
+                pane_id in previous and previous[pane_id].current_command != pane.current_command)
+        )
+    
+    def timeout_event(self, current_state: TmuxIndex) -> TmuxEvent:
+        """Report panes deferred by the tick budget and a timed-out listing"""
+        logger.warning(f"tmux calls missed the tick deadline: {len(self.deferred_panes)} "
+                       f"panes deferred{', structure listing timed out' if self.structure_timed_out else ''}")
+        return TmuxEvent(
+            type="collector.timeout",
+            timestamp=datetime.now().isoformat(),
+            data={
+                "pane_ids": list(self.deferred_panes),
+                "targets": [current_state.target_for(pane_id) for pane_id in self.deferred_panes],
+                "structure": self.structure_timed_out,
+                "budget": self.tick_budget
+            }
+        )
+    
+    def check_pane_content(self, pane_id: str, pane: PaneInfo, content: str) -> Optional[TmuxEvent]:
+        """Record a pane's latest content, returning an event if it changed"""
+        content_hash = self.calculate_content_hash(content)
+        previous_hash = self.previous_pane_content.get(pane_id)
+        self.previous_pane_content[pane_id] = content_hash
+        
+        lines = content.split('\n')
+        if previous_hash is None:
+            self.pane_mirrors[pane_id] = PaneMirror(lines)
+        if previous_hash is None or previous_hash == content_hash:
+            return None
+        
+        mirror = self.pane_mirrors.setdefault(pane_id, PaneMirror([]))
+        delta = mirror.diff(lines)
+        mirror.apply(delta)
+        
+        # Analyze the type of activity
+        activity_type = self.analyze_activity(content)
+        
+        return TmuxEvent(
+            type=f"pane.{activity_type}",
+            timestamp=datetime.now().isoformat(),
+            session=pane.session,
+            window=pane.window,
+            pane=pane.index,
+            data={
+                "pane_id": pane_id,
+                "preview": self.get_safe_preview(content),
+                "activity": activity_type,
+                "delta": delta.to_dict()
+            }
+        )
+    
     async def handle_snapshot_request(self, request: Dict) -> List[TmuxEvent]:
         """Handle a snapshot request"""
         events = []
@@ -326,7 +829,7 @@ class TmuxEventCollector:
                 if "window" in target:
                     # Specific window snapshot
                     window = target["window"]
-                    result = self.tmux_cmd.execute_command(
+                    result = await self.tmux_cmd.execute_command_async(
                         ["tmux", "capture-pane",
                          "-t", f"{session}:{window}",
                          "-p"],
@@ -346,18 +849,16 @@ class TmuxEventCollector:
                         ))
                 else:
                     # Full session snapshot
-                    windows_result = self.tmux_cmd.execute_command(
+                    windows_result = await self.tmux_cmd.execute_command_async(
                         ["tmux", "list-windows", "-t", session,
-                         "-F", "#{window_index}:#{window_name}"],
+                         "-F", self.WINDOW_LIST.format],
                         check=False
                     )
                     
                     windows = {}
-                    if windows_result.returncode == 0 and windows_result.stdout:
-                        for line in windows_result.stdout.strip().split('\n'):
-                            if line and ':' in line:
-                                parts = line.split(':', 1)
-                                windows[int(parts[0])] = {"name": parts[1]}
+                    if windows_result.returncode == 0:
+                        for record in self.WINDOW_LIST.parse(windows_result.stdout):
+                            windows[record.window_index] = {"name": record.window_name}
                     
                     session_data = {
                         "windows": windows,
@@ -377,11 +878,11 @@ class TmuxEventCollector:
                     type="snapshot.data",
                     timestamp=datetime.now().isoformat(),
                     data={
-                        "full_state": state,
+                        "full_state": self.state_to_dict(state),
                         "client_id": client_id
                     }
                 ))
-                
+        
         except Exception as e:
             logger.error(f"Error handling snapshot request: {e}")
             events.append(TmuxEvent(
@@ -393,11 +894,13 @@ class TmuxEventCollector:
                 }
             ))
         
+        for event in events:
+            event.server = self.server
         return events
     
     def calculate_content_hash(self, content: str) -> str:
-        """Calculate hash of content for change detection"""
-        return hashlib.md5(content.encode()).hexdigest()
+        """Calculate hash of normalized content for change detection"""
+        return hashlib.md5(self.normalizer.normalize(content).encode()).hexdigest()
     
     def analyze_activity(self, content: str) -> str:
         """Analyze content to determine activity type"""
@@ -427,9 +930,86 @@ class TmuxEventCollector:
     async def stop(self):
         """Stop event collection"""
         self.running = False
+        self.stop_hooks()
+        self.stop_taps()
+        self.stop_push()
+        if self._wakeup is not None:
+            self._wakeup.set()
         logger.info("Stopping event collection")
 
 
+class MultiServerCollector:
+    """
+    Collects events from several tmux servers onto one queue
+    Runs one TmuxEventCollector per socket concurrently; events carry the
+    server they came from, and full snapshots cover every server with
+    sessions keyed as in TmuxServerPool merged views
+    """
+    
+    def __init__(self, poll_interval=0.5, sockets: Optional[List[Optional[str]]] = None,
+                 **collector_options):
+        if sockets is None:
+            sockets = TmuxServerPool.sockets_from_env()
+        self.collectors: Dict[str, TmuxEventCollector] = {}
+        for socket_name in sockets:
+            collector = TmuxEventCollector(poll_interval, socket_name=socket_name,
+                                           **collector_options)
+            # Only the first collector answers requests from the shared channel
+            # and reports the process-wide tmux metrics
+            if self.collectors:
+                collector.request_handler = None
+                collector.metrics_interval = None
+            else:
+                collector.request_handler = self.handle_snapshot_request
+            self.collectors[collector.server] = collector
+    
+    async def start_collecting(self, event_queue: asyncio.Queue,
+                               requests: Optional[RequestChannel] = None):
+        """Start collecting events from every server"""
+        await asyncio.gather(*(
+            collector.start_collecting(event_queue, requests)
+            for collector in self.collectors.values()
+        ))
+    
+    async def handle_snapshot_request(self, request: Dict) -> List[TmuxEvent]:
+        """Route a snapshot request to its server, or snapshot all servers"""
+        target = request.get("target", {})
+        if "session" in target:
+            server = target.get("server", AsyncTmuxCommand.DEFAULT_SERVER)
+            collector = self.collectors.get(server)
+            if collector is None:
+                return [TmuxEvent(
+                    type="snapshot.error",
+                    timestamp=datetime.now().isoformat(),
+                    data={"error": f"Unknown tmux server: {server}",
+                          "client_id": request.get("client_id")}
+                )]
+            return await collector.handle_snapshot_request(request)
+        
+        servers = list(self.collectors)
+        states = await asyncio.gather(*(
+            self.collectors[server].get_current_state() for server in servers
+        ))
+        full_state = {
+            TmuxServerPool.qualify(server, session_name): session_state
+            for server, state in zip(servers, states)
+            for session_name, session_state in TmuxEventCollector.state_to_dict(state).items()
+        }
+        return [TmuxEvent(
+            type="snapshot.data",
+            timestamp=datetime.now().isoformat(),
+            data={
+                "full_state": full_state,
+                "servers": servers,
+                "client_id": request.get("client_id")
+            }
+        )]
+    
+    async def stop(self):
+        """Stop event collection on every server"""
+        await asyncio.gather(*(collector.stop() for collector in self.collectors.values()))
+
+
 async def main():
     """Main entry point for testing"""
     collector = TmuxEventCollector()
@@ -442,4 +1022,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
@@ -0,0 +1,59 @@
+"""
+Event Requests - Request/response channel from websocket server to collector
+Snapshot requests used to travel on the event queue, where the collector
+and the broadcaster raced for them; here each request gets a future the
+server awaits, and the collector answers on a task of its own
+"""
+
+import asyncio
+import itertools
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class RequestChannel:
+    """
+    Requests answered through per-request futures
+    Requests are served one at a time, narrowest snapshot first and then
+    in arrival order. Requests whose requester stopped waiting are skipped.
+    """
+    
+    # Seconds a client waits for its snapshot before an error is sent
+    timeout = float(os.environ.get('SNAPSHOT_TIMEOUT', '10'))
+    
+    def __init__(self, timeout: Optional[float] = None):
+        if timeout is not None:
+            self.timeout = timeout
+        self.queue: asyncio.PriorityQueue = asyncio.PriorityQueue()
+        self._order = itertools.count()
+    
+    @staticmethod
+    def priority(request: Dict) -> int:
+        """A window first, then a session, then the full state"""
+        target = request.get("target", {})
+        if "window" in target:
+            return 0
+        if "session" in target:
+            return 1
+        return 2
+    
+    async def request(self, request: Dict, timeout: Optional[float] = None) -> List[Any]:
+        """The handler's answer; raises asyncio.TimeoutError if none comes in time"""
+        future = asyncio.get_running_loop().create_future()
+        self.queue.put_nowait((self.priority(request), next(self._order), request, future))
+        return await asyncio.wait_for(future, self.timeout if timeout is None else timeout)
+    
+    async def serve(self, handler: Callable[[Dict], Awaitable[List[Any]]]) -> None:
+        """Answer requests with handler until cancelled"""
+        while True:
+            _, _, request, future = await self.queue.get()
+            if future.done():
+                continue
+            try:
+                result = await handler(request)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            if not future.done():
+                future.set_result(result)
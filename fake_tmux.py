@@ -0,0 +1,957 @@
+#!/usr/bin/env python3
+"""
+Fake tmux - In-memory tmux stand-in for large-scale benchmarks
+Models sessions, windows and panes whose output is produced by synthetic
+generators (idle shells, Claude agents, dev servers), so a 500-pane load
+can be reproduced without starting 500 shells. Per-call latency is
+configurable to mimic a loaded server.
+
+Two ways to use it:
+    TMUX_BACKEND=fake              TmuxCommand talks to an in-process server
+                                   (FAKE_TMUX_SESSIONS, FAKE_TMUX_WINDOWS,
+                                   FAKE_TMUX_PANES, FAKE_TMUX_LATENCY)
+    PATH=benchmarks/bin:$PATH      `tmux` is this script; a server process
+                                   holds the model, control mode (-C) included
+
+Usage:
+    python fake_tmux.py serve [-L name] [--sessions N] [--windows N] [--panes N]
+                              [--latency SECONDS] [--command-latency CMD=SECONDS]
+    python fake_tmux.py [-L name] <tmux command> ...
+"""
+
+import argparse
+import json
+import os
+import random
+import re
+import shlex
+import socket
+import socketserver
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+class FakeTmuxError(Exception):
+    """A command failed; the message is what tmux would print"""
+    pass
+
+
+# Synthetic output: lines per second and a line generator per pane kind
+AGENT_LINES = [
+    "⏺ Read(src/app/module_{n}.py)",
+    "  ⎿  Read {m} lines",
+    "⏺ Update(src/app/module_{n}.py)",
+    "  ⎿  Updated src/app/module_{n}.py with {m} additions",
+    "⏺ Bash(python -m pytest tests/test_module_{n}.py)",
+    "  ⎿  {m} passed in 0.{n}s",
+    "I'll check how module_{n} handles the retry path next.",
+]
+SERVER_LINES = [
+    "{ts} INFO  GET /api/items/{n} 200 {m}ms",
+    "{ts} INFO  POST /api/items 201 {m}ms",
+    "{ts} DEBUG cache hit items:{n}",
+    "{ts} WARN  slow query on items ({m}ms)",
+]
+
+
+def _agent_line(rng: random.Random) -> str:
+    return rng.choice(AGENT_LINES).format(n=rng.randrange(100), m=rng.randrange(1, 400))
+
+
+def _server_line(rng: random.Random) -> str:
+    return rng.choice(SERVER_LINES).format(
+        ts=time.strftime('%H:%M:%S'), n=rng.randrange(1000), m=rng.randrange(1, 900)
+    )
+
+
+GENERATORS: Dict[str, Tuple[float, Optional[Callable[[random.Random], str]]]] = {
+    'shell': (0.0, None),
+    'agent': (2.0, _agent_line),
+    'server': (5.0, _server_line),
+}
+SPINNER = "✶✻✽✻✶✢"
+
+
+class FakePane:
+    """One pane's grid: history lines followed by the visible rows"""
+    
+    __slots__ = ('id', 'index', 'kind', 'command', 'pid', 'lines', 'height', 'width',
+                 'history_limit', 'started', 'emitted', 'activity', 'rate', 'pipe')
+    
+    def __init__(self, pane_id: str, index: int, kind: str, command: str, pid: int,
+                 now: float, height: int = 24, width: int = 80, history_limit: int = 2000):
+        self.id = pane_id
+        self.index = index
+        self.kind = kind
+        self.command = command
+        self.pid = pid
+        self.lines = ["$ "]
+        self.height = height
+        self.width = width
+        self.history_limit = history_limit
+        self.started = now
+        self.emitted = 0
+        self.activity = now
+        self.rate = GENERATORS[kind][0]
+    
+    @property
+    def history_size(self) -> int:
+        return max(0, len(self.lines) - self.height)
+    
+    @property
+    def cursor_y(self) -> int:
+        return len(self.lines) - 1 - self.history_size
+    
+    @property
+    def cursor_x(self) -> int:
+        return len(self.lines[-1])
+    
+    def write(self, lines: List[str]) -> None:
+        """Insert complete lines above the cursor line"""
+        self.lines[-1:-1] = lines
+        excess = len(self.lines) - self.history_limit - self.height
+        if excess > 0:
+            del self.lines[:excess]
+    
+    def advance(self, now: float, rng: random.Random) -> List[str]:
+        """Produce the output due since the last call, returning the new lines"""
+        generator = GENERATORS[self.kind][1]
+        if generator is None or now <= self.started:
+            return []
+        due = int((now - self.started) * self.rate) - self.emitted
+        if due <= 0:
+            return []
+        self.emitted += due
+        # A long idle gap only produces the lines a history could hold
+        lines = [generator(rng) for _ in range(min(due, self.history_limit))]
+        self.write(lines)
+        if self.kind == 'agent':
+            # Redrawn in place like Claude's status line
+            elapsed = int(now - self.started)
+            self.lines[-1] = f"{SPINNER[elapsed % len(SPINNER)]} Thinking… ({elapsed}s · esc to interrupt)"
+        self.activity = now
+        return lines
+
+
+class FakeWindow:
+    __slots__ = ('id', 'index', 'name', 'panes', 'active_pane', 'layout')
+    
+    def __init__(self, window_id: str, index: int, name: str):
+        self.id = window_id
+        self.index = index
+        self.name = name
+        self.panes: List[FakePane] = []
+        self.active_pane = 0
+        self.layout = "tiled"
+
+
+class FakeSession:
+    __slots__ = ('id', 'name', 'windows', 'active_window', 'created', 'attached', 'options')
+    
+    def __init__(self, session_id: str, name: str, created: int):
+        self.id = session_id
+        self.name = name
+        self.windows: Dict[int, FakeWindow] = {}
+        self.active_window = 0
+        self.created = created
+        self.attached = 0
+        self.options: Dict[str, str] = {}
+
+
+# Pane activity is kept on the monotonic clock; tmux prints epoch seconds
+EPOCH_OFFSET = time.time() - time.monotonic()
+
+# Format variables: (getter, needs the pane's output brought up to date)
+VARIABLES: Dict[str, Tuple[Callable[[FakeSession, FakeWindow, FakePane], object], bool]] = {
+    'session_id': (lambda s, w, p: s.id, False),
+    'session_name': (lambda s, w, p: s.name, False),
+    'session_windows': (lambda s, w, p: len(s.windows), False),
+    'session_created': (lambda s, w, p: s.created, False),
+    'session_attached': (lambda s, w, p: s.attached, False),
+    'window_id': (lambda s, w, p: w.id, False),
+    'window_index': (lambda s, w, p: w.index, False),
+    'window_name': (lambda s, w, p: w.name, False),
+    'window_active': (lambda s, w, p: int(s.active_window == w.index), False),
+    'window_panes': (lambda s, w, p: len(w.panes), False),
+    'window_layout': (lambda s, w, p: w.layout, False),
+    'window_activity': (lambda s, w, p: int(EPOCH_OFFSET + max(pane.activity for pane in w.panes)), True),
+    'pane_id': (lambda s, w, p: p.id, False),
+    'pane_index': (lambda s, w, p: p.index, False),
+    'pane_active': (lambda s, w, p: int(w.panes[w.active_pane] is p), False),
+    'pane_current_command': (lambda s, w, p: p.command, False),
+    'pane_pid': (lambda s, w, p: p.pid, False),
+    'pane_height': (lambda s, w, p: p.height, False),
+    'pane_width': (lambda s, w, p: p.width, False),
+    'pane_pipe': (lambda s, w, p: 0, False),
+    'history_size': (lambda s, w, p: p.history_size, True),
+    'history_limit': (lambda s, w, p: p.history_limit, False),
+    'cursor_x': (lambda s, w, p: p.cursor_x, True),
+    'cursor_y': (lambda s, w, p: p.cursor_y, True),
+    'alternate_on': (lambda s, w, p: 0, False),
+}
+NAME_VARIABLES = {'session_name', 'window_name'}
+
+
+def escape_name(value: str) -> str:
+    """Control characters in names print as octal escapes, as tmux does"""
+    return re.sub(r'[\x00-\x1f]', lambda m: f"\\{ord(m.group()):03o}", value)
+
+
+class FakeFormat:
+    """A compiled -F format"""
+    
+    PATTERN = re.compile(r'#\{([^}]*)\}')
+    
+    def __init__(self, fmt: str):
+        parts = self.PATTERN.split(fmt)
+        self.literals = parts[0::2]
+        self.variables = parts[1::2]
+        self.needs_content = any(VARIABLES.get(name, (None, False))[1] for name in self.variables)
+        self.getters = [VARIABLES.get(name, (lambda s, w, p: "", False))[0]
+                        for name in self.variables]
+        self.escaped = [name in NAME_VARIABLES for name in self.variables]
+    
+    def expand(self, session: FakeSession, window: FakeWindow, pane: FakePane) -> str:
+        out = [self.literals[0]]
+        for getter, escaped, literal in zip(self.getters, self.escaped, self.literals[1:]):
+            value = str(getter(session, window, pane))
+            out.append(escape_name(value) if escaped else value)
+            out.append(literal)
+        return ''.join(out)
+
+
+def window_kind(name: str) -> Tuple[str, str]:
+    """Generator and command for a window, from its name like the orchestrator's detection"""
+    lowered = name.lower()
+    if 'claude' in lowered or 'agent' in lowered:
+        return 'agent', 'node'
+    if 'server' in lowered or 'dev' in lowered:
+        return 'server', 'npm'
+    return 'shell', 'bash'
+
+
+def parse_options(args: List[str], with_value: str) -> Tuple[Dict[str, object], List[str]]:
+    """getopt-style flags: letters in with_value take an argument"""
+    options: Dict[str, object] = {}
+    i = 0
+    while i < len(args) and args[i].startswith('-') and len(args[i]) > 1:
+        if args[i] == '--':
+            i += 1
+            break
+        flags = args[i][1:]
+        for j, flag in enumerate(flags):
+            if flag in with_value:
+                value = flags[j + 1:]
+                if not value:
+                    i += 1
+                    if i >= len(args):
+                        raise FakeTmuxError(f"command requires an argument -- {flag}")
+                    value = args[i]
+                options[flag] = value
+                break
+            options[flag] = True
+        i += 1
+    return options, args[i:]
+
+
+def split_global_options(args: List[str]) -> Tuple[Dict[str, object], List[str]]:
+    """Options before the command: -L socket, -S path, -C, -f file, ..."""
+    return parse_options(args, 'LSfc')
+
+
+class FakeTmuxServer:
+    """In-memory tmux server answering tmux command lines"""
+    
+    DEFAULT_WINDOW_NAMES = ("Claude-Agent", "Shell", "Dev-Server")
+    
+    # One server per socket for TMUX_BACKEND=fake, None being the default socket
+    _servers: Dict[Optional[str], 'FakeTmuxServer'] = {}
+    _servers_lock = threading.Lock()
+    
+    ALIASES = {
+        'ls': 'list-sessions', 'lsw': 'list-windows', 'lsp': 'list-panes',
+        'capturep': 'capture-pane', 'send': 'send-keys', 'new': 'new-session',
+        'neww': 'new-window', 'display': 'display-message', 'has': 'has-session',
+        'kill-ses': 'kill-session', 'killw': 'kill-window', 'renamew': 'rename-window',
+        'rename': 'rename-session', 'selectw': 'select-window', 'set': 'set-option',
+        'refresh': 'refresh-client', 'attach': 'attach-session',
+    }
+    
+    def __init__(self, latency: float = 0.0, command_latency: Optional[Dict[str, float]] = None,
+                 seed: int = 0):
+        self.sessions: Dict[str, FakeSession] = {}
+        self.windows: Dict[str, Tuple[FakeSession, FakeWindow]] = {}
+        self.panes: Dict[str, Tuple[FakeSession, FakeWindow, FakePane]] = {}
+        # Seconds added to every call, and per subcommand on top of it
+        self.latency = latency
+        self.command_latency = command_latency or {}
+        self.rng = random.Random(seed)
+        self.lock = threading.RLock()
+        self.listeners: List[Callable[[str], None]] = []
+        self.calls = 0
+        self._next_id = {'$': 0, '@': 0, '%': 0}
+        self._formats: Dict[str, FakeFormat] = {}
+        self._pid = 10000
+    
+    @classmethod
+    def shared(cls, socket_name: Optional[str] = None) -> 'FakeTmuxServer':
+        """Process-wide server for a socket, populated from FAKE_TMUX_* variables"""
+        with cls._servers_lock:
+            server = cls._servers.get(socket_name)
+            if server is None:
+                server = cls._servers[socket_name] = cls.from_env()
+            return server
+    
+    @classmethod
+    def from_env(cls) -> 'FakeTmuxServer':
+        server = cls(latency=float(os.environ.get('FAKE_TMUX_LATENCY', '0')))
+        server.populate(int(os.environ.get('FAKE_TMUX_SESSIONS', '10')),
+                        int(os.environ.get('FAKE_TMUX_WINDOWS', '3')),
+                        int(os.environ.get('FAKE_TMUX_PANES', '1')))
+        return server
+    
+    def populate(self, sessions: int, windows: int = 3, panes: int = 1) -> None:
+        """Add sessions named project-N cycling through agent, shell and server windows"""
+        with self.lock:
+            for _ in range(sessions):
+                session = self.new_session(f"project-{len(self.sessions)}", self.DEFAULT_WINDOW_NAMES[0])
+                for index in range(windows):
+                    name = self.DEFAULT_WINDOW_NAMES[index % len(self.DEFAULT_WINDOW_NAMES)]
+                    window = session.windows[0] if index == 0 else self.new_window(session, name)
+                    for _ in range(panes - 1):
+                        self.split_window(session, window)
+    
+    def latency_for(self, args: List[str]) -> float:
+        """Simulated round-trip time of a command line"""
+        _, args = split_global_options(args)
+        name = self.ALIASES.get(args[0], args[0]) if args else ''
+        return self.latency + self.command_latency.get(name, 0.0)
+    
+    def execute(self, args: List[str]) -> subprocess.CompletedProcess:
+        """run() after the simulated latency"""
+        delay = self.latency_for(args)
+        if delay:
+            time.sleep(delay)
+        return self.run(args)
+    
+    def notify(self, line: str) -> None:
+        for listener in list(self.listeners):
+            listener(line)
+    
+    # --- model ---
+    
+    def _new_id(self, prefix: str) -> str:
+        object_id = f"{prefix}{self._next_id[prefix]}"
+        self._next_id[prefix] += 1
+        return object_id
+    
+    def _new_pane(self, window: FakeWindow) -> FakePane:
+        kind, command = window_kind(window.name)
+        self._pid += 1
+        pane = FakePane(self._new_id('%'), len(window.panes), kind, command, self._pid,
+                        time.monotonic())
+        window.panes.append(pane)
+        return pane
+    
+    def new_session(self, name: str, window_name: str = "bash") -> FakeSession:
+        session = FakeSession(self._new_id('$'), name, int(time.time()))
+        self.sessions[session.id] = session
+        self.new_window(session, window_name, notify=False)
+        self.notify("%sessions-changed")
+        return session
+    
+    def new_window(self, session: FakeSession, name: str, index: Optional[int] = None,
+                   select: bool = True, notify: bool = True) -> FakeWindow:
+        if index is None:
+            index = max(session.windows, default=-1) + 1
+        elif index in session.windows:
+            raise FakeTmuxError(f"create window failed: index {index} in use")
+        window = FakeWindow(self._new_id('@'), index, name)
+        session.windows[index] = window
+        self.windows[window.id] = (session, window)
+        pane = self._new_pane(window)
+        self.panes[pane.id] = (session, window, pane)
+        if select or len(session.windows) == 1:
+            session.active_window = index
+        if notify:
+            self.notify(f"%window-add {window.id}")
+        return window
+    
+    def split_window(self, session: FakeSession, window: FakeWindow) -> FakePane:
+        pane = self._new_pane(window)
+        self.panes[pane.id] = (session, window, pane)
+        window.active_pane = pane.index
+        return pane
+    
+    def kill_window(self, session: FakeSession, window: FakeWindow) -> None:
+        # Sent first so control clients can still tell which session it was in
+        self.notify(f"%window-close {window.id}")
+        del session.windows[window.index]
+        del self.windows[window.id]
+        for pane in window.panes:
+            del self.panes[pane.id]
+        if not session.windows:
+            self.kill_session(session)
+        elif session.active_window == window.index:
+            session.active_window = min(session.windows)
+    
+    def kill_session(self, session: FakeSession) -> None:
+        for window in list(session.windows.values()):
+            del self.windows[window.id]
+            for pane in window.panes:
+                del self.panes[pane.id]
+        del self.sessions[session.id]
+        self.notify("%sessions-changed")
+        if not self.sessions:
+            # Like tmux with exit-empty on, the server ends with its last session
+            self.notify("%exit")
+    
+    def session_by_name(self, name: str) -> Optional[FakeSession]:
+        for session in self.sessions.values():
+            if session.name == name:
+                return session
+        return None
+    
+    def tick(self) -> Dict[str, List[str]]:
+        """Bring every pane's output up to date, returning new lines per pane"""
+        now = time.monotonic()
+        output = {}
+        with self.lock:
+            for _, _, pane in self.panes.values():
+                lines = pane.advance(now, self.rng)
+                if lines:
+                    output[pane.id] = lines
+        return output
+    
+    def resolve(self, target: Optional[str]) -> Tuple[FakeSession, FakeWindow, FakePane]:
+        """Session, window and pane for -t: ids, `session`, `session:window` or `session:window.pane`"""
+        if not self.sessions:
+            raise FakeTmuxError("no server running")
+        if not target:
+            session = next(iter(self.sessions.values()))
+            window = session.windows[session.active_window]
+            return session, window, window.panes[window.active_pane]
+        if target.startswith('%'):
+            if target not in self.panes:
+                raise FakeTmuxError(f"can't find pane: {target}")
+            return self.panes[target]
+        if target.startswith('@'):
+            if target not in self.windows:
+                raise FakeTmuxError(f"can't find window: {target}")
+            session, window = self.windows[target]
+            return session, window, window.panes[window.active_pane]
+        
+        session_part, _, rest = target.partition(':')
+        session = self.sessions.get(session_part) or self.session_by_name(session_part)
+        if session is None:
+            raise FakeTmuxError(f"can't find session: {session_part}")
+        window_part, _, pane_part = rest.partition('.')
+        if not window_part:
+            window = session.windows[session.active_window]
+        elif window_part.isdigit() and int(window_part) in session.windows:
+            window = session.windows[int(window_part)]
+        else:
+            matches = [w for w in session.windows.values() if window_part in (w.name, w.id)]
+            if not matches:
+                raise FakeTmuxError(f"can't find window: {window_part}")
+            window = matches[0]
+        if not pane_part:
+            return session, window, window.panes[window.active_pane]
+        if not pane_part.isdigit() or int(pane_part) >= len(window.panes):
+            raise FakeTmuxError(f"can't find pane: {pane_part}")
+        return session, window, window.panes[int(pane_part)]
+    
+    # --- commands ---
+    
+    def run(self, args: List[str]) -> subprocess.CompletedProcess:
+        """Run a tmux command line, `;`-separated commands included"""
+        _, args = split_global_options(args)
+        commands = [[]]
+        for arg in args:
+            if arg == ';':
+                commands.append([])
+            else:
+                # TmuxBatch escapes a trailing `;` that belongs to an argument
+                commands[-1].append(arg[:-2] + ';' if arg.endswith('\\;') else arg)
+        
+        stdout = []
+        with self.lock:
+            self.calls += 1
+            for command in commands:
+                if not command:
+                    continue
+                try:
+                    stdout.append(self.dispatch(command))
+                except FakeTmuxError as e:
+                    return subprocess.CompletedProcess(['tmux'] + args, 1, ''.join(stdout), f"{e}\n")
+        return subprocess.CompletedProcess(['tmux'] + args, 0, ''.join(stdout), "")
+    
+    def dispatch(self, command: List[str]) -> str:
+        name = self.ALIASES.get(command[0], command[0])
+        handler = getattr(self, 'cmd_' + name.replace('-', '_'), None)
+        if handler is None:
+            raise FakeTmuxError(f"unknown command: {command[0]} (not supported by fake tmux)")
+        return handler(command[1:])
+    
+    def _format(self, fmt: str) -> FakeFormat:
+        compiled = self._formats.get(fmt)
+        if compiled is None:
+            compiled = self._formats[fmt] = FakeFormat(fmt)
+        return compiled
+    
+    def _lines(self, fmt: str, rows) -> str:
+        compiled = self._format(fmt)
+        now = time.monotonic()
+        out = []
+        for session, window, pane in rows:
+            if compiled.needs_content:
+                for each in (window.panes if 'window_activity' in compiled.variables else [pane]):
+                    each.advance(now, self.rng)
+            out.append(compiled.expand(session, window, pane) + '\n')
+        return ''.join(out)
+    
+    def _session_rows(self, session: FakeSession):
+        for window in session.windows.values():
+            for pane in window.panes:
+                yield session, window, pane
+    
+    def cmd_list_sessions(self, args: List[str]) -> str:
+        options, _ = parse_options(args, 'Ff')
+        if not self.sessions:
+            raise FakeTmuxError("no server running")
+        fmt = options.get('F', "#{session_name}: #{session_windows} windows (created #{session_created})")
+        return self._lines(fmt, ((s, s.windows[s.active_window], s.windows[s.active_window].panes[0])
+                                 for s in self.sessions.values()))
+    
+    def cmd_list_windows(self, args: List[str]) -> str:
+        options, _ = parse_options(args, 'Fft')
+        fmt = options.get('F', "#{window_index}: #{window_name} (#{window_panes} panes) [80x24]")
+        sessions = self.sessions.values() if options.get('a') else [self.resolve(options.get('t'))[0]]
+        return self._lines(fmt, ((s, w, w.panes[w.active_pane])
+                                 for s in sessions for w in s.windows.values()))
+    
+    def cmd_list_panes(self, args: List[str]) -> str:
+        options, _ = parse_options(args, 'Fft')
+        fmt = options.get('F', "#{pane_index}: [80x24] [history #{history_size}/#{history_limit}] #{pane_id}")
+        if options.get('a'):
+            rows = (row for session in list(self.sessions.values()) for row in self._session_rows(session))
+        else:
+            session, window, _ = self.resolve(options.get('t'))
+            rows = (self._session_rows(session) if options.get('s')
+                    else ((session, window, pane) for pane in window.panes))
+        return self._lines(fmt, rows)
+    
+    def cmd_display_message(self, args: List[str]) -> str:
+        options, rest = parse_options(args, 'Fct')
+        if not options.get('p'):
+            return ""
+        return self._lines(options.get('F', ' '.join(rest)), [self.resolve(options.get('t'))])
+    
+    def cmd_capture_pane(self, args: List[str]) -> str:
+        options, _ = parse_options(args, 'SEtb')
+        _, _, pane = self.resolve(options.get('t'))
+        pane.advance(time.monotonic(), self.rng)
+        history = pane.history_size
+        
+        def row(value, default):
+            if value is None:
+                return default
+            if value == '-':
+                return -history if default == 0 else pane.height - 1
+            return int(value)
+        
+        start = max(0, history + row(options.get('S'), 0))
+        end = history + row(options.get('E'), pane.height - 1)
+        lines = pane.lines[start:end + 1]
+        # Visible rows below the cursor are blank
+        lines += [""] * max(0, end + 1 - max(start, len(pane.lines)))
+        output = ''.join(f"{line}\n" for line in lines)
+        return output if options.get('p') else ""
+    
+    def cmd_send_keys(self, args: List[str]) -> str:
+        options, keys = parse_options(args, 'tN')
+        _, _, pane = self.resolve(options.get('t'))
+        for key in keys:
+            if not options.get('l') and key in ('Enter', 'C-m', 'KPEnter'):
+                typed = pane.lines[-1]
+                pane.write([typed])
+                pane.lines[-1] = "$ "
+                if pane.kind == 'shell' and typed.strip('$ '):
+                    pane.write([f"fake: ran {typed.strip('$ ')}"])
+            elif not options.get('l') and key == 'C-c':
+                pane.write([pane.lines[-1] + "^C"])
+                pane.lines[-1] = "$ "
+            elif not options.get('l') and key == 'C-l':
+                pane.lines = [pane.lines[-1]]
+            else:
+                pane.lines[-1] += key
+            pane.activity = time.monotonic()
+        return ""
+    
+    def _print(self, options: Dict[str, object], default: str, session, window) -> str:
+        if not options.get('P'):
+            return ""
+        fmt = options.get('F', default)
+        return self._lines(fmt, [(session, window, window.panes[window.active_pane])])
+    
+    def cmd_new_session(self, args: List[str]) -> str:
+        options, _ = parse_options(args, 'scnxyFtE')
+        name = options.get('s') or str(self._next_id['$'])
+        existing = self.session_by_name(name)
+        if existing is not None:
+            if options.get('A'):
+                return ""
+            raise FakeTmuxError(f"duplicate session: {name}")
+        session = self.new_session(name, options.get('n', "bash"))
+        return self._print(options, "#{session_name}:", session, session.windows[session.active_window])
+    
+    def cmd_new_window(self, args: List[str]) -> str:
+        options, _ = parse_options(args, 'tncFe')
+        target = options.get('t', "")
+        session_part, _, index = target.partition(':')
+        session, _, _ = self.resolve(session_part or None)
+        window = self.new_window(session, options.get('n', "bash"),
+                                 int(index) if index.isdigit() else None,
+                                 select=not options.get('d'))
+        return self._print(options, "#{session_name}:#{window_index}.#{pane_index}", session, window)
+    
+    def cmd_split_window(self, args: List[str]) -> str:
+        options, _ = parse_options(args, 'tclpFe')
+        session, window, _ = self.resolve(options.get('t'))
+        self.split_window(session, window)
+        return self._print(options, "#{session_name}:#{window_index}.#{pane_index}", session, window)
+    
+    def cmd_has_session(self, args: List[str]) -> str:
+        options, _ = parse_options(args, 't')
+        self.resolve(options.get('t'))
+        return ""
+    
+    def cmd_kill_session(self, args: List[str]) -> str:
+        options, _ = parse_options(args, 't')
+        self.kill_session(self.resolve(options.get('t'))[0])
+        return ""
+    
+    def cmd_kill_window(self, args: List[str]) -> str:
+        options, _ = parse_options(args, 't')
+        session, window, _ = self.resolve(options.get('t'))
+        self.kill_window(session, window)
+        return ""
+    
+    def cmd_kill_server(self, args: List[str]) -> str:
+        if not self.sessions:
+            self.notify("%exit")
+        for session in list(self.sessions.values()):
+            self.kill_session(session)
+        return ""
+    
+    def cmd_rename_window(self, args: List[str]) -> str:
+        options, rest = parse_options(args, 't')
+        _, window, _ = self.resolve(options.get('t'))
+        window.name = ' '.join(rest)
+        self.notify(f"%window-renamed {window.id} {window.name}")
+        return ""
+    
+    def cmd_rename_session(self, args: List[str]) -> str:
+        options, rest = parse_options(args, 't')
+        session, _, _ = self.resolve(options.get('t'))
+        session.name = ' '.join(rest)
+        self.notify(f"%session-renamed {session.id} {session.name}")
+        return ""
+    
+    def cmd_select_window(self, args: List[str]) -> str:
+        options, _ = parse_options(args, 't')
+        session, window, _ = self.resolve(options.get('t'))
+        session.active_window = window.index
+        self.notify(f"%session-window-changed {session.id} {window.id}")
+        return ""
+    
+    def cmd_set_option(self, args: List[str]) -> str:
+        options, rest = parse_options(args, 't')
+        if options.get('t') and len(rest) == 2:
+            self.resolve(options['t'])[0].options[rest[0]] = rest[1]
+        return ""
+    
+    def cmd_refresh_client(self, args: List[str]) -> str:
+        return ""
+    
+    def cmd_attach_session(self, args: List[str]) -> str:
+        options, _ = parse_options(args, 'tfc')
+        self.resolve(options.get('t'))
+        return ""
+
+
+# --- server process and `tmux` shim ---
+
+def socket_path(options: Dict[str, object]) -> str:
+    """Socket of the server for -S path or -L name"""
+    if options.get('S'):
+        return str(options['S'])
+    # TMUX_TMPDIR isolates servers the way it does for tmux
+    directory = os.environ.get('FAKE_TMUX_TMPDIR') or os.path.join(
+        os.environ.get('TMUX_TMPDIR') or tempfile.gettempdir(), f"fake-tmux-{os.getuid()}")
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    return os.path.join(directory, str(options.get('L') or 'default'))
+
+
+def escape_output(line: str) -> str:
+    """%output payload: control characters and backslashes as octal escapes"""
+    return re.sub(r'[\x00-\x1f\\]', lambda m: f"\\{ord(m.group()):03o}", line)
+
+
+class ControlConnection:
+    """One `tmux -C` client: command blocks plus notifications"""
+    
+    def __init__(self, server: FakeTmuxServer, connection: socket.socket, wfile):
+        self.server = server
+        self.connection = connection
+        self.wfile = wfile
+        self.write_lock = threading.Lock()
+        self.no_output = False
+        self.session: Optional[FakeSession] = None
+        self.number = 0
+    
+    def send(self, text: str) -> None:
+        with self.write_lock:
+            try:
+                self.wfile.write(text.encode())
+                self.wfile.flush()
+            except OSError:
+                pass
+    
+    def notify(self, line: str) -> None:
+        """Forward a notification the way tmux scopes it to the client's session"""
+        name, _, rest = line.partition(' ')
+        target = rest.partition(' ')[0]
+        if name == '%output':
+            if self.no_output or self.server.panes.get(target, (self.session,))[0] is not self.session:
+                return
+        elif name.startswith('%window-') and self.session is not None:
+            owner = self.server.windows.get(target, (None,))[0]
+            if owner is not self.session:
+                line = '%unlinked-' + line[1:]
+        self.send(line + '\n')
+        if line == '%exit':
+            try:
+                self.connection.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+    
+    def command(self, args: List[str]) -> None:
+        """Run one command line and answer with a %begin/%end block"""
+        if args[:1] == ['refresh-client'] and 'no-output' in args:
+            self.no_output = True
+        result = self.server.execute(args)
+        stamp = f"{int(time.time())} {self.number} 1"
+        self.number += 1
+        body = result.stdout if result.returncode == 0 else result.stderr
+        marker = '%end' if result.returncode == 0 else '%error'
+        self.send(f"%begin {stamp}\n{body}{marker} {stamp}\n")
+
+
+class FakeTmuxDaemon(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Serves one FakeTmuxServer on a unix socket to `tmux` shim processes"""
+    
+    daemon_threads = True
+    
+    def __init__(self, server: FakeTmuxServer, path: str, tick: float = 0.25):
+        self.model = server
+        self.path = path
+        self.tick = tick
+        self.controls: List[ControlConnection] = []
+        self.exiting = False
+        if os.path.exists(path):
+            os.unlink(path)
+        super().__init__(path, FakeTmuxHandler)
+        self.inode = os.stat(path).st_ino
+        server.listeners.append(self.broadcast)
+    
+    def unlink(self) -> None:
+        """Remove our socket, unless a newer server already took its path"""
+        try:
+            if os.stat(self.path).st_ino == self.inode:
+                os.unlink(self.path)
+        except OSError:
+            pass
+    
+    def broadcast(self, line: str) -> None:
+        for control in list(self.controls):
+            control.notify(line)
+        if line == '%exit':
+            # Refuse new clients right away; the request that emptied the
+            # server still gets its reply before serve() returns
+            self.exiting = True
+            self.unlink()
+    
+    def emit_output(self) -> None:
+        """Push pane output to control clients as %output notifications"""
+        while True:
+            time.sleep(self.tick)
+            if not self.controls:
+                continue
+            for pane_id, lines in self.model.tick().items():
+                payload = escape_output(''.join(f"{line}\r\n" for line in lines))
+                self.broadcast(f"%output {pane_id} {payload}")
+    
+    def serve(self) -> None:
+        threading.Thread(target=self.emit_output, daemon=True).start()
+        try:
+            self.serve_forever()
+        finally:
+            self.server_close()
+            self.unlink()
+
+
+class FakeTmuxHandler(socketserver.StreamRequestHandler):
+    def finish(self) -> None:
+        super().finish()
+        if self.server.exiting:
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+    
+    def handle(self) -> None:
+        model = self.server.model
+        request = json.loads(self.rfile.readline() or b'{}')
+        args = request.get('argv', [])
+        if not request.get('control'):
+            result = model.execute(args)
+            self.wfile.write(json.dumps({
+                'returncode': result.returncode, 'stdout': result.stdout, 'stderr': result.stderr
+            }).encode() + b'\n')
+            return
+        
+        control = ControlConnection(model, self.connection, self.wfile)
+        self.server.controls.append(control)
+        try:
+            control.command(args)
+            options, rest = parse_options(args[1:], 'scnxyFtEf') if args else ({}, [])
+            with model.lock:
+                if args[:1] in (['attach-session'], ['attach']):
+                    try:
+                        control.session = model.resolve(options.get('t'))[0]
+                    except FakeTmuxError:
+                        pass
+                else:
+                    control.session = model.session_by_name(str(options.get('s', '')))
+                if control.session is not None:
+                    control.session.attached += 1
+                    control.notify(f"%session-changed {control.session.id} {control.session.name}")
+            for raw in self.rfile:
+                line = raw.decode(errors='replace').strip()
+                if not line:
+                    continue
+                try:
+                    control.command(shlex.split(line))
+                except ValueError as e:
+                    control.send(f"%begin 0 0 1\nparse error: {e}\n%error 0 0 1\n")
+        finally:
+            self.server.controls.remove(control)
+            session = control.session
+            if session is not None:
+                with model.lock:
+                    session.attached -= 1
+                    if (session.attached == 0 and session.id in model.sessions
+                            and session.options.get('destroy-unattached') == 'on'):
+                        model.kill_session(session)
+
+
+def serve(argv: List[str]) -> int:
+    parser = argparse.ArgumentParser(prog="fake_tmux.py serve",
+                                     description="Run a fake tmux server on a unix socket")
+    parser.add_argument('-L', dest='L', help="socket name, as tmux -L")
+    parser.add_argument('-S', dest='S', help="socket path, as tmux -S")
+    parser.add_argument('--sessions', type=int, default=0)
+    parser.add_argument('--windows', type=int, default=3)
+    parser.add_argument('--panes', type=int, default=1, help="panes per window")
+    parser.add_argument('--latency', type=float, default=0.0, help="seconds added to every call")
+    parser.add_argument('--command-latency', action='append', default=[], metavar='CMD=SECONDS',
+                        help="extra latency for one subcommand, e.g. capture-pane=0.002")
+    parser.add_argument('--tick', type=float, default=0.25,
+                        help="seconds between %%output pushes to control clients")
+    args = parser.parse_args(argv)
+    
+    command_latency = {}
+    for item in args.command_latency:
+        name, _, seconds = item.partition('=')
+        command_latency[name] = float(seconds)
+    model = FakeTmuxServer(latency=args.latency, command_latency=command_latency)
+    model.populate(args.sessions, args.windows, args.panes)
+    FakeTmuxDaemon(model, socket_path(vars(args)), tick=args.tick).serve()
+    return 0
+
+
+def connect(path: str) -> Optional[socket.socket]:
+    client = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        client.connect(path)
+    except OSError:
+        client.close()
+        return None
+    return client
+
+
+def start_server(options: Dict[str, object], path: str) -> Optional[socket.socket]:
+    """Start a server in the background, like tmux new-session does"""
+    subprocess.Popen([sys.executable, os.path.abspath(__file__), 'serve', '-S', path],
+                     stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL,
+                     stderr=subprocess.DEVNULL, start_new_session=True)
+    deadline = time.monotonic() + 5.0
+    while time.monotonic() < deadline:
+        client = connect(path)
+        if client is not None:
+            return client
+        time.sleep(0.02)
+    return None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """`tmux` shim: forward a command line to the server for -L/-S"""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv[:1] == ['serve']:
+        return serve(argv[1:])
+    if argv[:1] == ['-V']:
+        print("tmux 3.3a (fake)")
+        return 0
+    
+    options, args = split_global_options(argv)
+    path = socket_path(options)
+    client = connect(path)
+    if client is None:
+        if args[:1] in (['new-session'], ['new']):
+            client = start_server(options, path)
+        if client is None:
+            print(f"no server running on {path}", file=sys.stderr)
+            return 1
+    
+    control = bool(options.get('C'))
+    stream = client.makefile('rwb')
+    try:
+        stream.write(json.dumps({'argv': args, 'control': control}).encode() + b'\n')
+        stream.flush()
+        reply = None if control else json.loads(stream.readline())
+    except (OSError, ValueError):
+        print("server exited unexpectedly", file=sys.stderr)
+        return 1
+    
+    if reply is not None:
+        sys.stdout.write(reply['stdout'])
+        sys.stderr.write(reply['stderr'])
+        return reply['returncode']
+    
+    def forward_stdin() -> None:
+        for line in sys.stdin.buffer:
+            stream.write(line)
+            stream.flush()
+        client.shutdown(socket.SHUT_WR)
+    
+    threading.Thread(target=forward_stdin, daemon=True).start()
+    for line in stream:
+        sys.stdout.buffer.write(line)
+        sys.stdout.buffer.flush()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -9,6 +9,7 @@ import websockets
 from unittest.mock import Mock, AsyncMock, patch
 from websocket_server import WebSocketServer, WebSocketClient
 from auth_manager import AuthManager
+from event_collector import TmuxEvent
 
 
 @pytest.fixture
@@ -190,17 +191,65 @@ class TestWebSocketServer:
             authenticated=True
         )
         
+        requests = []
+        
+        async def handler(request):
+            requests.append(request)
+            return [TmuxEvent("snapshot.data", "t", data={"client_id": request["client_id"]})]
+        
+        serving = asyncio.create_task(server.requests.serve(handler))
+        
         # Request snapshot
         target = {"session": "test-session", "window": 0}
         await server.handle_snapshot(client, {"target": target})
+        serving.cancel()
+        
+        # Answered to the client through the request channel, not the event queue
+        assert server.event_queue.empty()
+        assert requests[0]["type"] == "snapshot.request"
+        assert requests[0]["target"] == target
+        assert requests[0]["client_id"] == "test-client"
+        sent = [json.loads(call.args[0]) for call in mock_connection.send.call_args_list]
+        assert [message["type"] for message in sent] == ["snapshot.acknowledged", "snapshot.data"]
+    
+    async def test_replay_after_reconnect(self, server):
+        """Test buffered events are resent and a dropped range reported"""
+        mock_connection = AsyncMock()
+        client = WebSocketClient(
+            connection=mock_connection,
+            client_id="test-client",
+            authenticated=True,
+            subscriptions={"*"}
+        )
+        server.history.max_events = 2
+        for seq in range(1, 4):
+            server.history.append({"type": "pane.output", "server": "default", "seq": seq})
         
-        # Check that snapshot request was queued
-        assert not server.event_queue.empty()
+        await server.handle_replay(client, {"since": {"default": 1}})
+        sent = [json.loads(call.args[0]) for call in mock_connection.send.call_args_list]
+        assert [message.get("seq") for message in sent] == [2, 3, None]
+        assert sent[-1] == {"type": "replay.complete", "latest": {"default": 3}}
         
-        snapshot_request = await server.event_queue.get()
-        assert snapshot_request["type"] == "snapshot.request"
-        assert snapshot_request["target"] == target
-        assert snapshot_request["client_id"] == "test-client"
+        mock_connection.send.reset_mock()
+        await server.handle_replay(client, {"since": {"default": 0}})
+        sent = [json.loads(call.args[0]) for call in mock_connection.send.call_args_list]
+        assert sent[0]["code"] == "REPLAY_GAP"
+    
+    async def test_replay_rejects_malformed_since(self, server):
+        """Test a since that is not a map of server to seq gets a validation error"""
+        mock_connection = AsyncMock()
+        client = WebSocketClient(
+            connection=mock_connection,
+            client_id="test-client",
+            authenticated=True,
+            subscriptions={"*"}
+        )
+        
+        for since in (["default", 1], {"default": "1"}, {"default": True}):
+            mock_connection.send.reset_mock()
+            await server.handle_replay(client, {"since": since})
+            sent = [json.loads(call.args[0]) for call in mock_connection.send.call_args_list]
+            assert [message["code"] for message in sent] == ["INVALID_JSON"]
     
     async def test_ping_pong(self, server):
         """Test ping/pong functionality"""
@@ -264,7 +313,7 @@ class TestWebSocketIntegration:
                 sub_response = await ws.recv()
                 sub_data = json.loads(sub_response)
                 assert sub_data["type"] == "subscription.confirmed"
-                
+        
         finally:
             server.running = False
             server_task.cancel()
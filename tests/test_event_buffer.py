@@ -0,0 +1,49 @@
+"""
+Unit tests for event_buffer.py - Replay ring buffer
+"""
+import unittest
+
+from event_buffer import EventRingBuffer
+
+
+def event(seq, server='default', size=10):
+    return {"type": "pane.output", "server": server, "seq": seq, "data": "x" * size}
+
+
+class TestEventRingBuffer(unittest.TestCase):
+    """Test the buffer stays bounded and replays only what it holds"""
+    
+    def test_bounded_by_count(self):
+        """Test the oldest events are dropped past max_events"""
+        buffer = EventRingBuffer(max_events=3, max_bytes=10 ** 6)
+        for seq in range(1, 6):
+            buffer.append(event(seq))
+        
+        self.assertEqual(len(buffer), 3)
+        self.assertEqual([e["seq"] for e in buffer.since('default', 2)], [3, 4, 5])
+        self.assertIsNone(buffer.since('default', 1))
+    
+    def test_bounded_by_bytes(self):
+        """Test the serialized size never exceeds max_bytes"""
+        buffer = EventRingBuffer(max_events=100, max_bytes=250)
+        for seq in range(1, 6):
+            buffer.append(event(seq, size=50))
+        
+        self.assertLessEqual(buffer.size, 250)
+        self.assertEqual([e["seq"] for e in buffer.since('default', 3)], [4, 5])
+    
+    def test_replay_is_per_server(self):
+        """Test replay follows one server's numbering, and unknown positions are gaps"""
+        buffer = EventRingBuffer(max_events=10)
+        for seq, server in ((1, 'default'), (1, 'team-a'), (2, 'default')):
+            buffer.append(event(seq, server))
+        
+        self.assertEqual([e["seq"] for e in buffer.since('default', 0)], [1, 2])
+        self.assertEqual(buffer.since('team-a', 1), [])
+        self.assertEqual(buffer.latest, {'default': 2, 'team-a': 1})
+        # From before a restart
+        self.assertIsNone(buffer.since('default', 7))
+
+
+if __name__ == '__main__':
+    unittest.main()
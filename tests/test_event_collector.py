@@ -0,0 +1,237 @@
+"""
+Unit tests for event_collector.py - Change detection
+"""
+import asyncio
+import unittest
+from collections import deque
+from unittest.mock import patch, AsyncMock
+
+from tmux_core import TmuxCommand, TmuxIndex, TmuxMetrics, SessionInfo, WindowInfo, PaneInfo
+from event_collector import TmuxEventCollector, MultiServerCollector, TmuxEvent
+from tmux_scrollback import ScrollbackReader, ScrollbackRead, PaneTail
+from fake_tmux import FakeTmuxServer
+
+
+def make_state(window_index=0, window_name="Shell", session_name="work"):
+    """Id-keyed collector state with one window holding one pane"""
+    state = TmuxIndex()
+    state.add_session(SessionInfo(session_name, 1, "123", id='$0'))
+    state.add_window(WindowInfo(session_name, window_index, window_name, True, 1, "tiled",
+                                id='@1', session_id='$0'))
+    state.add_pane(PaneInfo(session_name, window_index, 0, True, "bash",
+                            id='%2', window_id='@1', session_id='$0'))
+    return state
+
+
+class TestTmuxEvent(unittest.TestCase):
+    """Test event records"""
+    
+    def test_to_dict_skips_unset_fields(self):
+        """Test unset fields are omitted and records carry no __dict__"""
+        event = TmuxEvent(type="window.created", timestamp="t", session="work", window=1,
+                          server="default")
+        
+        self.assertEqual(event.to_dict(), {"type": "window.created", "timestamp": "t",
+                                           "session": "work", "window": 1, "server": "default"})
+        self.assertFalse(hasattr(event, '__dict__'))
+
+
+class TestStableIds(unittest.IsolatedAsyncioTestCase):
+    """Test state keyed by tmux ids survives renames and moves"""
+    
+    def setUp(self):
+        self.collector = TmuxEventCollector(use_hooks=False)
+        # Read the pane on every detect regardless of its activity
+        self.collector.schedule.max_interval = 0
+    
+    async def detect(self, state, output="$ ", timed_out=False):
+        async def read_async(pane_ids, timeout=None, due=None, cursors=None):
+            if timed_out:
+                return {'%2': ScrollbackRead('%2', error="timed out", timed_out=True)}
+            read = ScrollbackRead('%2', lines=output.split('\n'), resync=True)
+            self.collector.scrollback.tails['%2'] = PaneTail(deque(maxlen=10))
+            self.collector.scrollback.tails['%2'].apply(read)
+            return {'%2': read}
+        
+        with patch.object(TmuxEventCollector, 'get_structure', new=AsyncMock(return_value=state)), \
+             patch.object(ScrollbackReader, 'read_async',
+                          side_effect=read_async) as mock_read:
+            events = await self.collector.detect_changes()
+        self.assertEqual(mock_read.call_args[0][0], ['%2'])
+        return events
+    
+    async def test_window_move_is_not_remove_and_create(self):
+        """Test moving a window reports window.moved"""
+        self.collector.previous_state = make_state()
+        
+        events = await self.detect(make_state(window_index=4))
+        
+        self.assertEqual([event.type for event in events], ['window.moved'])
+        self.assertEqual(events[0].window, 4)
+        self.assertEqual(events[0].server, 'default')
+        self.assertEqual(events[0].data, {'window_id': '@1', 'old_index': 0, 'new_index': 4})
+    
+    def two_sessions(self, *sessions):
+        """make_state plus an "ops" session, with window @1 in the given sessions"""
+        state = TmuxIndex()
+        for session_id, name in (('$0', 'work'), ('$1', 'ops')):
+            state.add_session(SessionInfo(name, 1, "123", id=session_id))
+        for session_id, name in sessions:
+            state.add_window(WindowInfo(name, 0, "Shell", True, 1, "tiled", id='@1', session_id=session_id))
+            state.add_pane(PaneInfo(name, 0, 0, True, "bash", id='%2', window_id='@1', session_id=session_id))
+        return state
+    
+    async def test_window_moved_to_another_session(self):
+        """Test move-window to another session at the same index is a move"""
+        self.collector.previous_state = self.two_sessions(('$0', 'work'))
+        
+        events = await self.detect(self.two_sessions(('$1', 'ops')))
+        
+        self.assertEqual([event.type for event in events], ['window.moved'])
+        self.assertEqual(events[0].session, 'ops')
+        self.assertEqual(events[0].data['old_session'], 'work')
+    
+    async def test_window_linked_and_unlinked(self):
+        """Test link-window and unlink-window are not reported as moves"""
+        self.collector.previous_state = self.two_sessions(('$0', 'work'))
+        
+        events = await self.detect(self.two_sessions(('$0', 'work'), ('$1', 'ops')))
+        self.assertEqual([(event.type, event.session) for event in events], [('window.linked', 'ops')])
+        
+        events = await self.detect(self.two_sessions(('$0', 'work')))
+        self.assertEqual([(event.type, event.session) for event in events], [('window.unlinked', 'ops')])
+    
+    async def test_session_rename_keeps_pane_history(self):
+        """Test a renamed session keeps content history keyed by pane id"""
+        self.collector.previous_state = make_state()
+        await self.detect(make_state())
+        
+        events = await self.detect(make_state(session_name="renamed"), output="$ make\nerror: failed")
+        
+        self.assertEqual([event.type for event in events], ['session.renamed', 'pane.error'])
+        self.assertEqual(events[1].session, 'renamed')
+        self.assertEqual(events[1].data['pane_id'], '%2')
+    
+    async def test_pane_missing_deadline_is_deferred_and_reported(self):
+        """Test a pane read cut off by the tick budget is reported and retried"""
+        self.collector.previous_state = make_state()
+        await self.detect(make_state())
+        
+        events = await self.detect(make_state(), timed_out=True)
+        
+        self.assertEqual([event.type for event in events], ['collector.timeout'])
+        self.assertEqual(events[0].data['pane_ids'], ['%2'])
+        self.assertEqual(events[0].data['targets'], ['work:0.0'])
+        self.assertEqual(self.collector.deferred_panes, ['%2'])
+        
+        events = await self.detect(make_state(), output="$ make\nerror: failed")
+        self.assertEqual([event.type for event in events], ['pane.error'])
+        self.assertEqual(self.collector.deferred_panes, [])
+    
+    async def test_pane_event_carries_new_lines(self):
+        """Test pane events ship the lines added since the last event"""
+        self.collector.previous_state = make_state()
+        await self.detect(make_state(), output="$ make")
+        
+        events = await self.detect(make_state(), output="$ make\nbuilding\n$ ")
+        
+        self.assertEqual(events[0].data['delta'], {"offset": 1, "lines": ["building", "$ "]})
+
+
+
+class TestStructureListing(unittest.IsolatedAsyncioTestCase):
+    """Test a polled tick lists panes once for structure and cursors"""
+    
+    def setUp(self):
+        server = FakeTmuxServer()
+        server.populate(2, windows=2, panes=2)
+        patcher = patch.dict(FakeTmuxServer._servers, {'fake-listing': server})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.collector = TmuxEventCollector(use_hooks=False, use_taps=False)
+        self.collector.tmux_cmd.backend = TmuxCommand.BACKEND_FAKE
+        self.collector.tmux_cmd.socket_name = 'fake-listing'
+    
+    async def test_one_list_panes_per_tick(self):
+        """Test the scrollback reader gets its cursors from the structure listing"""
+        metrics = TmuxMetrics(enabled=True)
+        with patch.object(TmuxCommand, 'metrics', metrics):
+            await self.collector.detect_changes()
+        
+        self.assertEqual(metrics.to_dict()['commands']['list-panes']['calls'], 1)
+        self.assertEqual(set(self.collector.scrollback.cursors), set(self.collector.previous_state.panes))
+        self.assertEqual(len(self.collector.scrollback.cursors), 8)
+
+
+class TestMetricsEvent(unittest.TestCase):
+    """Test tmux call metrics reach the event stream"""
+    
+    def test_metrics_event_when_enabled_and_due(self):
+        """Test the event carries the metrics and respects the interval"""
+        collector = TmuxEventCollector(use_hooks=False, metrics_interval=0)
+        metrics = TmuxMetrics(enabled=False)
+        
+        with patch.object(TmuxCommand, 'metrics', metrics):
+            self.assertIsNone(collector.metrics_event())
+            metrics.enable()
+            metrics.record(['tmux', 'list-panes', '-a'], 0.003)
+            event = collector.metrics_event()
+            collector.metrics_interval = 3600
+            self.assertIsNone(collector.metrics_event())
+        
+        self.assertEqual(event.type, "metrics")
+        self.assertEqual(event.data["commands"]["list-panes"]["calls"], 1)
+
+
+class TestMultiServerCollector(unittest.IsolatedAsyncioTestCase):
+    """Test one process covers several tmux servers"""
+    
+    def setUp(self):
+        self.collector = MultiServerCollector(sockets=[None, 'team-a'], use_hooks=False)
+    
+    def test_one_collector_per_server(self):
+        """Test collectors are socket-bound and only the first takes requests"""
+        default, team_a = self.collector.collectors.values()
+        
+        self.assertEqual(team_a.tmux_cmd.socket_name, 'team-a')
+        self.assertIsNotNone(default.request_handler)
+        self.assertIsNone(team_a.request_handler)
+        self.assertIsNone(team_a.metrics_interval)
+    
+    async def test_full_snapshot_covers_all_servers(self):
+        """Test a full snapshot merges every server's state"""
+        with patch.object(TmuxEventCollector, 'get_current_state',
+                          new=AsyncMock(return_value=make_state())):
+            events = await self.collector.handle_snapshot_request({"target": {}})
+        
+        self.assertEqual(list(events[0].data["full_state"]), ['work', 'team-a/work'])
+        self.assertEqual(events[0].data["full_state"]["work"]["windows"][0]["panes"][0],
+                         {"id": '%2', "active": True, "command": "bash"})
+        self.assertEqual(events[0].data["servers"], ['default', 'team-a'])
+    
+    async def test_session_snapshot_routed_to_server(self):
+        """Test session snapshots go to the requested server"""
+        with patch.object(TmuxEventCollector, 'handle_snapshot_request',
+                          new=AsyncMock(return_value=[])) as mock_handle:
+            await self.collector.handle_snapshot_request(
+                {"target": {"session": "work", "server": "team-a"}})
+            events = await self.collector.handle_snapshot_request(
+                {"target": {"session": "work", "server": "missing"}})
+        
+        mock_handle.assert_called_once()
+        self.assertEqual(events[0].type, "snapshot.error")
+    
+    def test_sequence_numbers_are_per_server(self):
+        """Test each server numbers its own events from 1"""
+        queue = asyncio.Queue()
+        default, team_a = self.collector.collectors.values()
+        for collector in (default, team_a, default):
+            collector._event_queue = queue
+            collector._queue_event(TmuxEvent(type="window.created", timestamp="t"))
+        
+        events = [queue.get_nowait() for _ in range(3)]
+        self.assertEqual([(event["server"], event["seq"]) for event in events],
+                         [('default', 1), ('team-a', 1), ('default', 2)])
+
+if __name__ == '__main__':
+    unittest.main()
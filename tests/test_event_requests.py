@@ -0,0 +1,48 @@
+"""
+Unit tests for event_requests.py - Snapshot request channel
+"""
+import asyncio
+import unittest
+
+from event_requests import RequestChannel
+
+
+class TestRequestChannel(unittest.IsolatedAsyncioTestCase):
+    """Test requests are answered through their own futures"""
+    
+    async def test_narrow_snapshots_served_first(self):
+        """Test queued window snapshots go ahead of full ones"""
+        channel = RequestChannel()
+        served = []
+        
+        async def handler(request):
+            served.append(request["id"])
+            return [request["id"]]
+        
+        requests = [asyncio.create_task(channel.request({"id": index, "target": target}))
+                    for index, target in enumerate([{}, {"session": "work"},
+                                                    {"session": "work", "window": 1}])]
+        await asyncio.sleep(0)
+        serving = asyncio.create_task(channel.serve(handler))
+        
+        self.assertEqual(await asyncio.gather(*requests), [[0], [1], [2]])
+        self.assertEqual(served, [2, 1, 0])
+        serving.cancel()
+    
+    async def test_timeout_and_failure(self):
+        """Test an unanswered request times out and a failing one raises"""
+        channel = RequestChannel(timeout=0.01)
+        with self.assertRaises(asyncio.TimeoutError):
+            await channel.request({"target": {}})
+        
+        async def handler(request):
+            raise RuntimeError("no server")
+        
+        serving = asyncio.create_task(channel.serve(handler))
+        with self.assertRaises(RuntimeError):
+            await channel.request({"target": {}}, timeout=1.0)
+        serving.cancel()
+
+
+if __name__ == '__main__':
+    unittest.main()
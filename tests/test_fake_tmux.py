@@ -0,0 +1,173 @@
+"""
+Unit tests for fake_tmux.py - In-memory tmux stand-in
+"""
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+from unittest.mock import patch
+
+from fake_tmux import FakeTmuxServer, FakeTmuxDaemon, socket_path
+from tmux_core import AsyncTmuxCommand, TmuxCommand, TmuxControlClient, TmuxTimeoutError
+from tmux_hooks import TmuxHookListener
+from tmux_scrollback import ScrollbackReader
+
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SHIM = os.path.join(REPO, 'benchmarks', 'bin', 'tmux')
+
+
+class TestFakeTmuxServer(unittest.TestCase):
+    """Test the in-process server behind TMUX_BACKEND=fake"""
+    
+    def setUp(self):
+        self.server = FakeTmuxServer()
+        patcher = patch.dict(FakeTmuxServer._servers, {'fake-test': self.server})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.cmd = TmuxCommand(backend=TmuxCommand.BACKEND_FAKE, socket_name='fake-test')
+    
+    def test_snapshot_of_populated_server(self):
+        """Test thousands of sessions come back through the real snapshot parser"""
+        self.server.populate(1000, windows=3, panes=2)
+        
+        snapshot = self.cmd.get_snapshot(refresh=True)
+        
+        self.assertEqual(len(snapshot['sessions']), 1000)
+        windows = snapshot['windows']['project-999']
+        self.assertEqual([w.name for w in windows], ['Claude-Agent', 'Shell', 'Dev-Server'])
+        self.assertEqual(windows[0].panes, 2)
+    
+    def test_new_session_and_window(self):
+        """Test creation commands print with -P -F and reject duplicates"""
+        result = self.cmd.execute_command(
+            ['tmux', 'new-session', '-d', '-s', 'work', '-n', 'Claude-Agent', '-P', '-F', '#{session_id}']
+        )
+        self.assertEqual(result.stdout, "$0\n")
+        result = self.cmd.execute_command(
+            ['tmux', 'new-window', '-t', 'work', '-n', 'Shell', '-P', '-F', '#{window_index} #{pane_id}']
+        )
+        self.assertEqual(result.stdout, "1 %1\n")
+        
+        duplicate = self.cmd.execute_command(['tmux', 'new-session', '-d', '-s', 'work'], check=False)
+        self.assertEqual(duplicate.returncode, 1)
+        self.assertIn("duplicate session", duplicate.stderr)
+    
+    def test_names_with_separators_are_escaped(self):
+        """Test control characters in names print as octal, like tmux"""
+        self.cmd.execute_command(['tmux', 'new-session', '-d', '-s', 'a|b: c\x1fd'])
+        
+        sessions = self.cmd.get_snapshot(refresh=True)['sessions']
+        
+        self.assertEqual(list(sessions), ['a|b: c\\037d'])
+    
+    def test_send_keys_reaches_incremental_reader(self):
+        """Test typed lines are captured once by ScrollbackReader"""
+        self.cmd.execute_command(['tmux', 'new-session', '-d', '-s', 'work', '-n', 'Shell'])
+        reader = ScrollbackReader(self.cmd, lines=5)
+        reader.read()
+        
+        self.cmd.execute_command(['tmux', 'send-keys', '-t', 'work:Shell', 'make test', 'Enter'])
+        reads = reader.read()
+        
+        self.assertEqual(reads['%0'].lines, ['$ make test', 'fake: ran make test', '$ '])
+        self.assertEqual(reader.tail('%0').splitlines()[-1], '$ ')
+    
+    def test_batch_chain_runs_in_one_call(self):
+        """Test TmuxBatch `;` chains with markers are answered in order"""
+        self.server.populate(2, windows=1)
+        batch = self.cmd.batch()
+        batch.add('display-message', '-p', '-t', 'project-1', '#{session_name}')
+        batch.add('capture-pane', '-p', '-t', '%404')
+        batch.add('list-windows', '-t', 'project-0', '-F', '#{window_name}')
+        
+        results = batch.execute(continue_on_error=True)
+        
+        self.assertEqual(self.server.calls, 2)
+        self.assertEqual(results[0].stdout, "project-1\n")
+        self.assertIn("can't find pane", results[1].stderr)
+        self.assertEqual(results[2].stdout, "Claude-Agent\n")
+    
+    def test_unsupported_commands_fail(self):
+        """Test hooks are refused, so the collector falls back to polling"""
+        self.server.populate(1)
+        listener = TmuxHookListener(self.cmd)
+        
+        self.assertFalse(listener.install())
+    
+    def test_latency_and_deadline(self):
+        """Test per-command latency is applied and bounded by the timeout"""
+        self.server.populate(1)
+        self.server.command_latency['capture-pane'] = 0.2
+        
+        self.assertEqual(self.server.latency_for(['capture-pane', '-p']), 0.2)
+        with self.assertRaises(TmuxTimeoutError):
+            self.cmd.execute_command(['tmux', 'capture-pane', '-p'], timeout=0.01)
+        
+        async_cmd = AsyncTmuxCommand(backend=TmuxCommand.BACKEND_FAKE, socket_name='fake-test')
+        with self.assertRaises(TmuxTimeoutError):
+            asyncio.run(async_cmd.execute_command_async(['tmux', 'capture-pane', '-p'], timeout=0.01))
+    
+    def test_notifications(self):
+        """Test structural changes are reported like control-mode notifications"""
+        self.server.populate(1, windows=1)
+        received = []
+        self.server.listeners.append(received.append)
+        
+        self.cmd.execute_command(['tmux', 'new-window', '-t', 'project-0', '-n', 'Shell'])
+        self.cmd.execute_command(['tmux', 'rename-window', '-t', 'project-0:1', 'Logs'])
+        self.cmd.execute_command(['tmux', 'kill-window', '-t', 'project-0:1'])
+        
+        self.assertEqual(received, ['%window-add @1', '%window-renamed @1 Logs', '%window-close @1'])
+
+
+class TestFakeTmuxDaemon(unittest.TestCase):
+    """Test the server process reached through the `tmux` shim"""
+    
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        env = patch.dict(os.environ, {'FAKE_TMUX_TMPDIR': tmpdir.name})
+        env.start()
+        self.addCleanup(env.stop)
+        
+        self.server = FakeTmuxServer()
+        self.server.populate(3, windows=2)
+        self.daemon = FakeTmuxDaemon(self.server, socket_path({'L': 'fake-test'}))
+        thread = threading.Thread(target=self.daemon.serve, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(self.daemon.shutdown)
+    
+    def test_shim_forwards_commands(self):
+        """Test a tmux command line runs against the server's model"""
+        result = subprocess.run(
+            [sys.executable, os.path.join(REPO, 'fake_tmux.py'), '-L', 'fake-test',
+             'list-sessions', '-F', '#{session_name}'],
+            capture_output=True, text=True, timeout=10
+        )
+        
+        self.assertEqual(result.returncode, 0)
+        self.assertEqual(result.stdout.split(), ['project-0', 'project-1', 'project-2'])
+    
+    def test_control_client_through_shim(self):
+        """Test TmuxControlClient speaks control mode to the fake server"""
+        client = TmuxControlClient(tmux_binary=SHIM, socket_name='fake-test')
+        self.addCleanup(client.close)
+        
+        self.assertTrue(client.start())
+        result = client.execute(['list-windows', '-t', 'project-2', '-F', '#{window_name}'])
+        
+        self.assertEqual(result.stdout, "Claude-Agent\nShell\n")
+        # Attached to an existing session rather than one of its own
+        self.assertEqual(len(self.server.sessions), 3)
+        self.assertEqual(client.session_id, self.server.session_by_name('project-0').id)
+        self.assertEqual(TmuxControlClient.attached_clients('fake-test'), {client.session_id: 1})
+        self.assertEqual(self.server.session_by_name('project-0').attached, 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
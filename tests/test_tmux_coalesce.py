@@ -0,0 +1,107 @@
+"""
+Unit tests for tmux_coalesce.py - Pane event burst merging
+"""
+import asyncio
+import unittest
+
+from tmux_coalesce import EventCoalescer
+from tmux_scrollback import OutputDelta
+from event_collector import TmuxEvent, TmuxEventCollector
+
+
+def pane_event(offset, lines, activity="output", pane_id='%1'):
+    return TmuxEvent(f"pane.{activity}", "2024-01-01T00:00:00", "work", 0, 0, data={
+        "pane_id": pane_id,
+        "preview": lines[-1],
+        "activity": activity,
+        "delta": OutputDelta(offset, lines).to_dict(),
+    })
+
+
+class TestOutputDeltaThen(unittest.TestCase):
+    """Test consecutive deltas merge into one"""
+    
+    def test_appends_and_rewrites_last_line(self):
+        """Test a later delta replaces the lines from its offset on"""
+        merged = OutputDelta(3, ["a", "b$"]).then(OutputDelta(4, ["b done", "c"]))
+        
+        self.assertEqual(merged.to_dict(), {"offset": 3, "lines": ["a", "b done", "c"]})
+    
+    def test_reset_and_gap_reset(self):
+        """Test a reset wins and a gap between deltas becomes one"""
+        self.assertEqual(OutputDelta(3, ["a"]).then(OutputDelta(0, ["x"], reset=True)),
+                         OutputDelta(0, ["x"], reset=True))
+        self.assertEqual(OutputDelta(3, ["a"]).then(OutputDelta(9, ["x"])),
+                         OutputDelta(9, ["x"], reset=True))
+
+
+class TestEventCoalescer(unittest.TestCase):
+    """Test bursts are merged and other events pass through"""
+    
+    def setUp(self):
+        self.coalescer = EventCoalescer(window=1.0)
+    
+    def test_burst_merges_into_one_event(self):
+        """Test the first event goes out and the rest merge until the window closes"""
+        first = pane_event(0, ["one"])
+        
+        self.assertEqual(self.coalescer.add(first, now=0.0), [first])
+        self.assertEqual(self.coalescer.add(pane_event(1, ["two"], "error"), now=0.2), [])
+        self.assertEqual(self.coalescer.add(pane_event(2, ["three"]), now=0.4), [])
+        self.assertEqual(self.coalescer.flush(now=0.9), [])
+        
+        merged, = self.coalescer.flush(now=1.0)
+        self.assertEqual(merged.type, "pane.error")
+        self.assertEqual(merged.data["count"], 2)
+        self.assertEqual(merged.data["preview"], "three")
+        self.assertEqual(merged.data["delta"], {"offset": 1, "lines": ["two", "three"]})
+        self.assertEqual(self.coalescer.next_deadline(), 2.0)
+    
+    def test_structural_and_other_panes_pass_through(self):
+        """Test window events and another pane's events are not held back"""
+        self.coalescer.add(pane_event(0, ["one"]), now=0.0)
+        window_event = TmuxEvent("window.created", "2024-01-01T00:00:00", "work", 1)
+        other = pane_event(0, ["x"], pane_id='%2')
+        
+        self.assertEqual(self.coalescer.add(window_event, now=0.1), [window_event])
+        self.assertEqual(self.coalescer.add(other, now=0.1), [other])
+    
+    def test_quiet_window_closes(self):
+        """Test a pane quiet for a window is sent at once again"""
+        self.coalescer.add(pane_event(0, ["one"]), now=0.0)
+        self.assertEqual(self.coalescer.flush(now=1.0), [])
+        self.assertIsNone(self.coalescer.next_deadline())
+        
+        self.assertEqual(len(self.coalescer.add(pane_event(1, ["two"]), now=1.5)), 1)
+    
+    def test_zero_window_disables(self):
+        """Test a window of 0 publishes every event"""
+        coalescer = EventCoalescer(window=0)
+        events = [coalescer.add(pane_event(index, ["x"]), now=0.0) for index in range(3)]
+        
+        self.assertEqual([len(ready) for ready in events], [1, 1, 1])
+
+
+class TestCollectorCoalescing(unittest.IsolatedAsyncioTestCase):
+    """Test the collector publishes held events when their window closes"""
+    
+    async def test_pending_event_is_flushed_on_time(self):
+        """Test a merged event reaches the queue without waiting for a tick"""
+        collector = TmuxEventCollector(use_hooks=False)
+        collector.coalescer = EventCoalescer(window=0.05)
+        collector._event_queue = asyncio.Queue()
+        
+        collector._publish([pane_event(0, ["one"])])
+        collector._publish([pane_event(1, ["two"]), pane_event(2, ["three"])])
+        self.assertEqual(collector._event_queue.qsize(), 1)
+        
+        await asyncio.sleep(0.1)
+        self.assertEqual(collector._event_queue.qsize(), 2)
+        collector._event_queue.get_nowait()
+        merged = collector._event_queue.get_nowait()
+        self.assertEqual(merged["data"]["count"], 2)
+        self.assertEqual(merged["data"]["delta"]["lines"], ["two", "three"])
+
+
+if __name__ == '__main__':
+    unittest.main()
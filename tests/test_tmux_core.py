@@ -1,16 +1,57 @@
 """
 Unit tests for tmux_core.py - Testing batch commands and shared utilities
 """
+import asyncio
 import unittest
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import Mock, patch, MagicMock, AsyncMock
 import subprocess
+import time
+from collections import Counter
+from concurrent.futures import Future, ThreadPoolExecutor
 
 from tmux_core import (
     TmuxCommand, TmuxPatterns, TmuxValidation,
-    TmuxCommandError, SessionInfo, WindowInfo
+    TmuxCommandError, SessionInfo, WindowInfo, PaneInfo,
+    TmuxControlClient, AsyncTmuxCommand, TmuxBatch, SnapshotCache,
+    TmuxServerPool, ColumnarSnapshot, TmuxFormat, TmuxMetrics, TmuxTimeoutError
 )
 
 
+def tmux_output(*lines, **names):
+    """
+    list-panes output from fixture lines written with '|' between fields
+    Names containing '|' are passed as {placeholders} so they survive
+    """
+    return '\n'.join(line.replace('|', TmuxFormat.SEPARATOR).format(**names) for line in lines)
+
+
+def fake_tmux_run(cmd, check=True, timeout=None):
+    """
+    Minimal stand-in for execute_command that understands `;` chains
+    capture-pane prints "Output from <target>", targets starting with
+    "broken" fail and stop the chain like tmux does
+    """
+    commands = [[]]
+    for arg in cmd[1:]:
+        if arg == ';':
+            commands.append([])
+        else:
+            commands[-1].append(arg)
+    
+    stdout = []
+    for command in commands:
+        if command[0] == 'display-message':
+            stdout.append(command[-1] + "\n")
+        elif command[0] == 'capture-pane':
+            target = command[command.index('-t') + 1]
+            if target.startswith('broken'):
+                return subprocess.CompletedProcess(
+                    cmd, 1, ''.join(stdout), f"can't find pane: {target}\n"
+                )
+            stdout.append(f"Output from {target}\n")
+    return subprocess.CompletedProcess(cmd, 0, ''.join(stdout), "")
+
+
 class TestTmuxPatterns(unittest.TestCase):
     """Test pattern detection and classification"""
     
@@ -112,7 +153,8 @@ class TestTmuxCommand(unittest.TestCase):
             ['tmux', 'list-sessions'],
             capture_output=True,
             text=True,
-            check=True
+            check=True,
+            timeout=TmuxCommand.command_timeout
         )
         self.assertEqual(result.stdout, "output")
     
@@ -126,24 +168,35 @@ class TestTmuxCommand(unittest.TestCase):
         with self.assertRaises(TmuxCommandError):
             self.cmd.execute_command(['tmux', 'list-sessions'])
     
+    @patch('subprocess.run')
+    def test_execute_command_timeout(self, mock_run):
+        """Test a call past its deadline raises TmuxTimeoutError"""
+        mock_run.side_effect = subprocess.TimeoutExpired(['tmux', 'list-sessions'], 0.5)
+        
+        with self.assertRaises(TmuxTimeoutError) as raised:
+            self.cmd.execute_command(['tmux', 'list-sessions'], timeout=0.5)
+        
+        self.assertIsInstance(raised.exception, TmuxCommandError)
+        self.assertEqual(mock_run.call_args.kwargs['timeout'], 0.5)
+    
     @patch.object(TmuxCommand, 'execute_command')
     def test_batch_get_all_sessions_and_windows(self, mock_execute):
         """Test batch retrieval of sessions and windows"""
-        # Mock session output
-        session_output = "test-session|2|1234567890|0\nother-session|1|1234567891|1"
-        window_output = (
-            "test-session:0|Claude-Agent|1|1|tiled|node\n"
-            "test-session:1|Shell|0|1|tiled|bash\n"
-            "other-session:0|Dev-Server|1|1|tiled|python"
+        # Mock list-panes -a output: one line per pane
+        snapshot_output = tmux_output(
+            "$0|@0|%0|test-session|2|1234567890|0|0|Claude-Agent|1|1|tiled|0|1|node",
+            "$0|@1|%1|test-session|2|1234567890|0|1|Shell|0|1|tiled|0|1|bash",
+            "$1|@2|%2|other-session|1|1234567891|1|0|Dev-Server|1|1|tiled|0|1|python"
         )
         
-        mock_execute.side_effect = [
-            MagicMock(stdout=session_output),
-            MagicMock(stdout=window_output)
-        ]
+        mock_execute.return_value = MagicMock(stdout=snapshot_output)
         
         result = self.cmd.batch_get_all_sessions_and_windows()
         
+        # Single tmux call for the whole tree
+        mock_execute.assert_called_once()
+        self.assertEqual(mock_execute.call_args[0][0][:3], ['tmux', 'list-panes', '-a'])
+        
         # Verify structure
         self.assertIn('sessions', result)
         self.assertIn('windows', result)
@@ -170,21 +223,244 @@ class TestTmuxCommand(unittest.TestCase):
         self.assertTrue(claude_window.active)
         self.assertEqual(claude_window.current_command, 'node')
     
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_get_snapshot_panes(self, mock_execute):
+        """Test the snapshot builds panes and uses the active pane's command"""
+        mock_execute.return_value = MagicMock(stdout=tmux_output(
+            "$0|@0|%0|work|1|123|1|0|{name}|1|2|tiled|0|0|bash",
+            "$0|@0|%3|work|1|123|1|0|{name}|1|2|tiled|1|1|node",
+            "$9|@9|%9|_orchestrator-1|1|124|1|0|bash|1|1|tiled|0|1|bash",
+            name='a|b: c'
+        ))
+        
+        snapshot = self.cmd.get_snapshot()
+        
+        self.assertEqual(list(snapshot['sessions']), ['work', '_orchestrator-1'])
+        window = snapshot['windows']['work'][0]
+        self.assertEqual(window.name, 'a|b: c')
+        self.assertEqual(window.panes, 2)
+        self.assertEqual(window.current_command, 'node')
+        self.assertEqual([(pane.index, pane.active) for pane in snapshot['panes']['work:0']],
+                         [(0, False), (1, True)])
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_get_snapshot_index_by_id(self, mock_execute):
+        """Test the id index maps ids and targets both ways"""
+        mock_execute.return_value = MagicMock(stdout=tmux_output(
+            "$0|@0|%0|work|2|123|1|0|Shell|1|2|tiled|0|0|bash",
+            "$0|@0|%3|work|2|123|1|0|Shell|1|2|tiled|1|1|node",
+            "$0|@5|%4|work|2|123|1|3|Logs|0|1|tiled|0|1|tail"
+        ))
+        
+        index = self.cmd.get_snapshot()['index']
+        
+        self.assertEqual(list(index.sessions), ['$0'])
+        self.assertEqual(index.windows['@5'].index, 3)
+        self.assertEqual(index.panes['%3'].window_id, '@0')
+        self.assertEqual(index.target_for('%3'), 'work:0.1')
+        self.assertEqual(index.target_for('@5'), 'work:3')
+        self.assertEqual(index.id_for('work'), '$0')
+        self.assertEqual(index.id_for('work:3.0'), '%4')
+        self.assertEqual(index.resolve('%4'), '%4')
+        self.assertIsNone(index.resolve('work:9'))
+        self.assertEqual([pane.id for pane in index.panes_in_window('@0')], ['%0', '%3'])
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_get_snapshot_separator_in_window_name(self, mock_execute):
+        """Test a window name with a raw separator keeps its session"""
+        mock_execute.return_value = MagicMock(stdout=tmux_output(
+            "$0|@0|%0|work|1|123|1|0|{name}|1|1|tiled|0|1|bash", name='a:b|c\x1fd'
+        ))
+        
+        snapshot = self.cmd.get_snapshot()
+        
+        self.assertEqual([window.name for window in snapshot['windows']['work']], ['a:b|c\x1fd'])
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_get_snapshot_linked_window(self, mock_execute):
+        """Test a window linked into two sessions is listed in both"""
+        mock_execute.return_value = MagicMock(stdout=tmux_output(
+            "$0|@0|%0|work|1|123|1|0|Shell|1|1|tiled|0|1|bash",
+            "$0|@5|%4|work|2|123|1|1|Logs|0|1|tiled|0|1|tail",
+            "$1|@5|%4|ops|1|124|0|3|Logs|1|1|tiled|0|1|tail"
+        ))
+        
+        snapshot = self.cmd.get_snapshot()
+        index = snapshot['index']
+        
+        self.assertEqual([window.name for window in snapshot['windows']['ops']], ['Logs'])
+        self.assertEqual([pane.id for pane in snapshot['panes']['ops:3']], ['%4'])
+        self.assertEqual(len(snapshot['windows']['work']), 2)
+        self.assertEqual(index.window_sessions('@5'), ['$0', '$1'])
+        self.assertEqual([window.id for window in index.windows_in_session('$1')], ['@5'])
+        self.assertEqual(index.target_for('@5'), 'work:1')
+        self.assertEqual(index.id_for('ops:3.0'), '%4')
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_get_snapshot_counts_clients(self, mock_execute):
+        """Test session_attached is read as a client count"""
+        mock_execute.return_value = MagicMock(stdout=tmux_output(
+            "$0|@0|%0|work|1|123|2|0|Shell|1|1|tiled|0|1|bash",
+            "$1|@1|%1|idle|1|123|0|0|Shell|1|1|tiled|0|1|bash"
+        ))
+        
+        sessions = self.cmd.get_snapshot()['index'].sessions
+        
+        self.assertEqual((sessions['$0'].attached, sessions['$0'].clients), (True, 2))
+        self.assertEqual((sessions['$1'].attached, sessions['$1'].clients), (False, 0))
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_get_snapshot_discounts_own_clients(self, mock_execute):
+        """Test this process's control clients do not make a session attached"""
+        mock_execute.return_value = MagicMock(stdout=tmux_output(
+            "$0|@0|%0|work|1|123|1|0|Shell|1|1|tiled|0|1|bash"
+        ))
+        
+        with patch.object(TmuxControlClient, 'attached_clients', return_value=Counter({'$0': 1})):
+            session = self.cmd.get_snapshot()['index'].sessions['$0']
+        
+        self.assertEqual((session.attached, session.clients), (False, 0))
+    
+    def test_records_are_slotted(self):
+        """Test records carry no per-instance __dict__ and keep their defaults"""
+        pane = PaneInfo('work', 0, 1, True, id='%3')
+        
+        self.assertFalse(hasattr(pane, '__dict__'))
+        self.assertEqual((pane.current_command, pane.target), ('', 'work:0.1'))
+        self.assertEqual(pane, PaneInfo('work', 0, 1, True, id='%3'))
+        with self.assertRaises(AttributeError):
+            pane.extra = 1
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_get_columnar_snapshot(self, mock_execute):
+        """Test the array-backed snapshot holds the same panes and skips the cache"""
+        mock_execute.return_value = MagicMock(stdout=tmux_output(
+            "$0|@0|%0|work|2|123|1|0|{name}|1|2|tiled|0|0|bash",
+            "$0|@0|%3|work|2|123|1|0|{name}|1|2|tiled|1|1|node",
+            name='a|b: c'
+        ))
+        
+        table = self.cmd.get_snapshot(columnar=True)
+        
+        self.assertEqual(len(table), 2)
+        row = table.row('%3')
+        self.assertEqual(table.target(row), 'work:0.1')
+        self.assertEqual(table.window_names[row], 'a|b: c')
+        self.assertEqual(table.rows_where(ColumnarSnapshot.PANE_ACTIVE), [row])
+        pane = table.pane(row)
+        self.assertEqual((pane.id, pane.window_id, pane.current_command), ('%3', '@0', 'node'))
+        self.assertIsNone(self.cmd.snapshot_cache.get())
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_get_snapshot_no_server(self, mock_execute):
+        """Test an empty snapshot when tmux has no sessions"""
+        mock_execute.side_effect = TmuxCommandError("no server running")
+        
+        snapshot = self.cmd.get_snapshot()
+        self.assertEqual(snapshot['sessions'], {})
+        self.assertEqual(snapshot['panes'], {})
+        self.assertEqual(len(snapshot['index']), 0)
+    
     @patch.object(TmuxCommand, 'execute_command')
     def test_batch_capture_panes(self, mock_execute):
         """Test batch pane capture"""
         targets = [('session1', 0), ('session2', 1)]
         
-        mock_execute.side_effect = [
-            MagicMock(stdout="Output from session1:0", returncode=0),
-            MagicMock(stdout="Output from session2:1", returncode=0)
-        ]
+        # Captures are chained into one tmux invocation
+        mock_execute.side_effect = fake_tmux_run
         
         results = self.cmd.batch_capture_panes(targets, lines=30)
         
+        mock_execute.assert_called_once()
         self.assertEqual(len(results), 2)
-        self.assertEqual(results['session1:0'], "Output from session1:0")
-        self.assertEqual(results['session2:1'], "Output from session2:1")
+        self.assertEqual(results['session1:0'], "Output from session1:0\n")
+        self.assertEqual(results['session2:1'], "Output from session2:1\n")
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_batch_capture_panes_detailed(self, mock_execute):
+        """Test detailed capture reports per-target errors and timing"""
+        mock_execute.side_effect = fake_tmux_run
+        
+        results = self.cmd.batch_capture_panes_detailed(
+            [('work', 0), ('broken', 0, 1), ('work', 2)], lines=10
+        )
+        
+        self.assertTrue(results['work:0'].ok)
+        self.assertEqual(results['work:0'].output, "Output from work:0\n")
+        self.assertEqual(results['broken:0.1'].error, "can't find pane: broken:0.1")
+        self.assertEqual(results['broken:0.1'].returncode, 1)
+        # The chain is resumed after the failing capture
+        self.assertEqual(results['work:2'].output, "Output from work:2\n")
+        self.assertEqual(mock_execute.call_count, 2)
+        self.assertTrue(all(result.elapsed >= 0 for result in results.values()))
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_chained_capture_time_is_split(self, mock_execute):
+        """Test each chained capture is timed with its share of the chain"""
+        def slow_run(cmd, check=True, timeout=None):
+            time.sleep(0.1)
+            return fake_tmux_run(cmd, check, timeout)
+        mock_execute.side_effect = slow_run
+        
+        results = self.cmd.batch_capture_panes_detailed([('work', index) for index in range(4)])
+        
+        mock_execute.assert_called_once()
+        self.assertTrue(all(0.025 <= result.elapsed < 0.05 for result in results.values()))
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_batch_capture_panes_chunks_large_batches(self, mock_execute):
+        """Test large batches are split into chain_size invocations"""
+        mock_execute.side_effect = fake_tmux_run
+        self.cmd.chain_size = 10
+        
+        results = self.cmd.batch_capture_panes([('s', index) for index in range(25)])
+        
+        self.assertEqual(mock_execute.call_count, 3)
+        self.assertEqual(results['s:24'], "Output from s:24\n")
+    
+    @patch.object(TmuxCommand, '_get_control_client')
+    def test_batch_capture_panes_pipelines_control_mode(self, mock_get_client):
+        """Test control mode keeps at most max_concurrency captures in flight"""
+        client = MagicMock()
+        in_flight = []
+        peak = []
+        
+        def submit(args):
+            in_flight.append(args[2])
+            peak.append(len(in_flight))
+            future = MagicMock()
+            future.result.side_effect = lambda timeout=None: (
+                in_flight.remove(args[2]),
+                subprocess.CompletedProcess(args, 0, f"{args[2]}\n", "")
+            )[1]
+            return future
+        client.submit.side_effect = submit
+        mock_get_client.return_value = client
+        
+        results = self.cmd.batch_capture_panes(
+            [('s', index) for index in range(10)], max_concurrency=3
+        )
+        
+        self.assertEqual(client.submit.call_count, 10)
+        self.assertEqual(max(peak), 3)
+        self.assertEqual(results['s:7'], "s:7\n")
+    
+    @patch.object(TmuxCommand, '_get_control_client')
+    def test_pipelined_captures_time_out(self, mock_get_client):
+        """Test a stuck control client fails the captures instead of hanging"""
+        client = MagicMock()
+        client.submit.side_effect = lambda args: Future()
+        mock_get_client.return_value = client
+        self.cmd.command_timeout = 0.05
+        
+        started = time.monotonic()
+        results = self.cmd.batch_capture_panes_detailed([('s', index) for index in range(6)],
+                                                        max_concurrency=2)
+        
+        self.assertLess(time.monotonic() - started, 1.0)
+        self.assertEqual(client.submit.call_count, 2)
+        self.assertTrue(all('timed out' in result.error for result in results.values()))
+        self.assertEqual(len(results), 6)
     
     @patch.object(TmuxCommand, 'batch_get_all_sessions_and_windows')
     def test_get_json_status(self, mock_batch):
@@ -212,6 +488,571 @@ class TestTmuxCommand(unittest.TestCase):
         self.assertEqual(len(data['sessions'][0]['agents']), 1)
 
 
+class TestTmuxControlClient(unittest.TestCase):
+    """Test control-mode output parsing and backend fallback"""
+    
+    def setUp(self):
+        self.client = TmuxControlClient()
+        self.client.process = MagicMock()
+        self.client.process.poll.return_value = None
+    
+    def test_quote_argument(self):
+        """Test arguments survive the tmux command parser"""
+        self.assertEqual(TmuxControlClient.quote_argument("a b"), "'a b'")
+        self.assertEqual(TmuxControlClient.quote_argument("it's"), "'it'\\''s'")
+        self.assertEqual(TmuxControlClient.quote_argument(""), "''")
+    
+    def test_submit_writes_quoted_line(self):
+        """Test commands are written as one quoted line"""
+        self.client.submit(['capture-pane', '-t', 'work:0', '-p'])
+        self.client.process.stdin.write.assert_called_once_with(
+            "'capture-pane' '-t' 'work:0' '-p'\n"
+        )
+    
+    def test_blocks_resolve_in_order(self):
+        """Test %begin/%end blocks resolve pending commands FIFO"""
+        first = self.client.submit(['list-sessions'])
+        second = self.client.submit(['capture-pane', '-t', 'nosuch', '-p'])
+        
+        for line in ["%begin 1 10 1", "work|1", "%end 1 10 1",
+                     "%sessions-changed",
+                     "%begin 1 11 1", "can't find pane: nosuch", "%error 1 11 1"]:
+            self.client._dispatch_line(line)
+        
+        self.assertEqual(first.result().stdout, "work|1\n")
+        self.assertEqual(first.result().returncode, 0)
+        self.assertEqual(second.result().returncode, 1)
+        self.assertEqual(second.result().stderr, "can't find pane: nosuch\n")
+    
+    def test_end_marker_inside_output(self):
+        """Test output lines that look like markers don't end the block"""
+        future = self.client.submit(['capture-pane', '-p'])
+        for line in ["%begin 1 12 1", "%end 1 99 1", "%end 1 12 1"]:
+            self.client._dispatch_line(line)
+        
+        self.assertEqual(future.result().stdout, "%end 1 99 1\n")
+    
+    def test_notifications_go_to_listeners(self):
+        """Test notification lines are passed to listeners"""
+        received = []
+        self.client.add_listener(received.append)
+        self.client._dispatch_line("%window-add @3")
+        
+        self.assertEqual(received, ["%window-add @3"])
+    
+    def test_fail_pending_on_exit(self):
+        """Test waiting commands fail when the client exits"""
+        future = self.client.submit(['list-sessions'])
+        self.client._fail_pending(TmuxCommandError("exited"))
+        
+        with self.assertRaises(TmuxCommandError):
+            future.result()
+    
+    @patch('subprocess.run')
+    @patch.object(TmuxControlClient, 'start', return_value=False)
+    def test_control_backend_falls_back(self, mock_start, mock_run):
+        """Test control backend uses subprocess when unavailable"""
+        mock_run.return_value = MagicMock(stdout="output", returncode=0)
+        cmd = TmuxCommand(backend=TmuxCommand.BACKEND_CONTROL)
+        
+        result = cmd.execute_command(['tmux', 'list-sessions'])
+        
+        mock_start.assert_called_once()
+        mock_run.assert_called_once()
+        self.assertEqual(result.stdout, "output")
+    
+    @patch('subprocess.run')
+    @patch.object(TmuxControlClient, 'execute')
+    @patch.object(TmuxControlClient, 'start', return_value=True)
+    def test_control_backend_routes_commands(self, mock_start, mock_execute, mock_run):
+        """Test control backend sends commands over the shared client"""
+        mock_execute.return_value = subprocess.CompletedProcess(
+            ['tmux', 'list-sessions'], 0, "work\n", ""
+        )
+        cmd = TmuxCommand(backend=TmuxCommand.BACKEND_CONTROL)
+        
+        result = cmd.execute_command(['tmux', 'list-sessions'])
+        
+        mock_execute.assert_called_once_with(['list-sessions'], timeout=TmuxCommand.command_timeout)
+        mock_run.assert_not_called()
+        self.assertEqual(result.stdout, "work\n")
+    
+    @patch('subprocess.Popen')
+    @patch('subprocess.run')
+    def test_concurrent_starts_spawn_one_client(self, mock_run, mock_popen):
+        """Test threads starting the shared client at once spawn one process"""
+        def probe(*args, **kwargs):
+            time.sleep(0.05)
+            return subprocess.CompletedProcess(args[0], 0, "$0\n", "")
+        mock_run.side_effect = probe
+        mock_popen.side_effect = lambda *args, **kwargs: MagicMock(
+            stdout=iter(["%begin 1 1 0\n", "%end 1 1 0\n"]), **{'poll.return_value': None})
+        client = TmuxControlClient(socket_name='racy')
+        self.addCleanup(TmuxControlClient._started.discard, client)
+        
+        with ThreadPoolExecutor(2) as executor:
+            started = list(executor.map(lambda _: client.start(timeout=1), range(2)))
+        
+        self.assertEqual(started, [True, True])
+        mock_popen.assert_called_once()
+    
+    @patch('subprocess.run', side_effect=subprocess.TimeoutExpired(['tmux'], 0.5))
+    def test_start_probe_times_out(self, mock_run):
+        """Test a wedged server makes start raise instead of hanging"""
+        client = TmuxControlClient(socket_name='wedged')
+        
+        with self.assertRaises(TmuxTimeoutError):
+            client.start(timeout=0.5)
+        self.assertEqual(mock_run.call_args[1]['timeout'], 0.5)
+        self.assertIsNone(client.process)
+    
+    @patch('subprocess.run')
+    @patch.object(TmuxControlClient, 'start', side_effect=TmuxTimeoutError(['tmux'], 2.0))
+    def test_control_backend_start_timeout_raises(self, mock_start, mock_run):
+        """Test commands and batches get the deadline of the client start"""
+        cmd = TmuxCommand(backend=TmuxCommand.BACKEND_CONTROL)
+        
+        with self.assertRaises(TmuxTimeoutError):
+            cmd.execute_command(['tmux', 'list-sessions'], timeout=2.0)
+        mock_start.assert_called_with(2.0)
+        
+        results = cmd.batch().add('list-sessions').execute(timeout=3.0)
+        self.assertTrue(TmuxBatch.timed_out(results[0]))
+        mock_run.assert_not_called()
+    
+    @patch.object(TmuxControlClient, 'execute')
+    @patch.object(TmuxControlClient, 'start', return_value=True)
+    def test_control_backend_check_raises(self, mock_start, mock_execute):
+        """Test control-mode errors raise TmuxCommandError when checked"""
+        mock_execute.return_value = subprocess.CompletedProcess(
+            ['tmux', 'kill-session'], 1, "", "can't find session"
+        )
+        cmd = TmuxCommand(backend=TmuxCommand.BACKEND_CONTROL)
+        
+        with self.assertRaises(TmuxCommandError):
+            cmd.execute_command(['tmux', 'kill-session', '-t', 'nosuch'])
+
+
+class TestTmuxFormat(unittest.TestCase):
+    """Test the declarative -F format and its parser"""
+    
+    FORMAT = TmuxFormat('Row', [('window_index', int), ('window_name', str), ('window_active', bool)])
+    
+    def test_format_uses_unit_separator(self):
+        """Test the generated -F string"""
+        self.assertEqual(self.FORMAT.format, '#{window_index}\x1f#{window_name}\x1f#{window_active}')
+    
+    def test_parse_typed_records(self):
+        """Test names with '|' and ':' stay in their field and bad lines are skipped"""
+        records = self.FORMAT.parse(
+            "0\x1fa|b: c\x1f1\n"
+            "x\x1fShell\x1f0\n"
+            "truncated\n"
+        )
+        
+        self.assertEqual(records, [(0, 'a|b: c', True), (0, 'Shell', False)])
+        self.assertEqual(records[0].window_name, 'a|b: c')
+        self.assertIsNone(self.FORMAT.parse_line("1\x1fonly"))
+    
+    def test_parse_columns(self):
+        """Test column-wise parsing, including empty output"""
+        columns = self.FORMAT.parse_columns("3\x1fLogs\x1f0\n")
+        
+        self.assertEqual(columns, {'window_index': [3], 'window_name': ['Logs'],
+                                   'window_active': [False]})
+        self.assertEqual(self.FORMAT.parse(""), [])
+    
+    def test_separator_inside_free_text_field(self):
+        """Test a raw separator inside the free-text field stays in it"""
+        fmt = TmuxFormat('Row', [('window_index', int), ('window_name', str),
+                                 ('window_active', bool)], free_text='window_name')
+        
+        self.assertEqual(fmt.parse("0\x1fa:b|c\x1fd\x1f1\n1\x1fShell\x1f0\n"),
+                         [(0, 'a:b|c\x1fd', True), (1, 'Shell', False)])
+    
+    def test_wrong_field_count_is_logged(self):
+        """Test rows that cannot be fitted are reported, not dropped silently"""
+        with self.assertLogs('tmux_core', level='WARNING') as logs:
+            self.assertEqual(self.FORMAT.parse("0\x1fa\x1fb\x1f1\n1\x1fShell\x1f0\n"),
+                             [(1, 'Shell', False)])
+        self.assertIn("4 fields instead of 3", logs.output[0])
+
+
+class TestSnapshotCache(unittest.TestCase):
+    """Test the generation-stamped snapshot cache"""
+    
+    SNAPSHOT = tmux_output("$0|@0|%0|work|1|123|0|0|Shell|1|1|tiled|0|1|bash")
+    
+    def setUp(self):
+        self.cmd = TmuxCommand(snapshot_cache=SnapshotCache(ttl=60))
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_repeated_reads_hit_cache(self, mock_execute):
+        """Test reads within the TTL cost no tmux calls"""
+        mock_execute.return_value = MagicMock(stdout=self.SNAPSHOT)
+        
+        first = self.cmd.get_snapshot()
+        second = self.cmd.batch_get_all_sessions_and_windows()
+        
+        mock_execute.assert_called_once()
+        self.assertIs(first, second)
+        self.assertEqual(self.cmd.snapshot_cache.stats()['hits'], 1)
+        self.assertEqual(self.cmd.snapshot_cache.stats()['misses'], 1)
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_refresh_and_invalidate(self, mock_execute):
+        """Test refresh and invalidation force a new tmux call"""
+        mock_execute.return_value = MagicMock(stdout=self.SNAPSHOT)
+        
+        self.cmd.get_snapshot()
+        self.cmd.get_snapshot(refresh=True)
+        self.cmd.invalidate_snapshot()
+        self.cmd.get_snapshot()
+        
+        self.assertEqual(mock_execute.call_count, 3)
+        self.assertEqual(self.cmd.snapshot_cache.stats()['invalidations'], 1)
+    
+    @patch('time.monotonic')
+    def test_ttl_expiry(self, mock_monotonic):
+        """Test entries expire after the TTL"""
+        cache = SnapshotCache(ttl=1.0)
+        mock_monotonic.return_value = 100.0
+        cache.store(cache.generation, {'sessions': {}})
+        
+        mock_monotonic.return_value = 100.5
+        self.assertIsNotNone(cache.get())
+        mock_monotonic.return_value = 101.5
+        self.assertIsNone(cache.get())
+    
+    def test_stale_generation_not_stored(self):
+        """Test a fetch that raced with a mutation is discarded"""
+        cache = SnapshotCache(ttl=60)
+        generation = cache.generation
+        cache.invalidate()
+        cache.store(generation, {'sessions': {}})
+        
+        self.assertIsNone(cache.get())
+    
+    def test_zero_ttl_disables_cache(self):
+        """Test a TTL of zero never serves cached data"""
+        cache = SnapshotCache(ttl=0)
+        cache.store(cache.generation, {'sessions': {}})
+        
+        self.assertIsNone(cache.get())
+
+
+class TestTmuxBatch(unittest.TestCase):
+    """Test chaining several commands into one tmux invocation"""
+    
+    def setUp(self):
+        self.cmd = TmuxCommand(backend=TmuxCommand.BACKEND_SUBPROCESS)
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_commands_share_one_invocation(self, mock_execute):
+        """Test output is split back per command with sentinels"""
+        mock_execute.side_effect = fake_tmux_run
+        batch = self.cmd.batch()
+        batch.capture_pane(('work', 0), 5).rename_window('work:1', 'Shell').capture_pane('work:2')
+        
+        results = batch.execute()
+        
+        mock_execute.assert_called_once()
+        argv = mock_execute.call_args[0][0]
+        self.assertEqual(argv.count(';'), 5)
+        self.assertEqual([result.stdout for result in results],
+                         ["Output from work:0\n", "", "Output from work:2\n"])
+        self.assertEqual(results[1].args, ['tmux', 'rename-window', '-t', 'work:1', 'Shell'])
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_failure_stops_chain(self, mock_execute):
+        """Test commands after a failure are reported as not executed"""
+        mock_execute.side_effect = fake_tmux_run
+        batch = self.cmd.batch()
+        batch.capture_pane('work:0').capture_pane('broken:1').capture_pane('work:2')
+        
+        results = batch.execute()
+        
+        self.assertEqual([result.returncode for result in results], [0, 1, -1])
+        self.assertEqual(results[2].stderr, TmuxBatch.NOT_EXECUTED)
+        with self.assertRaises(TmuxCommandError):
+            batch.execute(check=True)
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_single_command_runs_plain(self, mock_execute):
+        """Test a one-command batch needs no sentinels"""
+        mock_execute.return_value = subprocess.CompletedProcess([], 0, "out\n", "")
+        
+        results = self.cmd.batch().send_keys('work:0', 'ls;').execute()
+        
+        mock_execute.assert_called_once_with(
+            ['tmux', 'send-keys', '-t', 'work:0', 'ls\\;'], check=False,
+            timeout=TmuxCommand.command_timeout
+        )
+        self.assertEqual(results[0].stdout, "out\n")
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_deadline_marks_remaining_commands_timed_out(self, mock_execute):
+        """Test a timed-out chain and the chains after it are reported, not run"""
+        self.cmd.chain_size = 2
+        def first_chain_only(cmd, check=True, timeout=None):
+            if mock_execute.call_count > 1:
+                raise TmuxTimeoutError(cmd, timeout)
+            return fake_tmux_run(cmd)
+        mock_execute.side_effect = first_chain_only
+        batch = self.cmd.batch()
+        for target in ['a', 'b', 'c', 'd', 'e']:
+            batch.capture_pane(target)
+        
+        results = batch.execute(continue_on_error=True, timeout=0.1)
+        
+        self.assertEqual(mock_execute.call_count, 2)
+        self.assertEqual([TmuxBatch.timed_out(result) for result in results],
+                         [False, False, True, True, True])
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_server_error_fails_remaining(self, mock_execute):
+        """Test a missing server doesn't trigger one retry per command"""
+        mock_execute.return_value = subprocess.CompletedProcess(
+            [], 1, "", "no server running on /tmp/tmux-0/default\n"
+        )
+        batch = self.cmd.batch()
+        for index in range(5):
+            batch.capture_pane(('work', index))
+        
+        results = batch.execute(continue_on_error=True)
+        
+        mock_execute.assert_called_once()
+        self.assertTrue(all(result.returncode == 1 for result in results))
+    
+    def test_escape_argument(self):
+        """Test trailing semicolons stay literal"""
+        self.assertEqual(TmuxBatch.escape_argument("echo hi;"), "echo hi\\;")
+        self.assertEqual(TmuxBatch.escape_argument("a;b"), "a;b")
+    
+    @patch.object(TmuxCommand, '_get_control_client')
+    def test_control_mode_pipelines(self, mock_get_client):
+        """Test control mode sends each command on the shared client"""
+        client = MagicMock()
+        client.execute.side_effect = lambda args, timeout=None: subprocess.CompletedProcess(
+            ['tmux'] + args, 1 if args[0] == 'kill-window' else 0, "", ""
+        )
+        mock_get_client.return_value = client
+        
+        results = self.cmd.batch().add('kill-window', '-t', 'x:1').add('list-sessions').execute()
+        
+        client.execute.assert_called_once_with(['kill-window', '-t', 'x:1'],
+                                               timeout=TmuxCommand.command_timeout)
+        self.assertEqual([result.returncode for result in results], [1, -1])
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    @patch.object(TmuxCommand, '_get_control_client')
+    def test_newline_in_later_command_uses_subprocess(self, mock_get_client, mock_execute):
+        """Test a newline anywhere in the batch keeps it off the control client"""
+        mock_execute.return_value = subprocess.CompletedProcess([], 0, "", "")
+        
+        results = self.cmd.batch().add('list-sessions').add(
+            'send-keys', '-t', '%1', 'line 1\nline 2').execute(continue_on_error=True)
+        
+        mock_get_client.assert_not_called()
+        self.assertIn('line 1\nline 2', mock_execute.call_args[0][0])
+        self.assertEqual(len(results), 2)
+
+
+class TestTmuxMetrics(unittest.TestCase):
+    """Test per-subcommand instrumentation of execute_command"""
+    
+    def setUp(self):
+        self.cmd = TmuxCommand(backend=TmuxCommand.BACKEND_SUBPROCESS)
+        self.metrics = TmuxMetrics(enabled=True)
+        patcher = patch.object(TmuxCommand, 'metrics', self.metrics)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    @patch('subprocess.run')
+    def test_records_calls_bytes_and_failures(self, mock_run):
+        """Test counts, output size and failures per subcommand"""
+        mock_run.side_effect = [
+            subprocess.CompletedProcess([], 0, "line 1\nline 2\n", ""),
+            subprocess.CompletedProcess([], 1, "", "can't find pane\n"),
+        ]
+        self.cmd.execute_command(['tmux', 'capture-pane', '-p', '-t', '%1'])
+        self.cmd.execute_command(['tmux', 'capture-pane', '-p', '-t', '%9'], check=False)
+        
+        stats = self.metrics.to_dict()
+        capture = stats['commands']['capture-pane']
+        self.assertEqual((stats['processes'], stats['calls'], stats['failures']), (2, 2, 1))
+        self.assertEqual((capture['calls'], capture['failures'], capture['output_bytes']), (2, 1, 14))
+        self.assertEqual(sum(capture['histogram'].values()), 2)
+    
+    @patch('subprocess.run')
+    def test_raising_call_counts_as_failure(self, mock_run):
+        """Test a call that raises is still recorded"""
+        mock_run.side_effect = subprocess.CalledProcessError(1, ['tmux'], "", "no server")
+        
+        with self.assertRaises(TmuxCommandError):
+            self.cmd.execute_command(['tmux', 'list-panes', '-a'])
+        
+        self.assertEqual(self.metrics.commands['list-panes'].failures, 1)
+    
+    @patch.object(TmuxCommand, '_execute_command', side_effect=fake_tmux_run)
+    def test_chain_counted_under_first_subcommand(self, mock_execute):
+        """Test a batch is one call carrying its commands, markers excluded"""
+        self.cmd.batch().capture_pane('work:0').rename_window('work:1', 'Shell').execute()
+        
+        stats = self.metrics.commands['capture-pane']
+        self.assertEqual((stats.calls, stats.commands), (1, 2))
+        self.assertNotIn('display-message', self.metrics.commands)
+    
+    @patch('subprocess.run')
+    def test_disabled_records_nothing(self, mock_run):
+        """Test nothing is recorded while metrics are off"""
+        mock_run.return_value = subprocess.CompletedProcess([], 0, "", "")
+        self.metrics.disable()
+        
+        self.cmd.execute_command(['tmux', 'list-panes', '-a'])
+        
+        self.assertEqual(self.metrics.to_dict()['calls'], 0)
+        self.assertEqual(self.metrics.processes, 0)
+
+
+class TestAsyncTmuxCommand(unittest.IsolatedAsyncioTestCase):
+    """Test the asyncio-native execution path"""
+    
+    def setUp(self):
+        self.cmd = AsyncTmuxCommand(backend=TmuxCommand.BACKEND_SUBPROCESS)
+    
+    @staticmethod
+    def _process(stdout=b"", stderr=b"", returncode=0):
+        process = MagicMock(returncode=returncode)
+        process.communicate = AsyncMock(return_value=(stdout, stderr))
+        return process
+    
+    @patch('asyncio.create_subprocess_exec')
+    async def test_execute_command_async_success(self, mock_exec):
+        """Test async command execution"""
+        mock_exec.return_value = self._process(stdout=b"output")
+        
+        result = await self.cmd.execute_command_async(['tmux', 'list-sessions'])
+        
+        self.assertEqual(mock_exec.call_args[0], ('tmux', 'list-sessions'))
+        self.assertEqual(result.stdout, "output")
+        self.assertEqual(result.returncode, 0)
+    
+    @patch('asyncio.create_subprocess_exec')
+    async def test_execute_command_async_failure(self, mock_exec):
+        """Test async command failure raises TmuxCommandError"""
+        mock_exec.return_value = self._process(stderr=b"no server", returncode=1)
+        
+        with self.assertRaises(TmuxCommandError):
+            await self.cmd.execute_command_async(['tmux', 'list-sessions'])
+        
+        result = await self.cmd.execute_command_async(['tmux', 'list-sessions'], check=False)
+        self.assertEqual(result.returncode, 1)
+    
+    @patch.object(AsyncTmuxCommand, 'execute_command_async')
+    async def test_batch_get_all_sessions_and_windows_async(self, mock_execute):
+        """Test async batch retrieval uses the shared parser"""
+        mock_execute.return_value = MagicMock(
+            stdout=tmux_output("$0|@0|%0|test-session|1|1234567890|1|0|Claude-Agent|1|1|tiled|0|1|node")
+        )
+        
+        result = await self.cmd.batch_get_all_sessions_and_windows_async()
+        
+        self.assertTrue(result['sessions']['test-session'].attached)
+        self.assertEqual(result['windows']['test-session'][0].name, 'Claude-Agent')
+    
+    @patch.object(AsyncTmuxCommand, 'execute_command_async')
+    async def test_batch_capture_panes_async(self, mock_execute):
+        """Test async batch capture returns one entry per target"""
+        mock_execute.side_effect = [
+            MagicMock(stdout="Output from session1:0", returncode=0),
+            MagicMock(stdout="", stderr="can't find session", returncode=1)
+        ]
+        
+        results = await self.cmd.batch_capture_panes_async([('session1', 0), ('session2', 1)])
+        
+        self.assertEqual(results, {'session1:0': "Output from session1:0", 'session2:1': ""})
+    
+    async def test_batch_capture_panes_async_bounded(self):
+        """Test async captures respect the concurrency limit"""
+        active = []
+        peak = []
+        
+        async def run(cmd, check=True, timeout=None):
+            active.append(cmd)
+            peak.append(len(active))
+            await asyncio.sleep(0)
+            active.remove(cmd)
+            return MagicMock(stdout="x", returncode=0)
+        
+        with patch.object(AsyncTmuxCommand, 'execute_command_async', side_effect=run):
+            results = await self.cmd.batch_capture_panes_detailed_async(
+                [('s', index, 0) for index in range(8)], max_concurrency=2
+            )
+        
+        self.assertEqual(len(results), 8)
+        self.assertEqual(max(peak), 2)
+        self.assertTrue(results['s:3.0'].ok)
+
+
+class TestTmuxServerPool(unittest.TestCase):
+    """Test socket-aware commands and merged multi-server snapshots"""
+    
+    @patch('subprocess.run')
+    def test_socket_is_passed_to_tmux(self, mock_run):
+        """Test commands of a socket-bound instance target that socket"""
+        mock_run.return_value = subprocess.CompletedProcess([], 0, "", "")
+        cmd = TmuxCommand(backend=TmuxCommand.BACKEND_SUBPROCESS, socket_name='team-a')
+        
+        cmd.execute_command(['tmux', 'list-sessions'])
+        
+        self.assertEqual(mock_run.call_args[0][0], ['tmux', '-L', 'team-a', 'list-sessions'])
+        self.assertEqual(cmd.server, 'team-a')
+        self.assertEqual(TmuxCommand().server, 'default')
+    
+    def test_control_clients_pooled_per_socket(self):
+        """Test one shared control client per socket"""
+        self.addCleanup(TmuxControlClient._pool.pop, 'team-a', None)
+        self.addCleanup(TmuxControlClient._pool.pop, 'team-b', None)
+        first = TmuxControlClient.shared('team-a')
+        
+        self.assertIs(TmuxControlClient.shared('team-a'), first)
+        self.assertIsNot(TmuxControlClient.shared('team-b'), first)
+        self.assertEqual(first.tmux_argv, ['tmux', '-L', 'team-a'])
+    
+    @patch.dict('os.environ', {'TMUX_SOCKETS': 'default, team-a,,team-b'})
+    def test_sockets_from_env(self):
+        """Test TMUX_SOCKETS parsing, with 'default' as the default socket"""
+        self.assertEqual(TmuxServerPool.sockets_from_env(), [None, 'team-a', 'team-b'])
+        self.assertEqual(TmuxServerPool().servers, ['default', 'team-a', 'team-b'])
+    
+    @patch.dict('os.environ', {'TMUX_SOCKETS': 'team-a'})
+    def test_primary_only_serves_listed_socket(self):
+        """Test a primary command is used for its socket but does not add it"""
+        primary = TmuxCommand()
+        
+        self.assertEqual(TmuxServerPool(primary=primary).servers, ['team-a'])
+        pool = TmuxServerPool([None, 'team-a'], primary=primary)
+        self.assertIs(pool.commands['default'], primary)
+    
+    def test_merged_snapshot_tags_sessions(self):
+        """Test sessions of every server are merged without name clashes"""
+        def fake_snapshot(self, refresh=False):
+            return self._parse_snapshot(tmux_output(
+                "$0|@0|%0|work|1|123|0|0|{server}|1|1|tiled|0|1|node", server=self.server
+            ))
+        pool = TmuxServerPool([None, 'team-a'])
+        
+        with patch.object(TmuxCommand, 'get_snapshot', fake_snapshot):
+            snapshot = pool.get_snapshot()
+        
+        self.assertEqual(list(snapshot['sessions']), ['work', 'team-a/work'])
+        self.assertEqual(snapshot['sessions']['team-a/work'].server, 'team-a')
+        self.assertEqual(snapshot['windows']['team-a/work'][0].name, 'team-a')
+        self.assertEqual(list(snapshot['panes']), ['work:0', 'team-a/work:0'])
+        self.assertEqual(list(snapshot['servers']), ['default', 'team-a'])
+
+
 class TestBatchPerformance(unittest.TestCase):
     """Test performance improvements of batch operations"""
     
@@ -0,0 +1,134 @@
+"""
+Unit tests for tmux_hooks.py - Hook-driven invalidation and wake-up
+"""
+import asyncio
+import os
+import subprocess
+import unittest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+from tmux_core import TmuxCommand, SnapshotCache, TmuxIndex
+from tmux_hooks import TmuxHookListener, HookRecord
+from event_collector import TmuxEventCollector
+
+
+def ok_run(cmd, check=True, timeout=None):
+    """execute_command stand-in that accepts every chained command"""
+    markers = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == '-p']
+    return subprocess.CompletedProcess(cmd, 0, ''.join(f"{m}\n" for m in markers), "")
+
+
+class TestHookRecord(unittest.TestCase):
+    """Test parsing of FIFO records"""
+    
+    def test_parse_full_record(self):
+        """Test a record with every id"""
+        record = HookRecord.parse("window-linked\t$1\t@4\t%7\n")
+        self.assertEqual(record, HookRecord('window-linked', '$1', '@4', '%7'))
+    
+    def test_parse_partial_and_empty(self):
+        """Test short records are padded and empty lines ignored"""
+        self.assertEqual(HookRecord.parse("session-closed\t$2"),
+                         HookRecord('session-closed', '$2', '', ''))
+        self.assertIsNone(HookRecord.parse(""))
+
+
+class TestTmuxHookListener(unittest.TestCase):
+    """Test hook installation and FIFO reading"""
+    
+    def setUp(self):
+        self.cmd = TmuxCommand(backend=TmuxCommand.BACKEND_SUBPROCESS,
+                               snapshot_cache=SnapshotCache(ttl=60))
+        self.listener = TmuxHookListener(self.cmd)
+    
+    def tearDown(self):
+        with patch.object(TmuxCommand, 'execute_command', side_effect=ok_run):
+            self.listener.uninstall()
+    
+    @patch.object(TmuxCommand, 'execute_command', side_effect=ok_run)
+    def test_install_sets_all_hooks_in_one_call(self, mock_execute):
+        """Test every hook is installed with a single tmux invocation"""
+        self.assertTrue(self.listener.install())
+        
+        mock_execute.assert_called_once()
+        argv = mock_execute.call_args[0][0]
+        self.assertEqual(argv.count('set-hook'), len(TmuxHookListener.HOOKS))
+        self.assertIn(f'window-renamed[{self.listener.hook_index}]', argv)
+        self.assertTrue(os.path.exists(self.listener.fifo_path))
+    
+    def test_hook_command_only_uses_ids(self):
+        """Test the hook's shell command carries no user-controlled names"""
+        self.listener.fifo_path = "/tmp/x/hooks.fifo"
+        command = self.listener.hook_command()
+        
+        self.assertTrue(command.startswith('run-shell -b'))
+        self.assertNotIn('session_name', command)
+        self.assertIn('1<> /tmp/x/hooks.fifo', command)
+    
+    @patch.object(TmuxCommand, 'execute_command')
+    def test_install_fails_when_tmux_refuses(self, mock_execute):
+        """Test the FIFO is cleaned up when no hook can be set"""
+        mock_execute.return_value = subprocess.CompletedProcess(
+            [], 1, "", "no server running on /tmp/tmux-0/default\n"
+        )
+        
+        self.assertFalse(self.listener.install())
+        self.assertIsNone(self.listener.fifo_path)
+    
+    @patch.object(TmuxCommand, 'execute_command', side_effect=ok_run)
+    def test_dispatch_reads_fifo_and_invalidates(self, mock_execute):
+        """Test records written to the FIFO reach callbacks"""
+        self.listener.install()
+        received = []
+        self.listener.add_callback(received.append)
+        generation = self.cmd.snapshot_cache.generation
+        
+        fd = os.open(self.listener.fifo_path, os.O_WRONLY)
+        os.write(fd, b"window-renamed\t$0\t@1\t%1\nsession-cre")
+        self.listener.dispatch()
+        os.write(fd, b"ated\t$3\t@9\t%12\n")
+        os.close(fd)
+        self.listener.dispatch()
+        
+        self.assertEqual([record.hook for record in received],
+                         ['window-renamed', 'session-created'])
+        self.assertEqual(self.cmd.snapshot_cache.generation, generation + 2)
+    
+    @patch.object(TmuxCommand, 'execute_command', side_effect=ok_run)
+    def test_uninstall_removes_hooks_and_fifo(self, mock_execute):
+        """Test uninstall unsets our array entries and deletes the FIFO"""
+        self.listener.install()
+        fifo_path = self.listener.fifo_path
+        
+        self.listener.uninstall()
+        
+        argv = mock_execute.call_args[0][0]
+        self.assertEqual(argv.count('-gu'), len(TmuxHookListener.HOOKS))
+        self.assertFalse(os.path.exists(fifo_path))
+
+
+class TestCollectorHooks(unittest.IsolatedAsyncioTestCase):
+    """Test the collector only re-lists structure when hooks fire"""
+    
+    async def test_structure_reused_until_hook(self):
+        """Test structure is listed again only after a hook record"""
+        collector = TmuxEventCollector(use_hooks=False, reconcile_interval=3600)
+        collector.hook_listener = MagicMock()
+        collector._wakeup = asyncio.Event()
+        state = TmuxIndex()
+        
+        with patch.object(TmuxEventCollector, 'get_current_state',
+                          new=AsyncMock(return_value=state)) as mock_state:
+            await collector.get_structure()
+            collector.previous_state = state
+            await collector.get_structure()
+            self.assertEqual(mock_state.call_count, 1)
+            
+            collector.on_hook_record(HookRecord('window-linked', '$0', '@2', '%2'))
+            self.assertTrue(collector._wakeup.is_set())
+            await collector.get_structure()
+            self.assertEqual(mock_state.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+"""
+Unit tests for tmux_normalize.py - Redraw noise removal
+"""
+import unittest
+
+from tmux_core import PaneInfo
+from tmux_normalize import ContentNormalizer
+from event_collector import TmuxEventCollector
+
+
+FOOTER = """╭──────────────────────────╮
+│ >                        │
+╰──────────────────────────╯
+  ? for shortcuts      Context left until auto-compact: {context}%"""
+
+
+def claude_frame(second, output=("● Reading src/app.py",)):
+    """Claude's screen while working: output, the status line and the input box"""
+    spinner = "✶✻✽✢"[second % 4]
+    return '\n'.join(list(output) + [
+        "",
+        f"\x1b[33m{spinner}\x1b[0m Pondering… ({second}s · ↑ {second * 0.1:.1f}k tokens · esc to interrupt)",
+        "",
+        FOOTER.format(context=90 - second // 10),
+    ])
+
+
+class TestContentNormalizer(unittest.TestCase):
+    """Test redraw noise is masked and real output kept"""
+    
+    def test_frames_differing_only_in_noise_normalize_equal(self):
+        """Test spinner, timer, counter and footer redraws compare equal"""
+        normalizer = ContentNormalizer()
+        
+        self.assertEqual(normalizer.normalize(claude_frame(3)), normalizer.normalize(claude_frame(47)))
+        self.assertNotEqual(normalizer.normalize(claude_frame(3)),
+                            normalizer.normalize(claude_frame(3, ("● Reading src/app.py", "  ⎿  Error"))))
+    
+    def test_rules_are_configurable(self):
+        """Test rules can be picked, with none comparing raw content"""
+        self.assertEqual(ContentNormalizer("none").normalize("\x1b[1m7s\x1b[0m"), "\x1b[1m7s\x1b[0m")
+        self.assertEqual(ContentNormalizer("ansi,timers").normalize("\x1b[1m7s\x1b[0m"), "<time>")
+        self.assertEqual(ContentNormalizer("ansi,bogus").rules, ['ansi'])
+        self.assertEqual(ContentNormalizer("counters").normalize("12,345 tokens, 40%"),
+                         "<n> tokens, <n>%")
+    
+    def test_busy_agent_event_volume(self):
+        """Test a minute of a working agent only reports its real output"""
+        pane = PaneInfo('work', 0, 0, True, id='%1')
+        counts = {}
+        for rules in ("none", ContentNormalizer.DEFAULT_RULES):
+            collector = TmuxEventCollector(use_hooks=False)
+            collector.normalizer = ContentNormalizer(rules)
+            output = ["● Reading src/app.py"]
+            events = 0
+            for second in range(60):
+                if second % 15 == 0:
+                    output.append(f"  ⎿  step {second // 15}")
+                if collector.check_pane_content('%1', pane, claude_frame(second, output)):
+                    events += 1
+            counts[rules] = events
+        
+        self.assertEqual(counts["none"], 59)
+        self.assertEqual(counts[ContentNormalizer.DEFAULT_RULES], 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
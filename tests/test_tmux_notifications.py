@@ -0,0 +1,169 @@
+"""
+Unit tests for tmux_notifications.py - control-mode push collection
+"""
+import asyncio
+import os
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from fake_tmux import FakeTmuxServer, FakeTmuxDaemon, socket_path
+from tmux_core import TmuxCommand, TmuxControlClient, TmuxTimeoutError, PaneInfo
+from tmux_notifications import Notification, TmuxNotificationListener
+from event_collector import TmuxEventCollector
+
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class TestNotification(unittest.TestCase):
+    """Test notification lines are parsed like tmux writes them"""
+    
+    def test_parse_keeps_spaces_in_last_argument(self):
+        """Test names with spaces survive and non-notifications are ignored"""
+        notification = Notification.parse('%window-renamed @3 build logs', '$1')
+        
+        self.assertEqual(notification.name, 'window-renamed')
+        self.assertEqual(notification.args, ['@3', 'build logs'])
+        self.assertEqual(notification.session_id, '$1')
+        self.assertEqual(Notification.parse('%exit').args, [])
+        self.assertIsNone(Notification.parse('plain output'))
+    
+    def test_decode_output(self):
+        """Test octal escapes become the raw bytes"""
+        self.assertEqual(Notification.decode_output('ok\\015\\012a\\134b'), b'ok\r\na\\b')
+
+
+class TestNotificationListener(unittest.TestCase):
+    """Test notifications feed watched panes and reach callbacks"""
+    
+    def setUp(self):
+        self.listener = TmuxNotificationListener(TmuxCommand(backend=TmuxCommand.BACKEND_SUBPROCESS))
+        self.received = []
+        self.listener.add_callback(self.received.append)
+    
+    def test_output_completes_lines_of_watched_panes(self):
+        """Test %output is split into lines on top of the known tail"""
+        self.listener.watch('%1', '$0', "earlier")
+        
+        self.listener.dispatch('$0', '%output %1 building\\015\\012do')
+        self.listener.dispatch('$0', '%output %1 ne\\015\\012')
+        self.listener.dispatch('$0', '%output %2 unwatched\\015\\012')
+        
+        self.assertEqual([n.lines for n in self.received], [['building'], ['done'], []])
+        self.assertEqual(self.listener.tail('%1'), "earlier\nbuilding\ndone")
+    
+    def test_exit_stops_monitor(self):
+        """Test %exit drops the session's panes back to polling"""
+        self.listener.watch('%1', '$0')
+        self.listener.watch('%2', '$1')
+        
+        self.listener.dispatch('$0', '%exit')
+        
+        self.assertEqual(list(self.listener.outputs), ['%2'])
+        self.assertEqual(self.received[0].name, 'exit')
+    
+    
+    @patch.object(TmuxControlClient, 'start', side_effect=TmuxTimeoutError(['tmux'], 0.5))
+    def test_sync_start_timeout_raises(self, mock_start):
+        """Test a monitor that cannot start in time raises instead of blocking"""
+        with self.assertRaises(TmuxTimeoutError):
+            self.listener.sync(['$0', '$1'], timeout=0.5)
+        
+        mock_start.assert_called_once_with(0.5)
+        self.assertEqual(self.listener.monitors, {})
+
+
+class TestCollectorNotifications(unittest.IsolatedAsyncioTestCase):
+    """Test pushed notifications become events without a poll"""
+    
+    def setUp(self):
+        self.collector = TmuxEventCollector(use_hooks=False, use_push=False)
+        self.collector.notifications = TmuxNotificationListener(self.collector.tmux_cmd)
+        self.collector._event_queue = asyncio.Queue()
+        self.collector._wakeup = asyncio.Event()
+    
+    async def test_output_emits_pane_event(self):
+        """Test new pushed output is queued as a pane event immediately"""
+        self.collector.pane_targets = {'%1': PaneInfo('work', 0, 0, True, id='%1', session_id='$0')}
+        self.collector.previous_pane_content['%1'] = self.collector.calculate_content_hash("")
+        self.collector.notifications.watch('%1', '$0')
+        self.collector.notifications.add_callback(self.collector.on_notification)
+        
+        self.collector.notifications.dispatch('$0', '%output %1 Error: build failed\\015\\012')
+        
+        event = self.collector._event_queue.get_nowait()
+        self.assertEqual(event['type'], 'pane.error')
+        self.assertEqual(event['data']['new_lines'], 1)
+        self.assertFalse(self.collector._wakeup.is_set())
+    
+    async def test_structure_notifications_wake_collector(self):
+        """Test window changes, in any session, run a structure pass now"""
+        for line in ('%unlinked-window-add @7', '%output %9 new pane\\012'):
+            self.collector.structure_dirty = False
+            self.collector._wakeup.clear()
+            
+            self.collector.on_notification(Notification.parse(line, '$0'))
+            
+            self.assertTrue(self.collector.structure_dirty)
+            self.assertTrue(self.collector._wakeup.is_set())
+    
+    def test_tick_interval_while_all_panes_pushed(self):
+        """Test polling slows to the reconciliation interval"""
+        self.collector.pane_targets = {'%1': PaneInfo('work', 0, 0, True, id='%1')}
+        
+        self.assertEqual(self.collector.tick_interval(), self.collector.reconcile_interval)
+        self.collector.polled_panes = 1
+        self.assertEqual(self.collector.tick_interval(), self.collector.poll_interval)
+
+
+class TestMonitorThroughShim(unittest.TestCase):
+    """Test monitors attach to the fake server and receive its notifications"""
+    
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        env = patch.dict(os.environ, {
+            'FAKE_TMUX_TMPDIR': tmpdir.name,
+            'PATH': os.path.join(REPO, 'benchmarks', 'bin') + os.pathsep + os.environ['PATH'],
+        })
+        env.start()
+        self.addCleanup(env.stop)
+        
+        self.server = FakeTmuxServer()
+        self.server.populate(2, windows=1)
+        self.daemon = FakeTmuxDaemon(self.server, socket_path({'L': 'fake-test'}), tick=0.05)
+        thread = threading.Thread(target=self.daemon.serve, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join, 5)
+        self.addCleanup(self.daemon.shutdown)
+    
+    def test_sync_monitors_sessions(self):
+        """Test a monitor sees its session's windows and output, others unlinked"""
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        listener = TmuxNotificationListener(TmuxCommand(socket_name='fake-test'), max_sessions=1)
+        self.addCleanup(listener.close)
+        received = []
+        listener.add_callback(lambda n: received.append((n.name, n.args[:1])))
+        listener.attach(loop)
+        
+        self.assertEqual(listener.sync(['$0', '$1']), ['$0'])
+        listener.watch('%0', '$0')
+        self.server.run(['new-window', '-t', 'project-1', '-n', 'Logs'])
+        self.server.run(['send-keys', '-t', '%0', 'make', 'Enter'])
+        deadline = time.monotonic() + 5
+        while ('output', ['%0']) not in received and time.monotonic() < deadline:
+            loop.run_until_complete(asyncio.sleep(0.05))
+        
+        self.assertIn(('session-changed', ['$0']), received)
+        self.assertIn(('unlinked-window-add', ['@2']), received)
+        self.assertIn(('output', ['%0']), received)
+        self.assertNotIn(('output', ['%1']), received)
+        self.assertEqual(listener.monitored(), {'$0'})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Unit tests for tmux_polling.py - Adaptive per-pane poll schedule
+"""
+import unittest
+from unittest.mock import patch, AsyncMock
+
+from tmux_core import TmuxIndex, SessionInfo, WindowInfo, PaneInfo
+from tmux_polling import PanePollSchedule
+from tmux_scrollback import ScrollbackReader, ScrollbackRead
+from event_collector import TmuxEventCollector
+
+
+class TestPanePollSchedule(unittest.TestCase):
+    """Test idle panes back off and changes promote them"""
+    
+    def setUp(self):
+        self.schedule = PanePollSchedule(0.5, max_interval=4.0)
+    
+    def test_idle_pane_backs_off_to_ceiling(self):
+        """Test each idle read doubles the interval up to max_interval"""
+        intervals = []
+        for _ in range(6):
+            self.schedule.record('%1', changed=False, now=0.0)
+            intervals.append(self.schedule.interval('%1'))
+        
+        self.assertEqual(intervals, [1.0, 2.0, 4.0, 4.0, 4.0, 4.0])
+        self.assertEqual(self.schedule.due(['%1', '%2'], now=3.0), ['%2'])
+        self.assertEqual(self.schedule.due(['%1', '%2'], now=3.8), ['%1', '%2'])
+    
+    def test_change_and_promote_restore_base_interval(self):
+        """Test an observed change or a promotion makes a pane hot again"""
+        for pane_id in ('%1', '%2'):
+            for _ in range(3):
+                self.schedule.record(pane_id, changed=False, now=0.0)
+        
+        self.schedule.record('%1', changed=True, now=0.0)
+        self.schedule.promote(['%2'])
+        
+        self.assertEqual(self.schedule.interval('%1'), 0.5)
+        self.assertEqual(self.schedule.due(['%1', '%2'], now=0.5), ['%1', '%2'])
+        self.assertEqual(sorted(self.schedule.hot()), ['%1', '%2'])
+    
+    def test_disabled_at_base_interval(self):
+        """Test a ceiling at the base interval reads every pane every tick"""
+        schedule = PanePollSchedule(0.5, max_interval=0.5)
+        schedule.record('%1', changed=False, now=0.0)
+        
+        self.assertEqual(schedule.due(['%1'], now=0.0), ['%1'])
+    
+    def test_recent_change_keeps_pane_hot(self):
+        """Test idle reads within hot_period of a change do not back off"""
+        self.schedule.record('%1', changed=True, now=0.0)
+        self.schedule.record('%1', changed=False, now=4.5)
+        self.assertEqual(self.schedule.interval('%1'), 0.5)
+        
+        self.schedule.record('%1', changed=False, now=5.0)
+        self.assertEqual(self.schedule.interval('%1'), 1.0)
+
+
+class TestCollectorSchedule(unittest.IsolatedAsyncioTestCase):
+    """Test the collector reads only panes that are due"""
+    
+    def state(self, window_name="Shell"):
+        state = TmuxIndex()
+        state.add_session(SessionInfo("work", 1, "123", id='$0'))
+        for index, name in enumerate([window_name, "Logs"]):
+            state.add_window(WindowInfo("work", index, name, True, 1, "tiled",
+                                        id=f'@{index}', session_id='$0'))
+            state.add_pane(PaneInfo("work", index, 0, True, "bash",
+                                    id=f'%{index}', window_id=f'@{index}', session_id='$0'))
+        return state
+    
+    async def detect(self, state, moved=()):
+        """Run detect_changes, returning the panes it captured"""
+        read = []
+        
+        async def read_async(pane_ids, timeout=None, due=None, cursors=None):
+            read.extend(pane_id for pane_id in pane_ids if pane_id in due or pane_id in moved)
+            return {pane_id: ScrollbackRead(pane_id) for pane_id in read}
+        
+        with patch.object(TmuxEventCollector, 'get_structure', new=AsyncMock(return_value=state)), \
+             patch.object(ScrollbackReader, 'read_async', side_effect=read_async):
+            await self.collector.detect_changes()
+        return read
+    
+    async def test_window_change_promotes_its_panes(self):
+        """Test idle panes back off until their window is renamed"""
+        self.collector = TmuxEventCollector(use_hooks=False)
+        self.collector.previous_state = self.state()
+        schedule = self.collector.schedule
+        
+        self.assertEqual(await self.detect(self.state(), moved={'%0', '%1'}), ['%0', '%1'])
+        self.assertEqual(schedule.interval('%0'), 1.0)
+        await self.detect(self.state(window_name="Build"))
+        
+        self.assertEqual(schedule.interval('%0'), 0.5)
+        self.assertEqual(schedule.interval('%1'), 1.0)
+    
+    async def test_only_moved_and_ceiling_panes_are_captured(self):
+        """Test unmoved panes are skipped until they back off to the ceiling"""
+        self.collector = TmuxEventCollector(use_hooks=False)
+        self.collector.previous_state = self.state()
+        schedule = self.collector.schedule
+        schedule.record('%0', changed=False)
+        schedule.record('%1', changed=False)
+        schedule.panes['%1'].score = schedule.base_interval / schedule.max_interval
+        for activity in schedule.panes.values():
+            activity.next_read = 0.0
+        
+        self.assertEqual(await self.detect(self.state()), ['%1'])
+        self.assertEqual(schedule.interval('%0'), 2.0)
+        self.assertEqual(await self.detect(self.state(), moved={'%0'}), ['%0'])
+
+
+if __name__ == '__main__':
+    unittest.main()
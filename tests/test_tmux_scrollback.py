@@ -0,0 +1,239 @@
+"""
+Unit tests for tmux_scrollback.py - Incremental pane reads
+"""
+import subprocess
+import unittest
+from unittest.mock import patch
+
+from tmux_core import TmuxCommand, SnapshotCache, TmuxTimeoutError
+from tmux_scrollback import ScrollbackReader, PaneCursor, PaneMirror
+
+
+class FakePane:
+    """One pane's grid, answering list-panes and capture-pane like tmux"""
+    
+    def __init__(self, height=5, history_limit=2000):
+        self.lines = [""]
+        self.height = height
+        self.history_limit = history_limit
+        self.captured_lines = 0
+        self.activity = 0
+        # Row of the cursor, when not on the last line
+        self.cursor_row = None
+    
+    def write(self, *lines):
+        self.lines[-1:] = list(lines) + [""]
+        self.activity += 1
+    
+    def redraw(self, row, line):
+        """Overwrite a line in place, leaving the cursor where it is"""
+        self.lines[row] = line
+        self.activity += 1
+    
+    @property
+    def history_size(self):
+        return max(0, len(self.lines) - self.height)
+    
+    def run(self, cmd, check=True, timeout=None):
+        if cmd[1] == 'list-panes':
+            row = len(self.lines) - 1 if self.cursor_row is None else self.cursor_row
+            cursor_y = row - self.history_size
+            fields = ["%0", self.history_size, self.history_limit, cursor_y, self.height, 80, 0,
+                      len(self.lines[row]), self.activity, 100]
+            return subprocess.CompletedProcess(cmd, 0, "\x1f".join(map(str, fields)) + "\n", "")
+        # A single-command batch runs as plain capture-pane -p -t %0 -S start -E end
+        args = cmd[1:]
+        start = int(args[args.index('-S') + 1]) + self.history_size
+        end = int(args[args.index('-E') + 1]) + self.history_size
+        # Rows below the last line written are blank, as on a real screen
+        padded = self.lines + [""] * (self.history_size + self.height - len(self.lines))
+        selected = padded[max(0, start):end + 1]
+        self.captured_lines += len(selected)
+        return subprocess.CompletedProcess(cmd, 0, ''.join(f"{line}\n" for line in selected), "")
+
+
+class TestPaneCursor(unittest.TestCase):
+    """Test cursor parsing"""
+    
+    def test_parse(self):
+        """Test a list-panes line becomes a cursor"""
+        cursor = PaneCursor.parse("\x1f".join(["%3", "120", "2000", "7", "24", "80", "0",
+                                                "2", "1700000000", "42"]))
+        self.assertEqual(cursor.position, 127)
+        self.assertEqual(cursor.fingerprint, (120, 7, 2, 24, 80, False, 1700000000, 42))
+        self.assertFalse(cursor.history_full)
+        self.assertIsNone(PaneCursor.parse("%3|120|2000|7|24|80|0"))
+
+
+class TestScrollbackReader(unittest.TestCase):
+    """Test reads only move new lines and resync when positions jump"""
+    
+    def setUp(self):
+        self.pane = FakePane()
+        self.cmd = TmuxCommand(backend=TmuxCommand.BACKEND_SUBPROCESS,
+                               snapshot_cache=SnapshotCache(ttl=60))
+        self.reader = ScrollbackReader(self.cmd, lines=3)
+        patcher = patch.object(TmuxCommand, 'execute_command', side_effect=self.pane.run)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_first_read_resyncs(self):
+        """Test the first read captures the last lines"""
+        self.pane.write(*[f"line {i}" for i in range(20)])
+        
+        read = self.reader.read()['%0']
+        
+        self.assertTrue(read.resync)
+        self.assertEqual(read.lines, ["line 18", "line 19", ""])
+    
+    def test_incremental_read_only_moves_new_lines(self):
+        """Test only lines written since the last read are captured"""
+        self.pane.write(*[f"line {i}" for i in range(100)])
+        self.reader.read()
+        self.pane.captured_lines = 0
+        
+        self.pane.write("$ make", "ok")
+        read = self.reader.read()['%0']
+        
+        self.assertFalse(read.resync)
+        # The previous cursor line is re-read since it may have been completed
+        self.assertEqual(read.lines, ["$ make", "ok", ""])
+        self.assertEqual(self.pane.captured_lines, 3)
+        self.assertEqual(self.reader.tail('%0'), "$ make\nok\n")
+    
+    def test_unchanged_pane_reads_one_line(self):
+        """Test an idle pane only re-reads its cursor line"""
+        self.pane.write("a", "b")
+        self.reader.read()
+        
+        read = self.reader.read()['%0']
+        
+        self.assertEqual(read.lines, [""])
+        self.assertEqual(self.reader.tail('%0'), "a\nb\n")
+    
+    def test_unmoved_fingerprint_skips_capture(self):
+        """Test panes not due are captured only once their fingerprint moves"""
+        self.pane.write("a", "b")
+        self.reader.read()
+        self.pane.captured_lines = 0
+        
+        self.assertEqual(self.reader.read(['%0'], due=()), {})
+        self.assertEqual(self.pane.captured_lines, 0)
+        self.assertEqual(self.reader.unchanged, 1)
+        self.assertIn('%0', self.reader.read(['%0'], due={'%0'}))
+        
+        self.pane.write("c")
+        self.assertEqual(self.reader.read(['%0'], due=())['%0'].lines, ["c", ""])
+    
+    def test_redraw_above_cursor_rereads_screen(self):
+        """Test a row rewritten in place above the cursor reaches the tail"""
+        self.pane.write("line1", "line2", "line3")
+        self.reader.read()
+        
+        self.pane.redraw(2, "STATUS-B")
+        read = self.reader.read()['%0']
+        
+        self.assertTrue(read.resync)
+        self.assertEqual(self.reader.tail('%0'), "line2\nSTATUS-B\n")
+    
+    def test_rows_below_cursor_are_read(self):
+        """Test output below the cursor, like a footer, is captured"""
+        self.pane.write("a", "b")
+        self.pane.cursor_row = 2
+        self.pane.lines += ["", "footer"]
+        self.reader.read()
+        
+        self.assertEqual(self.reader.tail('%0'), "\n\nfooter")
+    
+    def test_clear_resyncs(self):
+        """Test the cursor moving backwards triggers a resync"""
+        self.pane.write(*[f"line {i}" for i in range(10)])
+        self.reader.read()
+        
+        self.pane.lines = ["$ "]
+        read = self.reader.read()['%0']
+        
+        self.assertTrue(read.resync)
+        self.assertEqual(self.reader.tail('%0'), "$ ")
+    
+    def test_resize_and_full_history_resync(self):
+        """Test resizes and full history trigger a resync"""
+        self.pane.write("a")
+        self.reader.read()
+        self.pane.height = 10
+        self.assertTrue(self.reader.read()['%0'].resync)
+        
+        self.pane.history_limit = 1
+        self.pane.write(*[f"line {i}" for i in range(20)])
+        self.assertTrue(self.reader.read()['%0'].resync)
+    
+    def test_timed_out_read_resumes_from_cursor(self):
+        """Test a capture cut off by the deadline keeps the pane's cursor"""
+        self.pane.write("a", "b")
+        self.reader.read()
+        
+        def stuck(cmd, check=True, timeout=None):
+            if cmd[1] == 'capture-pane':
+                raise TmuxTimeoutError(cmd, timeout)
+            return self.pane.run(cmd)
+        
+        self.pane.write("c")
+        with patch.object(TmuxCommand, 'execute_command', side_effect=stuck):
+            read = self.reader.read(timeout=1.0)['%0']
+        self.assertTrue(read.timed_out)
+        self.assertIn('%0', self.reader.cursors)
+        
+        self.pane.write("d")
+        read = self.reader.read()['%0']
+        self.assertFalse(read.resync)
+        self.assertEqual(read.lines, ["c", "d", ""])
+    
+    def test_closed_panes_are_forgotten(self):
+        """Test tracking is dropped for panes that disappear"""
+        self.reader.read()
+        self.assertIn('%0', self.reader.cursors)
+        
+        with patch.object(TmuxCommand, 'execute_command', return_value=subprocess.CompletedProcess(
+                [], 0, "", "")):
+            self.assertEqual(self.reader.read(), {})
+        self.assertNotIn('%0', self.reader.cursors)
+        self.assertEqual(self.reader.tail('%0'), "")
+
+
+class TestPaneMirror(unittest.TestCase):
+    """Test deltas carry only the lines a client does not have yet"""
+    
+    def test_appended_lines_and_completed_cursor_line(self):
+        """Test new lines are appended and a completed prompt line replaced"""
+        mirror = PaneMirror(["a", "b", "$ mak"])
+        
+        delta = mirror.diff(["b", "$ make", "ok", "$ "])
+        mirror.apply(delta)
+        
+        self.assertEqual(delta.to_dict(), {"offset": 2, "lines": ["$ make", "ok", "$ "]})
+        self.assertEqual(mirror.diff(["ok", "$ ", "ok"]).to_dict(), {"offset": 5, "lines": ["ok"]})
+    
+    def test_one_line_mirror_appends(self):
+        """Test a lone cursor line that changed is rewritten, not reset"""
+        mirror = PaneMirror(["$ mak"])
+        
+        delta = mirror.diff(["$ make", "ok"])
+        mirror.apply(delta)
+        
+        self.assertEqual(delta.to_dict(), {"offset": 0, "lines": ["$ make", "ok"]})
+        self.assertEqual((list(mirror.lines), mirror.end), (["$ make", "ok"], 2))
+        self.assertTrue(PaneMirror(["a", "$ mak"]).diff(["$ make", "ok"]).reset)
+    
+    def test_no_overlap_resets(self):
+        """Test a cleared or overrun tail is sent whole and marked"""
+        mirror = PaneMirror(["a", "b"])
+        
+        delta = mirror.diff(["x", "y"])
+        mirror.apply(delta)
+        
+        self.assertEqual(delta.to_dict(), {"offset": 2, "lines": ["x", "y"], "reset": True})
+        self.assertEqual((list(mirror.lines), mirror.end), (["x", "y"], 4))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,203 @@
+"""
+Unit tests for tmux_taps.py - pipe-pane output streaming
+"""
+import asyncio
+import os
+import subprocess
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from tmux_core import TmuxCommand, SnapshotCache, TmuxIndex, WindowInfo, PaneInfo
+from tmux_taps import TmuxPaneTaps, PaneTap
+from event_collector import TmuxEventCollector
+
+
+def tmux_run(piped=(), screens=None):
+    """execute_command stand-in reporting the given panes as already piped"""
+    def run(cmd, check=True, timeout=None):
+        stdout = ""
+        command = []
+        for arg in cmd[1:] + [';']:
+            if arg != ';':
+                command.append(arg)
+                continue
+            if command[0] == 'display-message' and command[-1] == '#{pane_pipe}':
+                stdout += "1\n" if command[command.index('-t') + 1] in piped else "0\n"
+            elif command[0] == 'display-message':
+                stdout += command[-1] + "\n"
+            elif command[0] == 'capture-pane':
+                stdout += (screens or {}).get(command[command.index('-t') + 1], "")
+            command = []
+        return subprocess.CompletedProcess(cmd, 0, stdout, "")
+    return run
+
+
+class TestPaneTap(unittest.TestCase):
+    """Test raw output is split into plain lines"""
+    
+    def test_feed_strips_escapes_and_carriage_returns(self):
+        """Test escape sequences and overwritten text are dropped"""
+        tap = PaneTap('%1', '/dev/null', -1, lines=2)
+        
+        self.assertEqual(tap.feed(b"\x1b[32mok\x1b[0m\r\nspin 1\rspin 2\npart"), ["ok", "spin 2"])
+        self.assertEqual(tap.feed(b"ial\n"), ["partial"])
+        self.assertEqual(tap.text, "spin 2\npartial")
+        self.assertEqual(tap.lines_seen, 3)
+
+
+class TestTmuxPaneTaps(unittest.TestCase):
+    """Test taps are opened with one tmux call and skip piped panes"""
+    
+    def setUp(self):
+        self.cmd = TmuxCommand(backend=TmuxCommand.BACKEND_SUBPROCESS,
+                               snapshot_cache=SnapshotCache(ttl=60))
+        self.taps = TmuxPaneTaps(self.cmd)
+        self.addCleanup(self.close)
+    
+    def close(self):
+        with patch.object(TmuxCommand, 'execute_command', side_effect=tmux_run()):
+            self.taps.close()
+    
+    def test_start_skips_panes_piped_elsewhere(self):
+        """Test panes with an existing pipe are left alone and not retried"""
+        with patch.object(TmuxCommand, 'execute_command',
+                          side_effect=tmux_run(piped=('%2',))) as mock_execute:
+            self.assertEqual(self.taps.start(['%1', '%2']), ['%1'])
+            mock_execute.assert_called_once()
+            argv = mock_execute.call_args[0][0]
+            self.assertEqual(argv.count('pipe-pane'), 2)
+            self.assertIn('-o', argv)
+            
+            self.taps.sync(['%1', '%2'], existing=['%1', '%2'])
+            mock_execute.assert_called_once()
+        
+        self.assertIn('%1', self.taps)
+        self.assertEqual(self.taps.untappable, {'%2'})
+    
+    def test_dispatch_reads_fifo(self):
+        """Test output written to a tap's FIFO reaches callbacks"""
+        with patch.object(TmuxCommand, 'execute_command', side_effect=tmux_run()):
+            self.taps.start(['%1'])
+        received = []
+        self.taps.add_callback(lambda pane_id, lines: received.append((pane_id, lines)))
+        
+        fd = os.open(self.taps.taps['%1'].path, os.O_WRONLY)
+        os.write(fd, b"building\ndone\n")
+        os.close(fd)
+        self.taps.dispatch('%1')
+        
+        self.assertEqual(received, [('%1', ['building', 'done'])])
+    
+    def test_sync_stops_unwanted_and_discards_closed(self):
+        """Test panes no longer wanted are unpiped, closed panes just forgotten"""
+        with patch.object(TmuxCommand, 'execute_command', side_effect=tmux_run()):
+            self.taps.start(['%1', '%2'])
+        path = self.taps.taps['%2'].path
+        
+        with patch.object(TmuxCommand, 'execute_command', side_effect=tmux_run()) as mock_execute:
+            self.taps.sync([], existing=['%1'])
+        
+        self.assertEqual(mock_execute.call_args[0][0], ['tmux', 'pipe-pane', '-t', '%1'])
+        self.assertEqual(self.taps.taps, {})
+        self.assertFalse(os.path.exists(path))
+
+
+class TestCollectorTaps(unittest.IsolatedAsyncioTestCase):
+    """Test tapped panes emit events from their stream"""
+    
+    async def test_tap_output_emits_pane_event(self):
+        """Test new tapped output is queued as a pane event immediately"""
+        collector = TmuxEventCollector(use_hooks=False, use_taps=False)
+        collector.taps = TmuxPaneTaps(collector.tmux_cmd)
+        collector._event_queue = asyncio.Queue()
+        collector.pane_targets = {'%1': PaneInfo('work', 0, 0, True, id='%1')}
+        collector.previous_pane_content['%1'] = collector.calculate_content_hash("")
+        with patch.object(TmuxCommand, 'execute_command', side_effect=tmux_run()):
+            collector.taps.start(['%1'])
+        
+        collector.taps.taps['%1'].feed(b"Error: build failed\n")
+        collector.on_tap_output('%1', ["Error: build failed"])
+        
+        event = collector._event_queue.get_nowait()
+        self.assertEqual(event['type'], 'pane.error')
+        self.assertEqual(event['data']['new_lines'], 1)
+        with patch.object(TmuxCommand, 'execute_command', side_effect=tmux_run()):
+            collector.stop_taps()
+    
+    async def test_first_tapped_write_emits_pane_output(self):
+        """Test a newly tapped pane's hash is seeded, so its first output is reported"""
+        collector = TmuxEventCollector(use_hooks=False, use_taps=False)
+        collector.taps = TmuxPaneTaps(collector.tmux_cmd)
+        collector.taps.add_callback(collector.on_tap_output)
+        collector._event_queue = asyncio.Queue()
+        state = TmuxIndex()
+        state.add_window(WindowInfo('work', 0, 'Claude-Agent', True, 1, 'tiled',
+                                    id='@0', session_id='$0'))
+        state.add_pane(PaneInfo('work', 0, 0, True, 'node', id='%0', window_id='@0',
+                                session_id='$0'))
+        with patch.object(TmuxCommand, 'execute_command',
+                          side_effect=tmux_run(screens={'%0': "Welcome to Claude\n\n\n"})):
+            self.assertEqual(await collector.detect_pane_activity(state), [])
+        self.assertEqual(collector.taps.taps['%0'].text, "Welcome to Claude")
+        
+        fd = os.open(collector.taps.taps['%0'].path, os.O_WRONLY)
+        os.write(fd, b"hello-one\n")
+        os.close(fd)
+        collector.taps.dispatch('%0')
+        
+        event = collector._event_queue.get_nowait()
+        self.assertEqual(event['type'], 'pane.output')
+        self.assertEqual(event['data']['delta'], {"offset": 1, "lines": ["hello-one"]})
+        with patch.object(TmuxCommand, 'execute_command', side_effect=tmux_run()):
+            collector.stop_taps()
+    
+    async def test_sync_runs_off_loop_and_readers_return_to_it(self):
+        """Test taps are started in a worker thread, read by the loop afterwards"""
+        collector = TmuxEventCollector(use_hooks=False, use_taps=False)
+        collector.taps = TmuxPaneTaps(collector.tmux_cmd)
+        collector.taps.add_callback(collector.on_tap_output)
+        collector.taps.attach()
+        collector._event_queue = asyncio.Queue()
+        collector.tick_deadline = time.monotonic() + 60
+        state = TmuxIndex()
+        state.add_window(WindowInfo('work', 0, 'Claude-Agent', True, 1, 'tiled',
+                                    id='@0', session_id='$0'))
+        state.add_pane(PaneInfo('work', 0, 0, True, 'node', id='%0', window_id='@0',
+                                session_id='$0'))
+        threads = []
+        run = tmux_run(screens={'%0': "Welcome to Claude\n"})
+        def execute(cmd, check=True, timeout=None):
+            threads.append((threading.get_ident(), timeout))
+            return run(cmd, check, timeout)
+        
+        with patch.object(TmuxCommand, 'execute_command', side_effect=execute):
+            await collector.detect_pane_activity(state)
+        self.assertNotEqual(threads[0][0], threading.get_ident())
+        self.assertIsNotNone(threads[0][1])
+        
+        fd = os.open(collector.taps.taps['%0'].path, os.O_WRONLY)
+        os.write(fd, b"hello-one\n")
+        os.close(fd)
+        event = await asyncio.wait_for(collector._event_queue.get(), 2)
+        self.assertEqual(event['data']['delta'], {"offset": 1, "lines": ["hello-one"]})
+        with patch.object(TmuxCommand, 'execute_command', side_effect=tmux_run()):
+            collector.stop_taps()
+    
+    def test_select_tap_panes(self):
+        """Test only agent and dev server panes are tapped"""
+        collector = TmuxEventCollector(use_hooks=False)
+        state = TmuxIndex()
+        for index, (name, command) in enumerate([('Claude-Agent', 'node'), ('Shell', 'bash'),
+                                                 ('Dev-Server', 'npm')]):
+            state.add_window(WindowInfo('work', index, name, False, 1, 'tiled',
+                                        id=f'@{index}', session_id='$0'))
+            state.add_pane(PaneInfo('work', index, 0, True, command,
+                                    id=f'%{index}', window_id=f'@{index}', session_id='$0'))
+        
+        self.assertEqual(collector.select_tap_panes(state), ['%0', '%2'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Tmux Coalesce - Merges bursts of pane output events
+An agent streaming output changes its pane on every tick; within a short
+window those events are merged into one carrying the accumulated delta,
+so clients redraw once per window instead of once per tick
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, List, Optional
+
+from tmux_scrollback import OutputDelta
+
+if TYPE_CHECKING:
+    from event_collector import TmuxEvent
+
+
+# Activity kinds a merged event keeps over later, milder ones
+ACTIVITY_PRIORITY = {'error': 2, 'warning': 1}
+
+
+@dataclass
+class PaneBurst:
+    """A pane's open coalescing window and the event merged so far"""
+    closes_at: float
+    pending: Optional['TmuxEvent'] = None
+
+
+class EventCoalescer:
+    """
+    Rate-limits pane events to one per window per pane
+    The first pane event of a burst goes out at once and opens a window;
+    later ones merge into a pending event that is published when the
+    window closes, which opens the next one. Other events pass straight
+    through. A window of 0 disables coalescing.
+    """
+    
+    window = float(os.environ.get('TMUX_COALESCE_WINDOW', '1.0'))
+    
+    def __init__(self, window: Optional[float] = None):
+        if window is not None:
+            self.window = window
+        self.bursts: Dict[str, PaneBurst] = {}
+    
+    def add(self, event: 'TmuxEvent', now: Optional[float] = None) -> List['TmuxEvent']:
+        """Events to publish now that event arrived"""
+        pane_id = (event.data or {}).get("pane_id")
+        if self.window <= 0 or pane_id is None or not event.type.startswith('pane.'):
+            return [event]
+        now = time.monotonic() if now is None else now
+        burst = self.bursts.get(pane_id)
+        if burst is not None and burst.closes_at > now:
+            burst.pending = event if burst.pending is None else self.merge(burst.pending, event)
+            return []
+        # Leading edge: nothing sent for this pane within the window
+        if burst is not None and burst.pending is not None:
+            event = self.merge(burst.pending, event)
+        self.bursts[pane_id] = PaneBurst(now + self.window)
+        return [event]
+    
+    def flush(self, now: Optional[float] = None) -> List['TmuxEvent']:
+        """Pending events whose window has closed"""
+        now = time.monotonic() if now is None else now
+        ready = []
+        for pane_id, burst in list(self.bursts.items()):
+            if burst.closes_at > now:
+                continue
+            if burst.pending is None:
+                del self.bursts[pane_id]
+            else:
+                ready.append(burst.pending)
+                self.bursts[pane_id] = PaneBurst(now + self.window)
+        return ready
+    
+    def drain(self) -> List['TmuxEvent']:
+        """Every pending event, closing all windows"""
+        ready = [burst.pending for burst in self.bursts.values() if burst.pending is not None]
+        self.bursts.clear()
+        return ready
+    
+    def next_deadline(self) -> Optional[float]:
+        """When the earliest open window closes"""
+        return min((burst.closes_at for burst in self.bursts.values()), default=None)
+    
+    @staticmethod
+    def merge(earlier: 'TmuxEvent', later: 'TmuxEvent') -> 'TmuxEvent':
+        """later, carrying what earlier reported too"""
+        data = dict(later.data)
+        data["count"] = earlier.data.get("count", 1) + later.data.get("count", 1)
+        if "new_lines" in earlier.data or "new_lines" in later.data:
+            data["new_lines"] = earlier.data.get("new_lines", 0) + later.data.get("new_lines", 0)
+        if "delta" in earlier.data and "delta" in later.data:
+            delta = OutputDelta(**earlier.data["delta"]).then(OutputDelta(**later.data["delta"]))
+            data["delta"] = delta.to_dict()
+        activity = max(later.data.get("activity"), earlier.data.get("activity"),
+                       key=lambda kind: ACTIVITY_PRIORITY.get(kind, 0))
+        merged_type = later.type
+        if activity != later.data.get("activity"):
+            data["activity"] = activity
+            merged_type = f"pane.{activity}"
+        return type(later)(merged_type, later.timestamp, later.session, later.window,
+                           later.pane, data, later.server)
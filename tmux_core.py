@@ -2,13 +2,27 @@
 Tmux Core Module - Shared utilities and optimized batch commands
 Consolidates duplicate code and provides efficient tmux operations
 """
+import asyncio
+import bisect
 import subprocess
 import logging
-from typing import List, Dict, Any, Optional, Tuple
-from dataclasses import dataclass
+import os
+import sys
+import threading
+import time
+import uuid
+import weakref
+from array import array
+from collections import Counter, deque, namedtuple
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import List, Dict, Any, Optional, Tuple, Callable, Union
+from dataclasses import dataclass, field, fields
 import json
 
 
+logger = logging.getLogger(__name__)
+
+
 class AgentStatus:
     """Agent status constants (moved from claude_control)"""
     READY = "ready"
@@ -22,6 +36,28 @@ class TmuxCommandError(Exception):
     pass
 
 
+class TmuxTimeoutError(TmuxCommandError):
+    """A tmux call missed its deadline, e.g. on a wedged server"""
+    
+    def __init__(self, cmd: List[str], timeout: Optional[float]):
+        super().__init__(f"Command timed out after {timeout}s: {' '.join(cmd)}")
+        self.cmd = cmd
+        self.timeout = timeout
+
+
+def slotted(cls: type) -> type:
+    """
+    A dataclass rebuilt with __slots__, as dataclass(slots=True) does from
+    Python 3.10 on; records without a __dict__ are a fraction of the size
+    """
+    names = tuple(f.name for f in fields(cls))
+    namespace = {key: value for key, value in cls.__dict__.items()
+                 if key not in names + ('__dict__', '__weakref__')}
+    namespace['__slots__'] = names
+    return type(cls)(cls.__name__, cls.__bases__, namespace)
+
+
+@slotted
 @dataclass
 class SessionInfo:
     """Unified session information"""
@@ -29,8 +65,13 @@ class SessionInfo:
     windows: int
     created: str
     attached: bool = False
+    id: str = ""
+    server: str = "default"
+    # Attached clients other than this process's control clients
+    clients: int = 0
 
 
+@slotted
 @dataclass
 class WindowInfo:
     """Unified window information"""
@@ -41,6 +82,281 @@ class WindowInfo:
     panes: int
     layout: str
     current_command: str = ""
+    id: str = ""
+    session_id: str = ""
+    
+    @property
+    def target(self) -> str:
+        return f"{self.session}:{self.index}"
+
+
+@slotted
+@dataclass
+class PaneInfo:
+    """Unified pane information"""
+    session: str
+    window: int
+    index: int
+    active: bool
+    current_command: str = ""
+    id: str = ""
+    window_id: str = ""
+    session_id: str = ""
+    
+    @property
+    def target(self) -> str:
+        return f"{self.session}:{self.window}.{self.index}"
+
+
+@slotted
+@dataclass
+class CaptureResult:
+    """Outcome of capturing a single pane target"""
+    target: str
+    output: str = ""
+    returncode: int = 0
+    # Seconds; for a chained capture, an even share of its chain's time
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# (session, window), (session, window, pane) or a preformatted target string
+CaptureTarget = Union[Tuple[str, int], Tuple[str, int, int], str]
+
+
+def _str_column(values: Tuple[str, ...]) -> List[str]:
+    # Interned so every tick's records share one copy of each name
+    return list(map(sys.intern, values))
+
+
+def _int_column(values: Tuple[str, ...]) -> List[int]:
+    try:
+        return list(map(int, values))
+    except ValueError:
+        # Variables tmux cannot expand for an object print as empty strings
+        return [int(value) if value.isdigit() else 0 for value in values]
+
+
+def _bool_column(values: Tuple[str, ...]) -> List[bool]:
+    return list(map('1'.__eq__, values))
+
+
+class TmuxFormat:
+    """
+    Declarative -F format for tmux list-* and display-message output
+    Built from (variable, type) fields with type str, int or bool. The
+    fields are joined with the ASCII unit separator, so '|' or ':' in
+    session and window names can no longer shift fields. tmux prints a
+    separator inside a name as the escape \\037; in case an older or odd
+    server prints it raw, the one field named as free_text absorbs extra
+    separators, and other rows with the wrong field count are logged and
+    skipped. Each line is split once and values are converted a column at
+    a time into namedtuple records.
+    """
+    
+    SEPARATOR = '\x1f'
+    COLUMN_TYPES = {str: _str_column, int: _int_column, bool: _bool_column}
+    
+    def __init__(self, record_name: str, fields: List[Tuple[str, type]],
+                 free_text: Optional[str] = None):
+        self.fields = tuple(fields)
+        self.names = tuple(variable for variable, _ in fields)
+        self.record = namedtuple(record_name, self.names)
+        self.format = self.SEPARATOR.join(f"#{{{variable}}}" for variable in self.names)
+        self._converters = [self.COLUMN_TYPES[kind] for _, kind in fields]
+        self._free_text = self.names.index(free_text) if free_text is not None else None
+    
+    def __str__(self) -> str:
+        return self.format
+    
+    def split(self, output: str) -> List[List[str]]:
+        """Raw fields of every line"""
+        width = len(self.names)
+        separator = self.SEPARATOR
+        rows = [line.split(separator) for line in output.split('\n') if line]
+        if all(len(parts) == width for parts in rows):
+            return rows
+        return [parts for parts in map(self._fit, rows) if parts is not None]
+    
+    def _fit(self, parts: List[str]) -> Optional[List[str]]:
+        """Fields of a row, rejoining raw separators inside the free-text field"""
+        extra = len(parts) - len(self.names)
+        if extra == 0:
+            return parts
+        if extra > 0 and self._free_text is not None:
+            start = self._free_text
+            return parts[:start] + [self.SEPARATOR.join(parts[start:start + extra + 1])] \
+                + parts[start + extra + 1:]
+        logger.warning(f"Skipping tmux output row with {len(parts)} fields instead of "
+                       f"{len(self.names)}: {self.SEPARATOR.join(parts)!r}")
+        return None
+    
+    def parse_columns(self, output: str) -> Dict[str, list]:
+        """Typed values of every line, one list per field"""
+        rows = self.split(output)
+        if not rows:
+            return {name: [] for name in self.names}
+        return {name: convert(values)
+                for name, convert, values in zip(self.names, self._converters, zip(*rows))}
+    
+    def parse(self, output: str) -> list:
+        """One typed record per line"""
+        return list(map(self.record._make, zip(*self.parse_columns(output).values())))
+    
+    def parse_line(self, line: str) -> Optional[tuple]:
+        records = self.parse(line)
+        return records[0] if len(records) == 1 else None
+
+
+class TmuxIndex:
+    """
+    Sessions, windows and panes keyed by tmux's immutable ids
+    ($session_id, @window_id, %pane_id) with a bidirectional map to the
+    human-readable `session`, `session:window` and `session:window.pane`
+    targets, which change when windows are moved or renumbered
+    
+    A window linked into several sessions has one record per session in
+    `links`; `windows`, `panes` and target_for keep the first one, and
+    every session's targets resolve to the same ids.
+    """
+    
+    __slots__ = ('sessions', 'windows', 'links', 'panes', '_targets', '_ids')
+    
+    def __init__(self):
+        self.sessions: Dict[str, SessionInfo] = {}
+        self.windows: Dict[str, WindowInfo] = {}
+        self.links: Dict[str, List[WindowInfo]] = {}
+        self.panes: Dict[str, PaneInfo] = {}
+        self._targets: Dict[str, str] = {}
+        self._ids: Dict[str, str] = {}
+    
+    def __len__(self) -> int:
+        return len(self.panes)
+    
+    def add_session(self, session: SessionInfo) -> None:
+        self.sessions[session.id] = session
+        self._link(session.id, session.name)
+    
+    def add_window(self, window: WindowInfo) -> None:
+        """Add a window, or its record in another session it is linked into"""
+        self.windows.setdefault(window.id, window)
+        self.links.setdefault(window.id, []).append(window)
+        self._link(window.id, window.target)
+    
+    def add_pane(self, pane: PaneInfo) -> None:
+        self.panes.setdefault(pane.id, pane)
+        self._link(pane.id, pane.target)
+    
+    def _link(self, object_id: str, target: str) -> None:
+        self._targets.setdefault(object_id, target)
+        self._ids[target] = object_id
+    
+    def target_for(self, object_id: str) -> Optional[str]:
+        """Human-readable target for an id, or None if unknown"""
+        return self._targets.get(object_id)
+    
+    def id_for(self, target: str) -> Optional[str]:
+        """Id for a `session`, `session:window` or `session:window.pane` target"""
+        return self._ids.get(target)
+    
+    def resolve(self, target: str) -> Optional[str]:
+        """Id for either an id or a human-readable target"""
+        if target in self._targets:
+            return target
+        return self._ids.get(target)
+    
+    def panes_in_window(self, window_id: str) -> List[PaneInfo]:
+        return [pane for pane in self.panes.values() if pane.window_id == window_id]
+    
+    def windows_in_session(self, session_id: str) -> List[WindowInfo]:
+        return [window for links in self.links.values() for window in links
+                if window.session_id == session_id]
+    
+    def window_sessions(self, window_id: str) -> List[str]:
+        """Ids of the sessions a window is linked into"""
+        return [window.session_id for window in self.links.get(window_id, [])]
+
+
+class ColumnarSnapshot:
+    """
+    Array-backed pane table for large fleets
+    One row per pane: indices and flags live in compact arrays and names
+    are interned, so a 1,000-pane snapshot costs a few list slots per pane
+    instead of one record object each. Records are built on demand.
+    """
+    
+    PANE_ACTIVE = 1
+    WINDOW_ACTIVE = 2
+    SESSION_ATTACHED = 4
+    
+    __slots__ = ('pane_ids', 'window_ids', 'session_ids', 'session_names',
+                 'window_names', 'commands', 'window_index', 'pane_index',
+                 'flags', '_rows')
+    
+    def __init__(self):
+        self.pane_ids: List[str] = []
+        self.window_ids: List[str] = []
+        self.session_ids: List[str] = []
+        self.session_names: List[str] = []
+        self.window_names: List[str] = []
+        self.commands: List[str] = []
+        self.window_index = array('i')
+        self.pane_index = array('i')
+        self.flags = array('B')
+        self._rows: Dict[str, int] = {}
+    
+    def __len__(self) -> int:
+        return len(self.pane_ids)
+    
+    @classmethod
+    def from_output(cls, output: str) -> 'ColumnarSnapshot':
+        """Build from list-panes -a output in TmuxCommand.SNAPSHOT_FORMAT"""
+        table = cls()
+        columns = TmuxCommand.SNAPSHOT.parse_columns(output)
+        table.pane_ids = columns['pane_id']
+        table.window_ids = columns['window_id']
+        table.session_ids = columns['session_id']
+        table.session_names = columns['session_name']
+        table.window_names = columns['window_name']
+        table.commands = columns['pane_current_command']
+        table.window_index = array('i', columns['window_index'])
+        table.pane_index = array('i', columns['pane_index'])
+        table.flags = array('B', [
+            (cls.PANE_ACTIVE if pane_active else 0)
+            | (cls.WINDOW_ACTIVE if window_active else 0)
+            | (cls.SESSION_ATTACHED if attached else 0)
+            for pane_active, window_active, attached in zip(
+                columns['pane_active'], columns['window_active'], columns['session_attached'])
+        ])
+        table._rows = {pane_id: row for row, pane_id in enumerate(table.pane_ids)}
+        return table
+    
+    def row(self, pane_id: str) -> Optional[int]:
+        return self._rows.get(pane_id)
+    
+    def target(self, row: int) -> str:
+        return f"{self.session_names[row]}:{self.window_index[row]}.{self.pane_index[row]}"
+    
+    def pane(self, row: int) -> PaneInfo:
+        """Pane record for a row"""
+        return PaneInfo(
+            session=self.session_names[row],
+            window=self.window_index[row],
+            index=self.pane_index[row],
+            active=bool(self.flags[row] & self.PANE_ACTIVE),
+            current_command=self.commands[row],
+            id=self.pane_ids[row],
+            window_id=self.window_ids[row],
+            session_id=self.session_ids[row]
+        )
+    
+    def rows_where(self, flag: int) -> List[int]:
+        """Rows with a flag set, e.g. the active pane of every window"""
+        return [row for row, flags in enumerate(self.flags) if flags & flag]
 
 
 class TmuxPatterns:
@@ -81,122 +397,830 @@ class TmuxPatterns:
                   for indicator in cls.CLAUDE_INDICATORS)
 
 
+class TmuxControlClient:
+    """
+    Persistent tmux control-mode (`tmux -C`) connection
+    Commands are written to one long-lived client's stdin and the
+    %begin/%end blocks are matched back to callers in FIFO order,
+    avoiding a fork/exec and client handshake per tmux call
+    
+    The client attaches read-only and ignore-size to an existing session,
+    the first one listed unless attach_session names one, so it neither
+    creates a session nor resizes windows. Without attach_session it asks
+    for no %output; with it, notifications include the %output of that
+    session's windows. With no session to attach to, start() fails and
+    callers fall back to subprocesses.
+    
+    Untargeted commands resolve against the attached session, both on the
+    client and from other tmux clients, so callers pass -t.
+    """
+    
+    RETRY_INTERVAL = 5.0
+    
+    # One connection per tmux socket, None being the default socket
+    _pool: Dict[Optional[str], 'TmuxControlClient'] = {}
+    _pool_lock = threading.Lock()
+    # Every started client, for discounting them from attached counts
+    _started: 'weakref.WeakSet[TmuxControlClient]' = weakref.WeakSet()
+    
+    def __init__(self, tmux_binary: str = "tmux", socket_name: Optional[str] = None,
+                 attach_session: Optional[str] = None):
+        self.tmux_binary = tmux_binary
+        self.socket_name = socket_name
+        self.attach_session = attach_session
+        self.tmux_argv = [tmux_binary] + (['-L', socket_name] if socket_name else [])
+        # Id of the session the client is attached to, once started
+        self.session_id: Optional[str] = None
+        self.process: Optional[subprocess.Popen] = None
+        self.logger = logging.getLogger(__name__)
+        self._pending: deque = deque()
+        self._write_lock = threading.Lock()
+        # Loop and executor threads share one client; only one may spawn it
+        self._start_lock = threading.Lock()
+        self._listeners: List[Callable[[str], None]] = []
+        self._block: Optional[List[str]] = None
+        self._block_id: Optional[str] = None
+        self._retry_at = 0.0
+    
+    @classmethod
+    def shared(cls, socket_name: Optional[str] = None) -> 'TmuxControlClient':
+        """Process-wide control client for a socket, shared by all TmuxCommand instances"""
+        with cls._pool_lock:
+            client = cls._pool.get(socket_name)
+            if client is None:
+                client = cls._pool[socket_name] = cls(socket_name=socket_name)
+            return client
+    
+    @classmethod
+    def attached_clients(cls, socket_name: Optional[str] = None) -> Counter:
+        """This process's live clients per session id on a socket"""
+        return Counter(client.session_id for client in list(cls._started)
+                       if client.socket_name == socket_name and client.is_alive()
+                       and client.session_id is not None)
+    
+    @staticmethod
+    def quote_argument(arg: str) -> str:
+        """Quote an argument for the tmux command parser"""
+        return "'" + str(arg).replace("'", "'\\''") + "'"
+    
+    def is_alive(self) -> bool:
+        """Check if the control-mode client is running"""
+        return self.process is not None and self.process.poll() is None
+    
+    def start(self, timeout: Optional[float] = None) -> bool:
+        """
+        Start the control-mode client if a tmux server is running
+        Returns False (and retries later) when control mode is unavailable;
+        raises TmuxTimeoutError if the server does not answer within timeout
+        """
+        with self._start_lock:
+            if self.is_alive():
+                return True
+            if time.monotonic() < self._retry_at:
+                return False
+            self._retry_at = time.monotonic() + self.RETRY_INTERVAL
+            
+            probe_argv = self.tmux_argv + ['list-sessions', '-F', '#{session_id}']
+            try:
+                # Don't start a tmux server just to monitor it
+                probe = subprocess.run(probe_argv, capture_output=True, text=True, timeout=timeout)
+                sessions = probe.stdout.split() if probe.returncode == 0 else []
+                if self.attach_session is not None:
+                    target = self.attach_session if sessions else None
+                else:
+                    target = sessions[0] if sessions else None
+                if target is None:
+                    return False
+                
+                # ignore-size: the client must not shrink the user's windows
+                flags = 'read-only,ignore-size' + ('' if self.attach_session else ',no-output')
+                self.process = subprocess.Popen(
+                    self.tmux_argv + ['-C', 'attach-session', '-f', flags, '-t', target],
+                    stdin=subprocess.PIPE,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.DEVNULL,
+                    text=True,
+                    errors='replace',
+                    bufsize=1
+                )
+            except subprocess.TimeoutExpired:
+                raise TmuxTimeoutError(probe_argv, timeout)
+            except OSError as e:
+                self.logger.debug(f"Control mode unavailable: {e}")
+                self.process = None
+                return False
+            
+            # The attach itself produces the first %begin/%end block
+            self._block = self._block_id = self.session_id = None
+            startup = Future()
+            self._pending.append(startup)
+            threading.Thread(target=self._read_loop, args=(self.process,),
+                             name="tmux-control-reader", daemon=True).start()
+            
+            try:
+                startup.result(timeout=self.RETRY_INTERVAL)
+            except Exception as e:
+                self.logger.debug(f"Control mode handshake failed: {e}")
+                self.close()
+                return False
+            
+            if self.session_id is None:
+                self.session_id = target
+            self._started.add(self)
+            self.logger.debug(f"Control mode client attached to {self.session_id}")
+            return True
+    
+    def submit(self, args: List[str]) -> Future:
+        """
+        Send one tmux command (without the leading 'tmux') to the client
+        Returns a Future resolving to a subprocess.CompletedProcess
+        """
+        if any('\n' in str(arg) for arg in args):
+            raise ValueError("Control mode commands cannot contain newlines")
+        
+        line = ' '.join(self.quote_argument(arg) for arg in args) + '\n'
+        future = Future()
+        future.args = ['tmux'] + list(args)
+        with self._write_lock:
+            if not self.is_alive():
+                raise TmuxCommandError("Control mode client is not running")
+            # Queue before writing so the reader can never see the reply first
+            self._pending.append(future)
+            try:
+                self.process.stdin.write(line)
+                self.process.stdin.flush()
+            except (OSError, ValueError) as e:
+                self._pending.remove(future)
+                raise TmuxCommandError(f"Control mode write failed: {e}")
+        return future
+    
+    def execute(self, args: List[str], timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """Run one tmux command through the control client and wait for its result"""
+        return self.submit(args).result(timeout=timeout)
+    
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """Register a callback for notification lines (%window-add, %exit, ...)"""
+        self._listeners.append(callback)
+    
+    def remove_listener(self, callback: Callable[[str], None]) -> None:
+        """Unregister a notification callback"""
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+    
+    def close(self) -> None:
+        """Shut down the control client"""
+        process, self.process = self.process, None
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+            process.wait(timeout=1)
+        except Exception:
+            process.kill()
+        self._fail_pending(TmuxCommandError("Control mode client closed"))
+    
+    def _read_loop(self, process: subprocess.Popen) -> None:
+        """Reader thread: route output blocks to futures, the rest to listeners"""
+        try:
+            for line in process.stdout:
+                self._dispatch_line(line.rstrip('\n'))
+        except (OSError, ValueError):
+            pass
+        # A replacement client may already own the pending queue
+        if self.process in (process, None):
+            self._fail_pending(TmuxCommandError("Control mode client exited"))
+    
+    def _dispatch_line(self, line: str) -> None:
+        """Handle a single line of control-mode output"""
+        if self._block is not None:
+            # %end/%error must repeat the exact %begin arguments
+            for marker, returncode in (('%end ', 0), ('%error ', 1)):
+                if line.startswith(marker) and line[len(marker):] == self._block_id:
+                    self._finish_block(returncode)
+                    return
+            self._block.append(line)
+        elif line.startswith('%begin '):
+            self._block = []
+            self._block_id = line[len('%begin '):]
+        elif line.startswith('%'):
+            if line.startswith('%session-changed '):
+                # tmux moves the client when its session is destroyed
+                self.session_id = line.split(' ')[1]
+            for callback in list(self._listeners):
+                try:
+                    callback(line)
+                except Exception as e:
+                    self.logger.error(f"Control mode listener failed: {e}")
+    
+    def _finish_block(self, returncode: int) -> None:
+        """Resolve the oldest pending command with the completed block"""
+        lines, self._block, self._block_id = self._block, None, None
+        if not self._pending:
+            return
+        future = self._pending.popleft()
+        if future.done():
+            # Cancelled by a caller that stopped waiting at its deadline
+            return
+        output = ''.join(f"{line}\n" for line in lines)
+        future.set_result(subprocess.CompletedProcess(
+            args=getattr(future, 'args', []),
+            returncode=returncode,
+            stdout=output if returncode == 0 else "",
+            stderr=output if returncode != 0 else ""
+        ))
+    
+    def _fail_pending(self, error: Exception) -> None:
+        """Fail every command still waiting for a reply"""
+        while self._pending:
+            future = self._pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+
+class SnapshotCache:
+    """
+    TTL cache for tmux snapshots, stamped with a generation counter
+    invalidate() bumps the generation so a fetch that raced with a
+    mutating command can never be stored as fresh
+    """
+    
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = ttl if ttl is not None else float(os.environ.get('TMUX_SNAPSHOT_TTL', '1.0'))
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entry: Optional[Tuple[int, float, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+    
+    def get(self) -> Optional[Dict[str, Any]]:
+        """Return the cached snapshot if it is current and within the TTL"""
+        with self._lock:
+            if self._entry is not None:
+                generation, stored_at, snapshot = self._entry
+                if generation == self.generation and time.monotonic() - stored_at < self.ttl:
+                    self.hits += 1
+                    return snapshot
+            self.misses += 1
+            return None
+    
+    def store(self, generation: int, snapshot: Dict[str, Any]) -> None:
+        """Cache a snapshot fetched while `generation` was current"""
+        with self._lock:
+            if generation == self.generation:
+                self._entry = (generation, time.monotonic(), snapshot)
+    
+    def invalidate(self) -> None:
+        """Drop the cached snapshot after a mutating tmux operation"""
+        with self._lock:
+            self.generation += 1
+            self.invalidations += 1
+            self._entry = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'invalidations': self.invalidations,
+                'generation': self.generation,
+                'ttl': self.ttl
+            }
+
+
+@slotted
+@dataclass
+class CommandStats:
+    """Calls, latency and output size recorded for one tmux subcommand"""
+    calls: int = 0
+    # Commands carried by those calls; more than calls for `;` chains
+    commands: int = 0
+    failures: int = 0
+    timeouts: int = 0
+    output_bytes: int = 0
+    total_time: float = 0.0
+    max_time: float = 0.0
+    histogram: List[int] = field(default_factory=list)
+
+
+class TmuxMetrics:
+    """
+    Per-subcommand call counts, latency histograms, output size and failures
+    Recorded by execute_command, execute_command_async and control-mode
+    batches. A `;` chain is one call, counted under its first subcommand.
+    Off unless TMUX_METRICS=1 or enable() is called; while off, each call
+    only pays for one attribute check.
+    """
+    
+    # Upper bounds of the latency histogram buckets in milliseconds; the
+    # last bucket counts everything slower
+    BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000)
+    
+    def __init__(self, enabled: Optional[bool] = None):
+        if enabled is None:
+            enabled = os.environ.get('TMUX_METRICS', '0') == '1'
+        self.enabled = enabled
+        self.commands: Dict[str, CommandStats] = {}
+        # tmux processes spawned, as opposed to commands sent to a control client
+        self.processes = 0
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def enable(self) -> None:
+        self.enabled = True
+    
+    def disable(self) -> None:
+        self.enabled = False
+    
+    def reset(self) -> None:
+        with self._lock:
+            self.commands = {}
+            self.processes = 0
+            self.started = time.monotonic()
+    
+    @staticmethod
+    def subcommands(cmd: List[str]) -> List[str]:
+        """Subcommands of an argv, leaving out TmuxBatch's marker commands"""
+        names = []
+        for i, arg in enumerate(cmd):
+            if (i == 1 or (i > 1 and cmd[i - 1] == TmuxBatch.SEPARATOR)) and not (
+                    arg == 'display-message' and cmd[i + 2:i + 3] and
+                    cmd[i + 2].startswith(TmuxBatch.MARKER_PREFIX)):
+                names.append(arg)
+        return names
+    
+    def record_process(self) -> None:
+        with self._lock:
+            self.processes += 1
+    
+    def record(self, cmd: List[str], elapsed: float,
+               result: Optional[subprocess.CompletedProcess] = None,
+               timed_out: bool = False) -> None:
+        """Add one call; a missing result means the call raised"""
+        names = self.subcommands(cmd) or ['']
+        bucket = bisect.bisect_left(self.BUCKETS_MS, elapsed * 1000)
+        with self._lock:
+            stats = self.commands.get(names[0])
+            if stats is None:
+                stats = self.commands[names[0]] = CommandStats(
+                    histogram=[0] * (len(self.BUCKETS_MS) + 1)
+                )
+            stats.calls += 1
+            stats.commands += len(names)
+            stats.total_time += elapsed
+            stats.max_time = max(stats.max_time, elapsed)
+            stats.histogram[bucket] += 1
+            if result is None or result.returncode != 0:
+                stats.failures += 1
+            if timed_out:
+                stats.timeouts += 1
+            if result is not None and result.stdout:
+                stats.output_bytes += len(result.stdout)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready view, slowest subcommands first"""
+        labels = [f"<={bound}ms" for bound in self.BUCKETS_MS] + [f">{self.BUCKETS_MS[-1]}ms"]
+        with self._lock:
+            commands = sorted(self.commands.items(), key=lambda item: -item[1].total_time)
+            return {
+                'enabled': self.enabled,
+                'uptime': round(time.monotonic() - self.started, 3),
+                'processes': self.processes,
+                'calls': sum(stats.calls for _, stats in commands),
+                'failures': sum(stats.failures for _, stats in commands),
+                'timeouts': sum(stats.timeouts for _, stats in commands),
+                'commands': {
+                    name: {
+                        'calls': stats.calls,
+                        'commands': stats.commands,
+                        'failures': stats.failures,
+                        'timeouts': stats.timeouts,
+                        'output_bytes': stats.output_bytes,
+                        'total_ms': round(stats.total_time * 1000, 3),
+                        'mean_ms': round(stats.total_time * 1000 / stats.calls, 3),
+                        'max_ms': round(stats.max_time * 1000, 3),
+                        'histogram': dict(zip(labels, stats.histogram))
+                    }
+                    for name, stats in commands
+                }
+            }
+
+
 class TmuxCommand:
     """Base class for optimized tmux command execution"""
     
-    def __init__(self):
+    BACKEND_SUBPROCESS = "subprocess"
+    BACKEND_CONTROL = "control"
+    # In-memory fake_tmux server, for benchmarks and tests
+    BACKEND_FAKE = "fake"
+    
+    # Maximum tmux captures in flight for batch operations
+    capture_concurrency = int(os.environ.get('TMUX_CAPTURE_CONCURRENCY', '16'))
+    # Maximum commands chained into a single tmux invocation
+    chain_size = 50
+    # Deadline in seconds for one tmux call unless the caller passes its
+    # own; 0 waits forever
+    command_timeout = float(os.environ.get('TMUX_COMMAND_TIMEOUT', '5.0')) or None
+    
+    # One list-panes -a line per pane carries its session and window too
+    # Programs can set their window's name from inside the pane, so that is
+    # the field allowed to contain a separator not escaped by the server
+    SNAPSHOT = TmuxFormat('SnapshotRow', [
+        ('session_id', str), ('window_id', str), ('pane_id', str),
+        ('session_name', str), ('session_windows', int), ('session_created', str),
+        ('session_attached', int), ('window_index', int), ('window_name', str),
+        ('window_active', bool), ('window_panes', int), ('window_layout', str),
+        ('pane_index', int), ('pane_active', bool), ('pane_current_command', str)
+    ], free_text='window_name')
+    SNAPSHOT_FORMAT = SNAPSHOT.format
+    
+    DEFAULT_SERVER = "default"
+    
+    # Shared by every command object in the process
+    metrics = TmuxMetrics()
+    
+    def __init__(self, backend: Optional[str] = None,
+                 snapshot_cache: Optional[SnapshotCache] = None,
+                 socket_name: Optional[str] = None):
         self.logger = logging.getLogger(__name__)
+        # tmux -L socket this instance talks to; None is the default server
+        self.socket_name = socket_name
+        # TMUX_BACKEND=control switches every subclass to the shared
+        # control-mode connection, TMUX_BACKEND=fake to an in-memory
+        # fake_tmux server, without code changes
+        self.backend = backend or os.environ.get('TMUX_BACKEND', self.BACKEND_SUBPROCESS)
+        # Pass one cache to several instances to share snapshots between them
+        self.snapshot_cache = snapshot_cache or SnapshotCache()
     
-    @staticmethod
-    def execute_command(cmd: List[str], check: bool = True) -> subprocess.CompletedProcess:
+    def _get_control_client(self, cmd: List[str],
+                            timeout: Optional[float] = None) -> Optional[TmuxControlClient]:
+        """
+        Return a running control client if this command can use it
+        Starting one waits at most timeout, command_timeout by default
+        """
+        if getattr(self, 'backend', self.BACKEND_SUBPROCESS) != self.BACKEND_CONTROL:
+            return None
+        # Only plain `tmux <command> ...` invocations without global flags
+        if len(cmd) < 2 or cmd[0] != 'tmux' or cmd[1].startswith('-'):
+            return None
+        if any('\n' in str(arg) for arg in cmd):
+            return None
+        # Chained invocations (TmuxBatch) rely on argv `;` separators
+        if TmuxBatch.SEPARATOR in cmd:
+            return None
+        client = TmuxControlClient.shared(getattr(self, 'socket_name', None))
+        return client if client.start(self.command_timeout if timeout is None else timeout) else None
+    
+    @property
+    def server(self) -> str:
+        """Name of the tmux server this instance talks to"""
+        return getattr(self, 'socket_name', None) or self.DEFAULT_SERVER
+    
+    def server_argv(self, cmd: List[str]) -> List[str]:
+        """Point a `tmux ...` argv at this instance's socket"""
+        socket_name = getattr(self, 'socket_name', None)
+        if not socket_name or not cmd or cmd[0] != 'tmux' or cmd[1:2] == ['-L']:
+            return cmd
+        return ['tmux', '-L', socket_name] + cmd[1:]
+    
+    def _get_fake_server(self):
+        """In-process fake server for this socket when the fake backend is enabled"""
+        if getattr(self, 'backend', self.BACKEND_SUBPROCESS) != self.BACKEND_FAKE:
+            return None
+        # Imported lazily: only benchmarks and tests run against the fake
+        from fake_tmux import FakeTmuxServer
+        return FakeTmuxServer.shared(getattr(self, 'socket_name', None))
+    
+    def execute_command(self, cmd: List[str], check: bool = True,
+                        timeout: Optional[float] = None) -> subprocess.CompletedProcess:
         """
         Single implementation for all subprocess calls
         Replaces duplicate implementations in claude_control and tmux_utils
+        Routes through the control-mode client when that backend is enabled,
+        falling back to a subprocess when it is unavailable
+        Raises TmuxTimeoutError after timeout seconds, command_timeout by default
         """
+        if timeout is None:
+            timeout = self.command_timeout
+        metrics = self.metrics
+        if not metrics.enabled:
+            return self._execute_command(cmd, check, timeout)
+        started = time.perf_counter()
+        result = None
+        timed_out = False
+        try:
+            result = self._execute_command(cmd, check, timeout)
+            return result
+        except TmuxTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            metrics.record(cmd, time.perf_counter() - started, result, timed_out)
+    
+    def _execute_command(self, cmd: List[str], check: bool,
+                         timeout: Optional[float]) -> subprocess.CompletedProcess:
         try:
+            fake = self._get_fake_server()
+            if fake is not None:
+                # Stands in for the tmux client a subprocess would start
+                if self.metrics.enabled:
+                    self.metrics.record_process()
+                delay = fake.latency_for(cmd[1:])
+                if timeout is not None and delay > timeout:
+                    time.sleep(timeout)
+                    raise TmuxTimeoutError(cmd, timeout)
+                if delay:
+                    time.sleep(delay)
+                result = fake.run(cmd[1:])
+                if check and result.returncode != 0:
+                    raise subprocess.CalledProcessError(
+                        result.returncode, cmd, result.stdout, result.stderr
+                    )
+                return result
+            
+            client = self._get_control_client(cmd, timeout)
+            if client is not None:
+                try:
+                    result = client.execute(cmd[1:], timeout=timeout)
+                except TimeoutError:
+                    # The server is stuck; a subprocess would hang on it too
+                    raise TmuxTimeoutError(cmd, timeout)
+                except TmuxCommandError as e:
+                    self.logger.debug(f"Control mode failed, using subprocess: {e}")
+                else:
+                    if check and result.returncode != 0:
+                        raise subprocess.CalledProcessError(
+                            result.returncode, cmd, result.stdout, result.stderr
+                        )
+                    return result
+            
+            if self.metrics.enabled:
+                self.metrics.record_process()
             result = subprocess.run(
-                cmd, 
+                self.server_argv(cmd), 
                 capture_output=True, 
                 text=True, 
-                check=check
+                check=check,
+                timeout=timeout
             )
             return result
+        except subprocess.TimeoutExpired:
+            raise TmuxTimeoutError(cmd, timeout)
         except subprocess.CalledProcessError as e:
             logging.error(f"Command failed: {' '.join(cmd)}")
             logging.error(f"stderr: {e.stderr}")
             raise TmuxCommandError(f"Command failed: {e}")
     
-    def batch_get_all_sessions_and_windows(self) -> Dict[str, Any]:
+    def get_snapshot(self, refresh: bool = False,
+                     columnar: bool = False) -> Union[Dict[str, Any], ColumnarSnapshot]:
         """
-        Get all session and window data in a single optimized call
-        Replaces multiple get_sessions() + get_windows() calls
+        Get the full session -> window -> pane tree from one list-panes -a call
+        Canonical state source for ClaudeMonitor, TmuxManager and the collector
+        Served from the snapshot cache unless refresh is set. With columnar
+        set, an uncached ColumnarSnapshot is returned instead, for large
+        fleets that only need a few columns
         """
-        # Format string for comprehensive data
-        session_format = '#{session_name}|#{session_windows}|#{session_created}|#{session_attached}'
-        window_format = '#{session_name}:#{window_index}|#{window_name}|#{window_active}|#{window_panes}|#{window_layout}|#{pane_current_command}'
+        if columnar:
+            try:
+                result = self.execute_command(['tmux', 'list-panes', '-a', '-F', self.SNAPSHOT_FORMAT])
+            except TmuxCommandError:
+                return ColumnarSnapshot()
+            return ColumnarSnapshot.from_output(result.stdout)
+        if not refresh:
+            cached = self.snapshot_cache.get()
+            if cached is not None:
+                return cached
         
+        generation = self.snapshot_cache.generation
         try:
-            # Get all sessions data
-            sessions_cmd = ['tmux', 'list-sessions', '-F', session_format]
-            sessions_result = self.execute_command(sessions_cmd)
-            
-            # Get all windows data across all sessions
-            windows_cmd = ['tmux', 'list-windows', '-a', '-F', window_format]
-            windows_result = self.execute_command(windows_cmd)
-            
-            # Parse and combine results
-            return self._parse_batch_results(
-                sessions_result.stdout,
-                windows_result.stdout
-            )
-            
+            result = self.execute_command(['tmux', 'list-panes', '-a', '-F', self.SNAPSHOT_FORMAT])
+            snapshot = self._parse_snapshot(result.stdout)
         except TmuxCommandError:
             # No sessions exist
-            return {'sessions': {}, 'windows': {}}
+            snapshot = self._empty_snapshot()
+        
+        self.snapshot_cache.store(generation, snapshot)
+        return snapshot
+    
+    def invalidate_snapshot(self) -> None:
+        """Invalidate cached state after changing sessions, windows or panes"""
+        self.snapshot_cache.invalidate()
+    
+    def batch_get_all_sessions_and_windows(self) -> Dict[str, Any]:
+        """
+        Get all session and window data in a single optimized call
+        Replaces multiple get_sessions() + get_windows() calls
+        """
+        return self.get_snapshot()
+    
+    def batch(self) -> 'TmuxBatch':
+        """Start a batch of commands that runs in a single tmux invocation"""
+        return TmuxBatch(self)
+    
+    @staticmethod
+    def format_target(target: CaptureTarget) -> str:
+        """Format a capture target tuple as a tmux target string"""
+        if isinstance(target, str):
+            return target
+        if len(target) == 3:
+            return f"{target[0]}:{target[1]}.{target[2]}"
+        return f"{target[0]}:{target[1]}"
+    
+    @staticmethod
+    def _capture_command(target: str, lines: int) -> List[str]:
+        return ['tmux', 'capture-pane', '-t', target, '-p', '-S', f'-{lines}']
     
-    def batch_capture_panes(self, targets: List[Tuple[str, int]], 
-                           lines: int = 50) -> Dict[str, str]:
+    def batch_capture_panes(self, targets: List[CaptureTarget], 
+                           lines: int = 50,
+                           max_concurrency: Optional[int] = None) -> Dict[str, str]:
         """
-        Capture multiple panes in one operation using xargs for parallelism
+        Capture multiple panes concurrently in one operation
         Replaces multiple capture_pane calls in loops
         """
+        results = self.batch_capture_panes_detailed(targets, lines, max_concurrency)
+        return {target: result.output for target, result in results.items()}
+    
+    def batch_capture_panes_detailed(self, targets: List[CaptureTarget],
+                                     lines: int = 50,
+                                     max_concurrency: Optional[int] = None) -> Dict[str, CaptureResult]:
+        """
+        Capture multiple panes concurrently with per-target timing and errors
+        Pipelines every capture over the control-mode client when available,
+        otherwise chains captures into tmux invocations of chain_size commands
+        and runs up to max_concurrency of them at once
+        """
+        limit = max(1, max_concurrency or self.capture_concurrency)
+        target_names = [self.format_target(target) for target in targets]
+        if not target_names:
+            return {}
+        
+        started = time.perf_counter()
+        try:
+            client = self._get_control_client(['tmux', 'capture-pane'])
+        except TmuxTimeoutError as e:
+            return {target: self._capture_failure(target, e, started) for target in target_names}
+        if client is not None:
+            try:
+                return self._pipeline_captures(client, target_names, lines, limit)
+            except TmuxCommandError as e:
+                self.logger.debug(f"Control mode failed, using subprocess: {e}")
+        
+        chunks = [target_names[i:i + self.chain_size]
+                  for i in range(0, len(target_names), self.chain_size)]
+        if len(chunks) == 1 or limit == 1:
+            captured = [self._capture_chain(chunk, lines) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=min(limit, len(chunks))) as pool:
+                captured = list(pool.map(lambda chunk: self._capture_chain(chunk, lines), chunks))
+        
+        return {result.target: result for chunk in captured for result in chunk}
+    
+    def _capture_chain(self, targets: List[str], lines: int) -> List[CaptureResult]:
+        """Capture several targets in one chained tmux invocation"""
+        batch = self.batch()
+        for target in targets:
+            batch.capture_pane(target, lines)
+        
+        # Chained: one invocation's time split evenly, an estimate per target
+        share = len(targets)
+        started = time.perf_counter()
+        try:
+            results = batch.execute(continue_on_error=True)
+        except Exception as e:
+            self.logger.error(f"Failed to capture {', '.join(targets)}: {e}")
+            return [self._capture_failure(target, e, started, share) for target in targets]
+        return [self._capture_result(target, result, started, share)
+                for target, result in zip(targets, results)]
+    
+    @staticmethod
+    def _capture_result(target: str, result: subprocess.CompletedProcess,
+                        started: float, share: int = 1) -> CaptureResult:
+        """Build a CaptureResult from a finished capture-pane command"""
+        elapsed = (time.perf_counter() - started) / share
+        if result.returncode != 0:
+            return CaptureResult(target, returncode=result.returncode, elapsed=elapsed,
+                                 error=(result.stderr or "").strip() or "capture failed")
+        return CaptureResult(target, output=result.stdout, elapsed=elapsed)
+    
+    @staticmethod
+    def _capture_failure(target: str, error: Exception, started: float,
+                         share: int = 1) -> CaptureResult:
+        """Build a CaptureResult for a capture that raised"""
+        return CaptureResult(target, returncode=-1, error=str(error),
+                             elapsed=(time.perf_counter() - started) / share)
+    
+    def _pipeline_captures(self, client: TmuxControlClient, targets: List[str],
+                           lines: int, limit: int) -> Dict[str, CaptureResult]:
+        """
+        Keep up to `limit` captures in flight on one control-mode client
+        Each waits at most command_timeout; once one times out the server
+        is taken to be stuck and the rest fail without waiting
+        """
         results = {}
+        in_flight: deque = deque()
+        timeout = self.command_timeout
+        stuck = False
         
-        # Build command list for parallel execution
-        for session, window in targets:
-            target = f"{session}:{window}"
-            cmd = ['tmux', 'capture-pane', '-t', target, '-p', '-S', f'-{lines}']
-            
+        def collect() -> None:
+            nonlocal stuck
+            target, started, future = in_flight.popleft()
             try:
-                result = self.execute_command(cmd, check=False)
-                results[target] = result.stdout if result.returncode == 0 else ""
-            except Exception as e:
-                self.logger.error(f"Failed to capture {target}: {e}")
-                results[target] = ""
+                try:
+                    result = future.result(timeout=0 if stuck else timeout)
+                except TimeoutError:
+                    stuck = True
+                    raise TmuxTimeoutError(self._capture_command(target, lines), timeout)
+                results[target] = self._capture_result(target, result, started)
+            except TmuxCommandError as e:
+                results[target] = self._capture_failure(target, e, started)
+        
+        for target in targets:
+            if len(in_flight) >= limit:
+                collect()
+            if stuck:
+                results[target] = self._capture_failure(
+                    target, TmuxTimeoutError(self._capture_command(target, lines), timeout),
+                    time.perf_counter())
+                continue
+            future = client.submit(self._capture_command(target, lines)[1:])
+            in_flight.append((target, time.perf_counter(), future))
+        while in_flight:
+            collect()
         
         return results
     
-    def _parse_batch_results(self, sessions_output: str, 
-                            windows_output: str) -> Dict[str, Any]:
-        """Parse batch command results into structured data"""
-        data = {'sessions': {}, 'windows': {}}
+    @staticmethod
+    def _empty_snapshot() -> Dict[str, Any]:
+        return {'sessions': {}, 'windows': {}, 'panes': {}, 'index': TmuxIndex()}
+    
+    def _parse_snapshot(self, output: str) -> Dict[str, Any]:
+        """Parse list-panes -a output into sessions, windows and panes"""
+        return self._snapshot_from_rows(self.SNAPSHOT.parse(output))
+    
+    def _snapshot_from_rows(self, rows: list) -> Dict[str, Any]:
+        """
+        Sessions, windows and panes from records with the SNAPSHOT fields
+        Name-keyed views are kept for existing callers; 'index' holds the
+        same objects keyed by session, window and pane ids
+        """
+        data = self._empty_snapshot()
+        index = data['index']
+        # Our own control clients are not users attached to a session
+        own_clients = TmuxControlClient.attached_clients(getattr(self, 'socket_name', None))
+        # A linked window lists its panes once for every session it is in
+        windows: Dict[Tuple[str, str], WindowInfo] = {}
         
-        # Parse sessions
-        for line in sessions_output.strip().split('\n'):
-            if not line:
-                continue
-            parts = line.split('|')
-            if len(parts) >= 4:
-                name = parts[0]
-                data['sessions'][name] = SessionInfo(
-                    name=name,
-                    windows=int(parts[1]) if parts[1].isdigit() else 0,
-                    created=parts[2],
-                    attached=parts[3] == '1'
+        for row in rows:
+            session_id, window_id, session_name = row.session_id, row.window_id, row.session_name
+            if session_id not in index.sessions:
+                clients = max(0, row.session_attached - own_clients[session_id])
+                session = SessionInfo(
+                    name=session_name,
+                    windows=row.session_windows,
+                    created=row.session_created,
+                    attached=clients > 0,
+                    id=session_id,
+                    server=self.server,
+                    clients=clients
                 )
-        
-        # Parse windows
-        for line in windows_output.strip().split('\n'):
-            if not line:
-                continue
-            parts = line.split('|')
-            if len(parts) >= 6:
-                session_window = parts[0]
-                session_name = session_window.split(':')[0]
-                
-                if session_name not in data['windows']:
-                    data['windows'][session_name] = []
-                
-                window_idx = session_window.split(':')[1]
-                data['windows'][session_name].append(WindowInfo(
+                index.add_session(session)
+                data['sessions'][session_name] = session
+                data['windows'][session_name] = []
+            
+            window = windows.get((session_id, window_id))
+            if window is None:
+                window = WindowInfo(
                     session=session_name,
-                    index=int(window_idx) if window_idx.isdigit() else 0,
-                    name=parts[1],
-                    active=parts[2] == '1',
-                    panes=int(parts[3]) if parts[3].isdigit() else 1,
-                    layout=parts[4],
-                    current_command=parts[5] if len(parts) > 5 else ""
-                ))
+                    index=row.window_index,
+                    name=row.window_name,
+                    active=row.window_active,
+                    panes=row.window_panes,
+                    layout=row.window_layout,
+                    current_command=row.pane_current_command,
+                    id=window_id,
+                    session_id=session_id
+                )
+                windows[session_id, window_id] = window
+                index.add_window(window)
+                data['windows'][session_name].append(window)
+                data['panes'][window.target] = []
+            elif row.pane_active:
+                # A window's command is the one running in its active pane
+                window.current_command = row.pane_current_command
+            
+            pane = PaneInfo(
+                session=session_name,
+                window=row.window_index,
+                index=row.pane_index,
+                active=row.pane_active,
+                current_command=row.pane_current_command,
+                id=row.pane_id,
+                window_id=window_id,
+                session_id=session_id
+            )
+            index.add_pane(pane)
+            data['panes'][window.target].append(pane)
         
         return data
     
@@ -241,6 +1265,468 @@ class TmuxCommand:
         return json.dumps(output, indent=2)
 
 
+class TmuxBatch:
+    """
+    Builder that chains several tmux commands into one invocation
+    Commands are joined with tmux's `;` separator and a sentinel
+    display-message after each one splits the combined output back
+    per command. Over the control-mode backend the commands are
+    pipelined on the shared client instead.
+    """
+    
+    SEPARATOR = ';'
+    MARKER_PREFIX = '__tmux_batch_'
+    NOT_EXECUTED = "not executed: an earlier command in the batch failed"
+    TIMED_OUT = "timed out: the batch missed its deadline"
+    SERVER_ERRORS = ("no server running", "error connecting")
+    
+    def __init__(self, runner: TmuxCommand):
+        self.runner = runner
+        self.commands: List[List[str]] = []
+    
+    def __len__(self) -> int:
+        return len(self.commands)
+    
+    def add(self, *args: Any) -> 'TmuxBatch':
+        """Add a tmux command, given without the leading 'tmux'"""
+        if not args:
+            raise ValueError("Empty tmux command")
+        self.commands.append([str(arg) for arg in args])
+        return self
+    
+    def capture_pane(self, target: CaptureTarget, lines: int = 50) -> 'TmuxBatch':
+        return self.add(*TmuxCommand._capture_command(TmuxCommand.format_target(target), lines)[1:])
+    
+    def send_keys(self, target: str, *keys: str) -> 'TmuxBatch':
+        return self.add('send-keys', '-t', target, *keys)
+    
+    def new_window(self, session_name: str, window_name: str,
+                   start_directory: Optional[str] = None) -> 'TmuxBatch':
+        args = ['new-window', '-t', session_name, '-n', window_name]
+        if start_directory:
+            args.extend(['-c', start_directory])
+        return self.add(*args)
+    
+    def rename_window(self, target: str, name: str) -> 'TmuxBatch':
+        return self.add('rename-window', '-t', target, name)
+    
+    @staticmethod
+    def escape_argument(arg: str) -> str:
+        """Keep a trailing `;` literal instead of ending the command"""
+        return arg[:-1] + '\\;' if arg.endswith(';') else arg
+    
+    def execute(self, check: bool = False, continue_on_error: bool = False,
+                timeout: Optional[float] = None) -> List[subprocess.CompletedProcess]:
+        """
+        Run every queued command, returning one CompletedProcess per command
+        tmux stops a chain at the first failing command; the commands after
+        it are reported with returncode -1 unless continue_on_error re-runs them
+        With a timeout the whole batch shares one deadline; commands running
+        or not yet started when it passes, or when a call times out, are
+        reported with returncode -1 and TIMED_OUT
+        """
+        commands = self.commands
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        # Control mode reads one command per line, so any newline rules it out
+        pipelinable = commands and not any('\n' in str(arg) for command in commands for arg in command)
+        try:
+            client = self.runner._get_control_client(
+                ['tmux'] + commands[0], self._remaining(deadline)) if pipelinable else None
+        except TmuxTimeoutError:
+            # The server is stuck; a subprocess would hang on it too
+            results = [self._timed_out(command) for command in commands]
+        else:
+            if client is not None:
+                try:
+                    results = self._pipeline(client, commands, continue_on_error, deadline)
+                except TmuxCommandError as e:
+                    self.runner.logger.debug(f"Control mode failed, using subprocess: {e}")
+                    results = self._chain_all(commands, continue_on_error, deadline)
+            else:
+                results = self._chain_all(commands, continue_on_error, deadline)
+        
+        if check:
+            for result in results:
+                if result.returncode != 0:
+                    raise TmuxCommandError(
+                        f"Command failed: {' '.join(result.args)}: {result.stderr.strip()}"
+                    )
+        return results
+    
+    def _remaining(self, deadline: Optional[float]) -> Optional[float]:
+        """Seconds left before deadline, or the runner's per-call timeout"""
+        if deadline is None:
+            return self.runner.command_timeout
+        return max(0.0, deadline - time.monotonic())
+    
+    def _pipeline(self, client: TmuxControlClient, commands: List[List[str]],
+                  continue_on_error: bool,
+                  deadline: Optional[float] = None) -> List[subprocess.CompletedProcess]:
+        """Run the batch over the control-mode client"""
+        metrics = self.runner.metrics
+        started = time.perf_counter()
+        if continue_on_error:
+            futures = [client.submit(command) for command in commands]
+            results = []
+            for command, future in zip(commands, futures):
+                try:
+                    results.append(future.result(timeout=self._remaining(deadline)))
+                except TimeoutError:
+                    if metrics.enabled:
+                        metrics.record(['tmux'] + command, time.perf_counter() - started,
+                                       timed_out=True)
+                    break
+                if metrics.enabled:
+                    # Pipelined: latency runs from submitting the whole batch
+                    metrics.record(['tmux'] + command, time.perf_counter() - started, results[-1])
+            return results + [self._timed_out(command) for command in commands[len(results):]]
+        
+        results = []
+        for command in commands:
+            try:
+                result = client.execute(command, timeout=self._remaining(deadline))
+            except TimeoutError:
+                if metrics.enabled:
+                    metrics.record(['tmux'] + command, time.perf_counter() - started,
+                                   timed_out=True)
+                return results + [self._timed_out(command) for command in commands[len(results):]]
+            if metrics.enabled:
+                metrics.record(['tmux'] + command, time.perf_counter() - started, result)
+                started = time.perf_counter()
+            results.append(result)
+            if result.returncode != 0:
+                break
+        return results + [self._not_executed(command) for command in commands[len(results):]]
+    
+    def _chain_all(self, commands: List[List[str]], continue_on_error: bool,
+                   deadline: Optional[float] = None) -> List[subprocess.CompletedProcess]:
+        """Run the batch as chained subprocess invocations"""
+        results: List[subprocess.CompletedProcess] = []
+        index = 0
+        while index < len(commands):
+            remaining = self._remaining(deadline)
+            try:
+                if remaining is not None and remaining <= 0:
+                    raise TmuxTimeoutError(['tmux'] + commands[index], 0)
+                ran = self._run_chain(commands[index:index + self.runner.chain_size], remaining)
+            except TmuxTimeoutError:
+                # Later chains would wait on the same stuck server
+                return results + [self._timed_out(command) for command in commands[index:]]
+            results.extend(ran)
+            index += len(ran)
+            
+            failed = ran[-1]
+            if failed.returncode == 0:
+                continue
+            if not continue_on_error:
+                break
+            if any(error in failed.stderr for error in self.SERVER_ERRORS):
+                # Re-running the rest would fail the same way
+                results.extend(
+                    subprocess.CompletedProcess(['tmux'] + command, failed.returncode, "", failed.stderr)
+                    for command in commands[index:]
+                )
+                index = len(commands)
+        
+        return results + [self._not_executed(command) for command in commands[index:]]
+    
+    def _run_chain(self, commands: List[List[str]],
+                   timeout: Optional[float] = None) -> List[subprocess.CompletedProcess]:
+        """
+        Run commands in one tmux invocation
+        Returns results for the commands that ran, ending with the failing one
+        """
+        if len(commands) == 1:
+            argv = ['tmux'] + [self.escape_argument(arg) for arg in commands[0]]
+            return [self.runner.execute_command(argv, check=False, timeout=timeout)]
+        
+        prefix = f"{self.MARKER_PREFIX}{uuid.uuid4().hex[:12]}"
+        markers = [f"{prefix}_{i}__" for i in range(len(commands))]
+        argv = ['tmux']
+        for command, marker in zip(commands, markers):
+            argv.extend(self.escape_argument(arg) for arg in command)
+            argv.extend([self.SEPARATOR, 'display-message', '-p', marker, self.SEPARATOR])
+        argv.pop()
+        
+        combined = self.runner.execute_command(argv, check=False, timeout=timeout)
+        
+        results = []
+        output: List[str] = []
+        position = 0
+        for line in (combined.stdout or "").splitlines(keepends=True):
+            if position < len(markers) and line.rstrip('\n') == markers[position]:
+                results.append(subprocess.CompletedProcess(
+                    ['tmux'] + commands[position], 0, ''.join(output), ""
+                ))
+                output = []
+                position += 1
+            else:
+                output.append(line)
+        
+        if position < len(commands):
+            # The command without a marker is the one that stopped the chain
+            results.append(subprocess.CompletedProcess(
+                ['tmux'] + commands[position], combined.returncode or 1,
+                ''.join(output), combined.stderr or ""
+            ))
+        return results
+    
+    @classmethod
+    def _not_executed(cls, command: List[str]) -> subprocess.CompletedProcess:
+        return subprocess.CompletedProcess(['tmux'] + command, -1, "", cls.NOT_EXECUTED)
+    
+    @classmethod
+    def _timed_out(cls, command: List[str]) -> subprocess.CompletedProcess:
+        return subprocess.CompletedProcess(['tmux'] + command, -1, "", cls.TIMED_OUT)
+    
+    @classmethod
+    def timed_out(cls, result: subprocess.CompletedProcess) -> bool:
+        """Whether a batch result is a command cut off by the deadline"""
+        return result.returncode == -1 and result.stderr == cls.TIMED_OUT
+
+
+class AsyncTmuxCommand(TmuxCommand):
+    """
+    Asyncio-native tmux command execution
+    Awaits tmux round trips instead of blocking the event loop, so the
+    event collector and websocket server can share one loop
+    """
+    
+    async def execute_command_async(self, cmd: List[str], check: bool = True,
+                                    timeout: Optional[float] = None) -> subprocess.CompletedProcess:
+        """Async counterpart of execute_command"""
+        if timeout is None:
+            timeout = self.command_timeout
+        metrics = self.metrics
+        if not metrics.enabled:
+            return await self._execute_command_async(cmd, check, timeout)
+        started = time.perf_counter()
+        result = None
+        timed_out = False
+        try:
+            result = await self._execute_command_async(cmd, check, timeout)
+            return result
+        except TmuxTimeoutError:
+            timed_out = True
+            raise
+        finally:
+            metrics.record(cmd, time.perf_counter() - started, result, timed_out)
+    
+    async def _execute_command_async(self, cmd: List[str], check: bool,
+                                     timeout: Optional[float]) -> subprocess.CompletedProcess:
+        if (self.backend == self.BACKEND_CONTROL
+                and not TmuxControlClient.shared(self.socket_name).is_alive()):
+            # Starting the control client blocks, keep it off the loop
+            loop = asyncio.get_running_loop()
+            client = await loop.run_in_executor(None, self._get_control_client, cmd, timeout)
+        else:
+            client = self._get_control_client(cmd, timeout)
+        
+        result = None
+        fake = self._get_fake_server()
+        if fake is not None:
+            if self.metrics.enabled:
+                self.metrics.record_process()
+            delay = fake.latency_for(cmd[1:])
+            if timeout is not None and delay > timeout:
+                await asyncio.sleep(timeout)
+                raise TmuxTimeoutError(cmd, timeout)
+            await asyncio.sleep(delay)
+            result = fake.run(cmd[1:])
+        elif client is not None:
+            try:
+                result = await asyncio.wait_for(asyncio.wrap_future(client.submit(cmd[1:])), timeout)
+            except asyncio.TimeoutError:
+                raise TmuxTimeoutError(cmd, timeout)
+            except TmuxCommandError as e:
+                self.logger.debug(f"Control mode failed, using subprocess: {e}")
+        
+        if result is None:
+            if self.metrics.enabled:
+                self.metrics.record_process()
+            try:
+                process = await asyncio.create_subprocess_exec(
+                    *self.server_argv(cmd),
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE
+                )
+                stdout, stderr = await asyncio.wait_for(process.communicate(), timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise TmuxTimeoutError(cmd, timeout)
+            except OSError as e:
+                raise TmuxCommandError(f"Command failed: {e}")
+            result = subprocess.CompletedProcess(
+                args=cmd,
+                returncode=process.returncode,
+                stdout=stdout.decode(errors='replace'),
+                stderr=stderr.decode(errors='replace')
+            )
+        
+        if check and result.returncode != 0:
+            logging.error(f"Command failed: {' '.join(cmd)}")
+            logging.error(f"stderr: {result.stderr}")
+            error = subprocess.CalledProcessError(
+                result.returncode, cmd, result.stdout, result.stderr
+            )
+            raise TmuxCommandError(f"Command failed: {error}")
+        return result
+    
+    async def get_snapshot_async(self, refresh: bool = False) -> Dict[str, Any]:
+        """Async counterpart of get_snapshot"""
+        if not refresh:
+            cached = self.snapshot_cache.get()
+            if cached is not None:
+                return cached
+        snapshot, _ = await self.get_snapshot_rows_async(self.SNAPSHOT)
+        return snapshot
+    
+    async def get_snapshot_rows_async(self, listing: TmuxFormat) -> Tuple[Dict[str, Any], list]:
+        """
+        Refreshed snapshot plus every pane's record in listing
+        listing extends SNAPSHOT with more pane fields, so callers needing
+        those get them from the same list-panes -a call
+        """
+        generation = self.snapshot_cache.generation
+        try:
+            result = await self.execute_command_async(
+                ['tmux', 'list-panes', '-a', '-F', listing.format]
+            )
+            rows = listing.parse(result.stdout)
+        except TmuxCommandError:
+            # No sessions exist
+            rows = []
+        snapshot = self._snapshot_from_rows(rows)
+        
+        self.snapshot_cache.store(generation, snapshot)
+        return snapshot, rows
+    
+    async def batch_get_all_sessions_and_windows_async(self) -> Dict[str, Any]:
+        """Async counterpart of batch_get_all_sessions_and_windows"""
+        return await self.get_snapshot_async()
+    
+    async def batch_capture_panes_async(self, targets: List[CaptureTarget],
+                                        lines: int = 50,
+                                        max_concurrency: Optional[int] = None) -> Dict[str, str]:
+        """Async counterpart of batch_capture_panes"""
+        results = await self.batch_capture_panes_detailed_async(targets, lines, max_concurrency)
+        return {target: result.output for target, result in results.items()}
+    
+    async def batch_capture_panes_detailed_async(self, targets: List[CaptureTarget],
+                                                 lines: int = 50,
+                                                 max_concurrency: Optional[int] = None
+                                                 ) -> Dict[str, CaptureResult]:
+        """Async counterpart of batch_capture_panes_detailed"""
+        semaphore = asyncio.Semaphore(max(1, max_concurrency or self.capture_concurrency))
+        
+        async def capture(target: str) -> CaptureResult:
+            async with semaphore:
+                started = time.perf_counter()
+                try:
+                    result = await self.execute_command_async(
+                        self._capture_command(target, lines), check=False
+                    )
+                except Exception as e:
+                    self.logger.error(f"Failed to capture {target}: {e}")
+                    return self._capture_failure(target, e, started)
+                return self._capture_result(target, result, started)
+        
+        captured = await asyncio.gather(
+            *(capture(self.format_target(target)) for target in targets)
+        )
+        return {result.target: result for result in captured}
+
+
+class TmuxServerPool:
+    """
+    One TmuxCommand per tmux server socket (`tmux -L name`)
+    Servers are queried concurrently and their snapshots merged into one
+    view where every session is tagged with its server. Sessions of the
+    default server keep their plain names, others are keyed as
+    `server/session` so equal names on different servers don't collide.
+    """
+    
+    def __init__(self, socket_names: Optional[List[Optional[str]]] = None,
+                 command_class: type = TmuxCommand,
+                 primary: Optional[TmuxCommand] = None):
+        self.command_class = command_class
+        self.commands: Dict[str, TmuxCommand] = {}
+        if socket_names is None:
+            socket_names = self.sockets_from_env()
+        for socket_name in socket_names:
+            # primary serves its own socket, but only if that one is listed
+            if primary is not None and primary.server == (socket_name or TmuxCommand.DEFAULT_SERVER):
+                self.commands[primary.server] = primary
+            else:
+                self.add_server(socket_name)
+    
+    def __len__(self) -> int:
+        return len(self.commands)
+    
+    @staticmethod
+    def sockets_from_env() -> List[Optional[str]]:
+        """Sockets listed in TMUX_SOCKETS, e.g. default,team-a,team-b"""
+        names = [name.strip() for name in os.environ.get('TMUX_SOCKETS', '').split(',')]
+        sockets = [None if name == TmuxCommand.DEFAULT_SERVER else name for name in names if name]
+        return sockets or [None]
+    
+    def add_server(self, socket_name: Optional[str] = None) -> TmuxCommand:
+        """Command for a socket, created on first use"""
+        server = socket_name or TmuxCommand.DEFAULT_SERVER
+        if server not in self.commands:
+            self.commands[server] = self.command_class(socket_name=socket_name)
+        return self.commands[server]
+    
+    @property
+    def servers(self) -> List[str]:
+        return list(self.commands)
+    
+    @staticmethod
+    def qualify(server: str, session_name: str) -> str:
+        """Session key in merged views"""
+        if server == TmuxCommand.DEFAULT_SERVER:
+            return session_name
+        return f"{server}/{session_name}"
+    
+    def map(self, fn: Callable[[TmuxCommand], Any]) -> Dict[str, Any]:
+        """Call fn with every server's command concurrently, keyed by server"""
+        if len(self.commands) <= 1:
+            return {server: fn(command) for server, command in self.commands.items()}
+        with ThreadPoolExecutor(max_workers=len(self.commands)) as executor:
+            futures = {server: executor.submit(fn, command)
+                       for server, command in self.commands.items()}
+            return {server: future.result() for server, future in futures.items()}
+    
+    async def map_async(self, fn: Callable[[TmuxCommand], Any]) -> Dict[str, Any]:
+        """Await fn(command) for every server concurrently, keyed by server"""
+        servers = list(self.commands)
+        results = await asyncio.gather(*(fn(self.commands[server]) for server in servers))
+        return dict(zip(servers, results))
+    
+    def get_snapshot(self, refresh: bool = False) -> Dict[str, Any]:
+        """Merged snapshot of every server"""
+        return self.merge(self.map(lambda command: command.get_snapshot(refresh=refresh)))
+    
+    async def get_snapshot_async(self, refresh: bool = False) -> Dict[str, Any]:
+        """Async counterpart of get_snapshot; needs AsyncTmuxCommand servers"""
+        return self.merge(await self.map_async(
+            lambda command: command.get_snapshot_async(refresh=refresh)
+        ))
+    
+    def merge(self, snapshots: Dict[str, Dict[str, Any]]) -> Dict[str, Any]:
+        """Combine per-server snapshots; 'servers' keeps each one unchanged"""
+        merged = {'sessions': {}, 'windows': {}, 'panes': {}, 'servers': snapshots}
+        for server, snapshot in snapshots.items():
+            for session_name, session in snapshot['sessions'].items():
+                key = self.qualify(server, session_name)
+                merged['sessions'][key] = session
+                merged['windows'][key] = snapshot['windows'].get(session_name, [])
+                for window in merged['windows'][key]:
+                    merged['panes'][f"{key}:{window.index}"] = snapshot['panes'].get(window.target, [])
+        return merged
+
+
 class TmuxValidation:
     """Shared validation methods"""
     
@@ -0,0 +1,196 @@
+"""
+Tmux Hooks - Push notification of structural tmux changes
+Installs tmux hooks that write compact records to a FIFO owned by the
+orchestrator, so snapshot caches are invalidated and the event collector
+wakes up as soon as sessions, windows or panes change
+"""
+
+import asyncio
+import logging
+import os
+import shlex
+import shutil
+import tempfile
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from tmux_core import TmuxCommand
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HookRecord:
+    """One structural change reported by a tmux hook"""
+    hook: str
+    session_id: str = ""
+    window_id: str = ""
+    pane_id: str = ""
+    
+    @classmethod
+    def parse(cls, line: str) -> Optional['HookRecord']:
+        """Parse a tab-separated record written by the hook command"""
+        parts = line.rstrip('\n').split('\t')
+        if not parts[0]:
+            return None
+        parts += [""] * (4 - len(parts))
+        return cls(hook=parts[0], session_id=parts[1],
+                   window_id=parts[2], pane_id=parts[3])
+
+
+class TmuxHookListener:
+    """
+    Installs global tmux hooks and reads their records from a FIFO
+    Records only carry immutable ids ($session, @window, %pane) so no
+    user-controlled names ever reach the hook's shell command
+    """
+    
+    HOOKS = [
+        'session-created', 'session-closed', 'session-renamed',
+        'window-linked', 'window-unlinked', 'window-renamed',
+        'after-split-window', 'pane-exited',
+        'client-attached', 'client-detached',
+        'session-window-changed', 'window-pane-changed'
+    ]
+    RECORD_FORMAT = '#{hook}\t#{session_id}\t#{window_id}\t#{pane_id}'
+    
+    def __init__(self, tmux_cmd: TmuxCommand):
+        self.tmux_cmd = tmux_cmd
+        # Array index keeps our hooks apart from the user's and other orchestrators'
+        self.hook_index = 1000 + os.getpid() % 100000
+        self.fifo_dir: Optional[str] = None
+        self.fifo_path: Optional[str] = None
+        self.installed = False
+        self._fd: Optional[int] = None
+        self._buffer = b""
+        self._callbacks: List[Callable[[HookRecord], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def add_callback(self, callback: Callable[[HookRecord], None]) -> None:
+        """Register a callback invoked for every hook record"""
+        self._callbacks.append(callback)
+    
+    def hook_command(self) -> str:
+        """tmux command run by every hook: append one record to the FIFO"""
+        path = shlex.quote(self.fifo_path)
+        # `1<>` opens read-write, so a missing reader never blocks the hook
+        return (f"run-shell -b \"[ -p {path} ] && "
+                f"printf '%s\\\\n' '{self.RECORD_FORMAT}' 1<> {path}\"")
+    
+    def install(self) -> bool:
+        """Create the FIFO and install hooks; False if tmux refused them"""
+        if self.installed:
+            return True
+        
+        self.fifo_dir = tempfile.mkdtemp(prefix='tmux-orchestrator-')
+        self.fifo_path = os.path.join(self.fifo_dir, 'hooks.fifo')
+        try:
+            os.mkfifo(self.fifo_path, 0o600)
+            # Read-write so the FIFO never reports EOF when no hook is writing
+            self._fd = os.open(self.fifo_path, os.O_RDWR | os.O_NONBLOCK)
+        except OSError as e:
+            logger.warning(f"Could not create hook FIFO: {e}")
+            self._cleanup_fifo()
+            return False
+        
+        batch = self.tmux_cmd.batch()
+        command = self.hook_command()
+        for hook in self.HOOKS:
+            batch.add('set-hook', '-g', f'{hook}[{self.hook_index}]', command)
+        
+        try:
+            results = batch.execute(continue_on_error=True)
+        except Exception as e:
+            logger.warning(f"Could not install tmux hooks: {e}")
+            self._cleanup_fifo()
+            return False
+        
+        failed = [hook for hook, result in zip(self.HOOKS, results) if result.returncode != 0]
+        if len(failed) == len(self.HOOKS):
+            logger.warning(f"Could not install tmux hooks: {results[0].stderr.strip()}")
+            self._cleanup_fifo()
+            return False
+        if failed:
+            logger.debug(f"tmux does not support hooks: {', '.join(failed)}")
+        
+        self.installed = True
+        logger.info(f"Installed {len(self.HOOKS) - len(failed)} tmux hooks")
+        return True
+    
+    def uninstall(self) -> None:
+        """Remove our hooks and the FIFO"""
+        self.detach()
+        if self.installed:
+            batch = self.tmux_cmd.batch()
+            for hook in self.HOOKS:
+                batch.add('set-hook', '-gu', f'{hook}[{self.hook_index}]')
+            try:
+                batch.execute(continue_on_error=True)
+            except Exception as e:
+                logger.debug(f"Could not remove tmux hooks: {e}")
+            self.installed = False
+        self._cleanup_fifo()
+    
+    def attach(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Dispatch records from the event loop as soon as they arrive"""
+        if self._fd is None:
+            return
+        self._loop = loop or asyncio.get_running_loop()
+        self._loop.add_reader(self._fd, self.dispatch)
+    
+    def detach(self) -> None:
+        """Stop dispatching records from the event loop"""
+        if self._loop is not None and self._fd is not None:
+            self._loop.remove_reader(self._fd)
+        self._loop = None
+    
+    def read_records(self) -> List[HookRecord]:
+        """Read every complete record currently in the FIFO"""
+        if self._fd is None:
+            return []
+        
+        while True:
+            try:
+                chunk = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                logger.debug(f"Hook FIFO read failed: {e}")
+                break
+            if not chunk:
+                break
+            self._buffer += chunk
+        
+        *lines, self._buffer = self._buffer.split(b'\n')
+        records = []
+        for line in lines:
+            record = HookRecord.parse(line.decode(errors='replace'))
+            if record is not None:
+                records.append(record)
+        return records
+    
+    def dispatch(self) -> None:
+        """Invalidate cached state and notify callbacks for pending records"""
+        records = self.read_records()
+        if not records:
+            return
+        
+        self.tmux_cmd.invalidate_snapshot()
+        for record in records:
+            logger.debug(f"tmux hook: {record.hook} {record.session_id} "
+                         f"{record.window_id} {record.pane_id}")
+            for callback in list(self._callbacks):
+                try:
+                    callback(record)
+                except Exception as e:
+                    logger.error(f"Hook callback failed: {e}")
+    
+    def _cleanup_fifo(self) -> None:
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+        if self.fifo_dir:
+            shutil.rmtree(self.fifo_dir, ignore_errors=True)
+        self.fifo_dir = self.fifo_path = None
+        self._buffer = b""
@@ -0,0 +1,76 @@
+"""
+Tmux Normalize - Redraw noise removal before change detection
+Claude's TUI redraws spinners, elapsed timers and token counters several
+times a second; comparing pane content with those masked out leaves the
+changes that carry new output
+"""
+
+import logging
+import os
+import re
+from typing import Callable, List, Optional, Union
+
+from tmux_taps import ANSI_PATTERN
+
+
+logger = logging.getLogger(__name__)
+
+SPINNER_PATTERN = re.compile(r'^(\s*)[·✢✳✶✻✽*⠋⠙⠹⠸⠼⠴⠦⠧⠇⠏◐◓◑◒](?=\s)', re.MULTILINE)
+# Claude's working line, e.g. "✻ Pondering… (12s · ↑ 1.2k tokens · esc to interrupt)"
+STATUS_PATTERN = re.compile(r'^.*\besc to interrupt\b.*$', re.MULTILINE)
+TIMER_PATTERN = re.compile(r'\b(?:\d+(?:\.\d+)?\s?(?:ms|s|m|h)|\d{1,2}:\d{2}(?::\d{2})?)\b')
+COUNTER_PATTERN = re.compile(r'\b\d+(?:[.,]\d+)*[kKmM]?(?=\s*(?:tokens?\b|%))')
+# Top of an input box or a full-width rule starting the footer
+FOOTER_PATTERN = re.compile(r'^\s*(?:╭─|─{10,})')
+
+
+class ContentNormalizer:
+    """
+    Pane content as compared for change detection
+    Rules run in RULES order; TMUX_NORMALIZE names the ones to apply, and
+    "none" compares raw content
+    """
+    
+    RULES = ('ansi', 'status', 'spinner', 'timers', 'counters', 'footer')
+    DEFAULT_RULES = ','.join(RULES)
+    rules_setting = os.environ.get('TMUX_NORMALIZE', DEFAULT_RULES)
+    # How far from the bottom a footer may start
+    footer_lines = 6
+    
+    def __init__(self, rules: Optional[Union[str, List[str]]] = None):
+        if rules is None:
+            rules = self.rules_setting
+        if isinstance(rules, str):
+            rules = [rule.strip() for rule in rules.split(',') if rule.strip() not in ('', 'none')]
+        unknown = [rule for rule in rules if rule not in self.RULES]
+        if unknown:
+            logger.warning(f"Ignoring unknown normalization rules: {', '.join(unknown)}")
+        self.rules = [rule for rule in self.RULES if rule in rules]
+        self._steps: List[Callable[[str], str]] = [getattr(self, f"_{rule}") for rule in self.rules]
+    
+    def normalize(self, content: str) -> str:
+        for step in self._steps:
+            content = step(content)
+        return content
+    
+    def _ansi(self, content: str) -> str:
+        return ANSI_PATTERN.sub('', content)
+    
+    def _status(self, content: str) -> str:
+        return STATUS_PATTERN.sub('<status>', content)
+    
+    def _spinner(self, content: str) -> str:
+        return SPINNER_PATTERN.sub(r'\1*', content)
+    
+    def _timers(self, content: str) -> str:
+        return TIMER_PATTERN.sub('<time>', content)
+    
+    def _counters(self, content: str) -> str:
+        return COUNTER_PATTERN.sub('<n>', content)
+    
+    def _footer(self, content: str) -> str:
+        lines = content.split('\n')
+        for index in range(max(0, len(lines) - self.footer_lines), len(lines)):
+            if FOOTER_PATTERN.match(lines[index]):
+                return '\n'.join(lines[:index])
+        return content
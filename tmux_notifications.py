@@ -0,0 +1,168 @@
+"""
+Tmux Notifications - Push-based collection from control-mode clients
+Attaches a read-only `tmux -C` client to each session so pane output and
+window changes arrive as %output and %window-* notifications when tmux
+produces them, instead of being found by the next poll
+"""
+
+import asyncio
+import logging
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+from tmux_core import TmuxCommand, TmuxControlClient, TmuxTimeoutError
+from tmux_taps import PaneTap
+
+
+logger = logging.getLogger(__name__)
+
+# tmux writes control characters and backslashes in %output as \ooo
+OCTAL_ESCAPE = re.compile(r'\\([0-7]{3})')
+
+
+@dataclass
+class Notification:
+    """One control-mode notification, e.g. `%window-renamed @3 logs`"""
+    name: str
+    args: List[str] = field(default_factory=list)
+    # Session whose monitor received it
+    session_id: str = ""
+    # Lines completed by an %output notification
+    lines: List[str] = field(default_factory=list)
+    
+    @classmethod
+    def parse(cls, line: str, session_id: str = "") -> Optional['Notification']:
+        """Parse a notification line; the last argument keeps its spaces"""
+        if not line.startswith('%') or len(line) < 2:
+            return None
+        name, _, rest = line[1:].partition(' ')
+        return cls(name=name, args=rest.split(' ', 1) if rest else [], session_id=session_id)
+    
+    @staticmethod
+    def decode_output(payload: str) -> bytes:
+        """Raw bytes of an %output payload"""
+        return OCTAL_ESCAPE.sub(lambda m: chr(int(m.group(1), 8)), payload).encode()
+
+
+class TmuxNotificationListener:
+    """
+    Read-only control-mode monitors and the notifications they receive
+    tmux sends %output and %window-* only to clients attached to the
+    window's session, so each monitored session gets its own client;
+    sessions beyond max_sessions are left to polling. Callbacks run on
+    the event loop.
+    """
+    
+    def __init__(self, tmux_cmd: TmuxCommand, max_sessions: int = 64, lines: int = 10):
+        self.tmux_cmd = tmux_cmd
+        self.max_sessions = max_sessions
+        self.lines = lines
+        self.monitors: Dict[str, TmuxControlClient] = {}
+        # Panes whose output is assembled from %output, with their session
+        self.outputs: Dict[str, PaneTap] = {}
+        self.pane_sessions: Dict[str, str] = {}
+        self._callbacks: List[Callable[[Notification], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def add_callback(self, callback: Callable[[Notification], None]) -> None:
+        """Register a callback invoked for every notification"""
+        self._callbacks.append(callback)
+    
+    def attach(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Dispatch notifications on the event loop from now on"""
+        self._loop = loop or asyncio.get_running_loop()
+    
+    def monitored(self) -> Set[str]:
+        """Sessions with a live monitor"""
+        return {session_id for session_id, client in self.monitors.items() if client.is_alive()}
+    
+    def sync(self, session_ids: Iterable[str], timeout: Optional[float] = None) -> List[str]:
+        """
+        Monitor the given sessions, up to max_sessions
+        Monitors of other sessions, and dead ones, are closed; returns the
+        sessions newly monitored. Starting a client blocks, so call this
+        from a worker thread. Each start waits at most timeout, the
+        command timeout by default; raises TmuxTimeoutError past it.
+        """
+        if timeout is None:
+            timeout = self.tmux_cmd.command_timeout
+        wanted = list(session_ids)
+        for session_id in (set(self.monitors) - set(wanted)) | (set(self.monitors) - self.monitored()):
+            self.stop(session_id)
+        
+        started = []
+        for session_id in wanted:
+            if len(self.monitors) >= self.max_sessions:
+                break
+            if session_id in self.monitors:
+                continue
+            client = TmuxControlClient(socket_name=self.tmux_cmd.socket_name,
+                                       attach_session=session_id)
+            client.add_listener(lambda line, session_id=session_id: self._receive(session_id, line))
+            try:
+                running = client.start(timeout)
+            except TmuxTimeoutError:
+                client.close()
+                raise
+            if running:
+                self.monitors[session_id] = client
+                started.append(session_id)
+        if started:
+            logger.info(f"Monitoring {len(started)} sessions through control mode")
+        return started
+    
+    def stop(self, session_id: str) -> None:
+        """Close a session's monitor; its panes go back to polling"""
+        client = self.monitors.pop(session_id, None)
+        if client is not None:
+            client.close()
+        for pane_id in [p for p, s in self.pane_sessions.items() if s == session_id]:
+            self.forget(pane_id)
+    
+    def close(self) -> None:
+        """Close every monitor"""
+        for session_id in list(self.monitors):
+            self.stop(session_id)
+        self._loop = None
+    
+    def watch(self, pane_id: str, session_id: str, text: str = "") -> None:
+        """Assemble a pane's output from %output, starting from its known tail"""
+        tap = PaneTap(pane_id, lines=self.lines)
+        tap.tail.extend(text.split('\n') if text else [])
+        self.outputs[pane_id] = tap
+        self.pane_sessions[pane_id] = session_id
+    
+    def forget(self, pane_id: str) -> None:
+        self.outputs.pop(pane_id, None)
+        self.pane_sessions.pop(pane_id, None)
+    
+    def tail(self, pane_id: str) -> str:
+        tap = self.outputs.get(pane_id)
+        return tap.text if tap else ""
+    
+    def _receive(self, session_id: str, line: str) -> None:
+        # Monitor reader threads hand every line to the loop
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(self.dispatch, session_id, line)
+    
+    def dispatch(self, session_id: str, line: str) -> None:
+        """Notify callbacks of one notification line"""
+        notification = Notification.parse(line, session_id)
+        if notification is None:
+            return
+        if notification.name == 'output' and len(notification.args) == 2:
+            pane_id, payload = notification.args
+            tap = self.outputs.get(pane_id)
+            if tap is not None:
+                notification.lines = tap.feed(Notification.decode_output(payload))
+        elif notification.name == 'exit':
+            # The monitor's session is gone, or the server is exiting
+            self.stop(session_id)
+        
+        for callback in list(self._callbacks):
+            try:
+                callback(notification)
+            except Exception as e:
+                logger.error(f"Notification callback failed: {e}")
@@ -0,0 +1,106 @@
+"""
+Tmux Polling - Adaptive per-pane poll schedule
+Panes that keep changing are read on every collector tick; idle panes
+back off exponentially up to a ceiling, and are promoted back to every
+tick as soon as they change or their window changes
+"""
+
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+
+@dataclass
+class PaneActivity:
+    """How recently a pane changed, and when it is next read"""
+    # 1.0 while the pane is changing, halved by every idle read after that
+    score: float = 1.0
+    next_read: float = 0.0
+    last_change: Optional[float] = None
+    reads: int = 0
+    changes: int = 0
+
+
+class PanePollSchedule:
+    """
+    Decides which panes a tick reads
+    A pane's interval is base_interval / score. Panes stay at the base
+    interval for hot_period after a change, so an agent writing in bursts
+    is not missed between them; after that every idle read doubles the
+    interval, up to max_interval. Unknown panes are due at once.
+    """
+    
+    # Longest gap between two reads of an idle pane; at or below the base
+    # interval every pane is read on every tick
+    max_interval = float(os.environ.get('TMUX_POLL_MAX_INTERVAL', '30'))
+    # Score multiplier per read that finds no change
+    decay = 0.5
+    # Seconds after a change during which a pane counts as active
+    hot_period = 5.0
+    
+    def __init__(self, base_interval: float, max_interval: Optional[float] = None):
+        self.base_interval = base_interval
+        if max_interval is not None:
+            self.max_interval = max_interval
+        self.panes: Dict[str, PaneActivity] = {}
+    
+    @property
+    def enabled(self) -> bool:
+        return self.max_interval > self.base_interval
+    
+    def interval(self, pane_id: str) -> float:
+        """Seconds between reads of a pane at its current score"""
+        activity = self.panes.get(pane_id)
+        if activity is None or not self.enabled:
+            return self.base_interval
+        return min(self.base_interval / activity.score, self.max_interval)
+    
+    def due(self, pane_ids: Iterable[str], now: Optional[float] = None) -> List[str]:
+        """Panes to read this tick, in the given order"""
+        if not self.enabled:
+            return list(pane_ids)
+        now = time.monotonic() if now is None else now
+        # Half an interval of slack keeps tick jitter from skipping a hot pane
+        slack = self.base_interval / 2
+        return [pane_id for pane_id in pane_ids
+                if pane_id not in self.panes or self.panes[pane_id].next_read <= now + slack]
+    
+    def record(self, pane_id: str, changed: bool, now: Optional[float] = None) -> None:
+        """Account for a read of a pane"""
+        now = time.monotonic() if now is None else now
+        activity = self.panes.setdefault(pane_id, PaneActivity())
+        activity.reads += 1
+        if changed:
+            activity.changes += 1
+            activity.score = 1.0
+            activity.last_change = now
+        elif activity.last_change is not None and now - activity.last_change < self.hot_period:
+            activity.score = 1.0
+        else:
+            # Bottoms out once the interval reaches the ceiling
+            floor = self.base_interval / self.max_interval if self.enabled else 1.0
+            activity.score = max(activity.score * self.decay, floor)
+        activity.next_read = now + self.interval(pane_id)
+    
+    def at_ceiling(self, pane_id: str) -> bool:
+        """Whether a pane has backed off as far as it goes"""
+        return pane_id in self.panes and self.interval(pane_id) >= self.max_interval
+    
+    def promote(self, pane_ids: Iterable[str], now: Optional[float] = None) -> None:
+        """Treat panes as just changed: due now, and hot for hot_period"""
+        now = time.monotonic() if now is None else now
+        for pane_id in pane_ids:
+            activity = self.panes.get(pane_id)
+            if activity is not None:
+                activity.score = 1.0
+                activity.next_read = 0.0
+                activity.last_change = now
+    
+    def forget(self, pane_ids: Iterable[str]) -> None:
+        for pane_id in pane_ids:
+            self.panes.pop(pane_id, None)
+    
+    def hot(self) -> List[str]:
+        """Panes currently read on every tick"""
+        return [pane_id for pane_id, activity in self.panes.items() if activity.score >= 1.0]
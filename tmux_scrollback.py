@@ -0,0 +1,395 @@
+"""
+Tmux Scrollback - Incremental pane output reader
+Tracks a cursor per pane from #{history_size} and #{cursor_y} so each
+read captures only the lines written since the previous one, instead of
+re-reading the last N lines of every pane on every tick
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Collection, Deque, Dict, List, Optional
+
+from tmux_core import TmuxBatch, TmuxCommand, TmuxCommandError, TmuxFormat, TmuxTimeoutError
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PaneCursor:
+    """Where a pane's cursor is, in lines since the start of its history"""
+    pane_id: str
+    history_size: int
+    history_limit: int
+    cursor_y: int
+    height: int
+    width: int
+    alternate: bool = False
+    cursor_x: int = 0
+    # Epoch second of the window's latest output
+    activity: int = 0
+    pid: int = 0
+    
+    @property
+    def fingerprint(self) -> tuple:
+        """Cheap metadata that moves whenever the pane's content may have"""
+        return (self.history_size, self.cursor_y, self.cursor_x, self.height, self.width,
+                self.alternate, self.activity, self.pid)
+    
+    @property
+    def position(self) -> int:
+        """Absolute line the cursor is on; line 0 is the oldest history line"""
+        return self.history_size + self.cursor_y
+    
+    @property
+    def history_full(self) -> bool:
+        """Old lines are being dropped, so positions no longer advance"""
+        return self.history_limit > 0 and self.history_size >= self.history_limit
+    
+    @classmethod
+    def from_record(cls, record) -> 'PaneCursor':
+        """Cursor from a ScrollbackReader.CURSOR record"""
+        return cls(
+            pane_id=record.pane_id,
+            history_size=record.history_size,
+            history_limit=record.history_limit,
+            cursor_y=record.cursor_y,
+            height=record.pane_height,
+            width=record.pane_width,
+            alternate=record.alternate_on,
+            cursor_x=record.cursor_x,
+            activity=record.window_activity,
+            pid=record.pane_pid
+        )
+    
+    @classmethod
+    def parse(cls, line: str) -> Optional['PaneCursor']:
+        record = ScrollbackReader.CURSOR.parse_line(line)
+        return cls.from_record(record) if record is not None else None
+
+
+@dataclass
+class ScrollbackRead:
+    """Lines read from one pane; start is the absolute line of lines[0]"""
+    pane_id: str
+    lines: List[str] = field(default_factory=list)
+    start: int = 0
+    resync: bool = False
+    error: Optional[str] = None
+    # Missed the deadline; the pane's cursor is kept so the next read resumes
+    timed_out: bool = False
+    
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+    
+    @property
+    def end(self) -> int:
+        return self.start + len(self.lines)
+
+
+@dataclass
+class PaneTail:
+    """The last lines of a pane, kept up to date from incremental reads"""
+    lines: Deque[str]
+    end: int = 0
+    
+    def apply(self, read: ScrollbackRead) -> None:
+        """Replace lines from read.start onwards with the lines just read"""
+        if read.resync or read.start > self.end:
+            self.lines.clear()
+        else:
+            for _ in range(min(self.end - read.start, len(self.lines))):
+                self.lines.pop()
+        self.lines.extend(read.lines)
+        self.end = read.end
+    
+    @property
+    def text(self) -> str:
+        return '\n'.join(self.lines)
+
+
+@dataclass
+class OutputDelta:
+    """Lines replacing a pane's output from offset onwards; reset marks a gap"""
+    offset: int
+    lines: List[str]
+    reset: bool = False
+    
+    def to_dict(self) -> Dict:
+        data = {"offset": self.offset, "lines": self.lines}
+        if self.reset:
+            data["reset"] = True
+        return data
+    
+    @property
+    def end(self) -> int:
+        return self.offset + len(self.lines)
+    
+    def then(self, later: 'OutputDelta') -> 'OutputDelta':
+        """One delta with the effect of this one followed by later"""
+        if later.reset:
+            return later
+        if later.offset < self.offset:
+            return OutputDelta(later.offset, later.lines, self.reset)
+        if later.offset > self.end:
+            # Lines in between were never sent
+            return OutputDelta(later.offset, later.lines, reset=True)
+        return OutputDelta(self.offset, self.lines[:later.offset - self.offset] + later.lines, self.reset)
+
+
+class PaneMirror:
+    """
+    The lines a client was last sent for a pane, to send only what changed
+    Offsets count lines from the first observation. New output is found by
+    matching the start of the current tail against the end of the mirrored
+    one, allowing the last mirrored line, the cursor line, to have been
+    completed since. That needs the line before it to match too, unless
+    the cursor line is all that is mirrored.
+    """
+    
+    def __init__(self, lines: List[str], size: int = 10):
+        self.lines: Deque[str] = deque(lines, maxlen=size)
+        self.end = len(lines)
+    
+    def diff(self, current: List[str]) -> OutputDelta:
+        """Delta turning the mirrored tail into current"""
+        previous = list(self.lines)
+        # Longest overlap first, so repeated lines are not resent
+        for start in range(len(previous)):
+            overlap = len(previous) - start
+            if current[:overlap] == previous[start:]:
+                return OutputDelta(self.end, current[overlap:])
+            if (overlap > 1 or start == 0) and current[:overlap - 1] == previous[start:-1]:
+                return OutputDelta(self.end - 1, current[overlap - 1:])
+        # Cleared, redrawn, or more output than a tail holds
+        return OutputDelta(self.end, list(current), reset=True)
+    
+    def apply(self, delta: OutputDelta) -> None:
+        if delta.reset:
+            self.lines.clear()
+        else:
+            for _ in range(min(self.end - delta.offset, len(self.lines))):
+                self.lines.pop()
+        self.lines.extend(delta.lines)
+        self.end = delta.offset + len(delta.lines)
+
+
+class ScrollbackReader:
+    """
+    Per-pane cursor tracker for incremental capture-pane reads
+    
+    Each read lists every pane's cursor with one list-panes -a call, then
+    captures, in one batched tmux invocation, only the rows from the
+    previous cursor line (re-read, since it may have been completed) down
+    to the last visible row, so status lines below the cursor are kept.
+    Blank rows below the cursor are dropped. A pane is resynced, re-reading
+    its last `lines` rows, on its first read, after a resize, a clear (the
+    cursor moved backwards), while the alternate screen is on, and once
+    its history is full, when positions stop advancing as old lines are
+    dropped. A pane whose fingerprint moved while its cursor stayed put
+    was redrawn in place, and its whole visible screen is re-read.
+    
+    Reads given a timeout stop at that deadline; panes not read in time
+    keep their cursor, so nothing written meanwhile is skipped.
+    
+    The same listing carries a fingerprint per pane. Panes read with
+    `due` given are only captured if they are due or their fingerprint
+    moved since their last capture. Callers listing the structure anyway
+    can do it with LISTING and pass the cursors in.
+    """
+    
+    CURSOR = TmuxFormat('CursorRow', [
+        ('pane_id', str), ('history_size', int), ('history_limit', int), ('cursor_y', int),
+        ('pane_height', int), ('pane_width', int), ('alternate_on', bool), ('cursor_x', int),
+        ('window_activity', int), ('pane_pid', int)
+    ])
+    CURSOR_FORMAT = CURSOR.format
+    # The snapshot's fields plus the cursor's, to list both with one call
+    LISTING = TmuxFormat('ListingRow', TmuxCommand.SNAPSHOT.fields + CURSOR.fields[1:],
+                         free_text='window_name')
+    
+    def __init__(self, tmux_cmd: TmuxCommand, lines: int = 10, max_lines: int = 500):
+        self.tmux_cmd = tmux_cmd
+        # Rows kept per pane and re-read on resync
+        self.lines = lines
+        # Larger bursts are resynced instead of read in full
+        self.max_lines = max_lines
+        self.cursors: Dict[str, PaneCursor] = {}
+        self.tails: Dict[str, PaneTail] = {}
+        # Epoch second of each pane's last capture
+        self.captured_at: Dict[str, int] = {}
+        # Captures avoided because a fingerprint had not moved
+        self.unchanged = 0
+    
+    def tail(self, pane_id: str) -> str:
+        """Last `lines` rows read from a pane"""
+        tail = self.tails.get(pane_id)
+        return tail.text if tail else ""
+    
+    def forget(self, pane_id: str) -> None:
+        """Drop tracking for a pane, e.g. after it closed"""
+        self.cursors.pop(pane_id, None)
+        self.tails.pop(pane_id, None)
+        self.captured_at.pop(pane_id, None)
+    
+    def parse_cursors(self, output: str) -> Dict[str, PaneCursor]:
+        return self.cursors_from(self.CURSOR.parse(output))
+    
+    @staticmethod
+    def cursors_from(records: list) -> Dict[str, PaneCursor]:
+        """Cursors from CURSOR or LISTING records"""
+        return {record.pane_id: PaneCursor.from_record(record) for record in records}
+    
+    def poll_cursors(self, timeout: Optional[float] = None) -> Dict[str, PaneCursor]:
+        """Current cursor of every pane from one list-panes -a call"""
+        result = self.tmux_cmd.execute_command(
+            ['tmux', 'list-panes', '-a', '-F', self.CURSOR_FORMAT], check=False,
+            timeout=timeout
+        )
+        return self.parse_cursors(result.stdout) if result.returncode == 0 else {}
+    
+    def moved(self, cursor: PaneCursor) -> bool:
+        """Whether a pane may have changed since its last capture"""
+        previous = self.cursors.get(cursor.pane_id)
+        if previous is None or cursor.fingerprint != previous.fingerprint:
+            return True
+        # window_activity counts whole seconds: output later in the second
+        # of the last capture leaves it where it was
+        return cursor.activity >= self.captured_at.get(cursor.pane_id, 0)
+    
+    def needs_resync(self, previous: Optional[PaneCursor], cursor: PaneCursor) -> bool:
+        if previous is None or cursor.alternate or previous.alternate:
+            return True
+        if (cursor.height, cursor.width) != (previous.height, previous.width):
+            return True
+        if cursor.history_full or cursor.position < previous.position:
+            return True
+        return cursor.position - previous.position >= self.max_lines
+    
+    def plan(self, cursor: PaneCursor) -> ScrollbackRead:
+        """Decide which absolute lines to capture for a pane"""
+        previous = self.cursors.get(cursor.pane_id)
+        if self.needs_resync(previous, cursor):
+            start = max(0, cursor.position - self.lines + 1)
+            return ScrollbackRead(cursor.pane_id, start=start, resync=True)
+        if (cursor.fingerprint != previous.fingerprint
+                and (cursor.history_size, cursor.cursor_y) == (previous.history_size, previous.cursor_y)):
+            # Rows above the cursor may have been redrawn: status lines, progress bars
+            start = min(cursor.history_size, max(0, cursor.position - self.lines + 1))
+            return ScrollbackRead(cursor.pane_id, start=start, resync=True)
+        return ScrollbackRead(cursor.pane_id, start=previous.position)
+    
+    def _capture_args(self, cursor: PaneCursor, read: ScrollbackRead) -> List[str]:
+        # capture-pane numbers visible rows from 0 and history rows negatively
+        return ['capture-pane', '-p', '-t', cursor.pane_id,
+                '-S', str(read.start - cursor.history_size), '-E', str(cursor.height - 1)]
+    
+    @staticmethod
+    def _trim(lines: List[str], cursor: PaneCursor, read: ScrollbackRead) -> List[str]:
+        """lines without the blank rows below both the cursor and the last output"""
+        keep = cursor.position - read.start + 1
+        while len(lines) > keep and not lines[-1]:
+            lines.pop()
+        return lines
+    
+    def _apply_results(self, cursors: Dict[str, PaneCursor], reads: List[ScrollbackRead],
+                       results: List) -> Dict[str, ScrollbackRead]:
+        out = {}
+        captured_at = int(time.time())
+        for read, result in zip(reads, results):
+            if TmuxBatch.timed_out(result):
+                read.error = result.stderr
+                read.timed_out = True
+            elif result.returncode != 0:
+                read.error = result.stderr.strip() or f"exit code {result.returncode}"
+                self.forget(read.pane_id)
+            else:
+                output = result.stdout
+                lines = (output[:-1] if output.endswith('\n') else output).split('\n')
+                read.lines = self._trim(lines, cursors[read.pane_id], read)
+                self.cursors[read.pane_id] = cursors[read.pane_id]
+                self.captured_at[read.pane_id] = captured_at
+                tail = self.tails.setdefault(read.pane_id, PaneTail(deque(maxlen=self.lines)))
+                tail.apply(read)
+            out[read.pane_id] = read
+        return out
+    
+    def _prepare(self, cursors: Dict[str, PaneCursor], pane_ids: Optional[List[str]],
+                 due: Optional[Collection[str]] = None) -> List[ScrollbackRead]:
+        for pane_id in set(self.cursors) - set(cursors):
+            self.forget(pane_id)
+        wanted = cursors if pane_ids is None else [p for p in pane_ids if p in cursors]
+        if due is not None:
+            selected = [p for p in wanted if p in due or self.moved(cursors[p])]
+            self.unchanged += len(wanted) - len(selected)
+            wanted = selected
+        return [self.plan(cursors[pane_id]) for pane_id in wanted]
+    
+    def _run_captures(self, cursors: Dict[str, PaneCursor], reads: List[ScrollbackRead],
+                      timeout: Optional[float] = None) -> List:
+        batch = self.tmux_cmd.batch()
+        for read in reads:
+            batch.add(*self._capture_args(cursors[read.pane_id], read))
+        return batch.execute(continue_on_error=True, timeout=timeout) if reads else []
+    
+    @staticmethod
+    def _timed_out(pane_ids: Optional[List[str]]) -> Dict[str, ScrollbackRead]:
+        return {pane_id: ScrollbackRead(pane_id, error=TmuxBatch.TIMED_OUT, timed_out=True)
+                for pane_id in pane_ids or []}
+    
+    @staticmethod
+    def _remaining(deadline: Optional[float]) -> Optional[float]:
+        return None if deadline is None else max(0.0, deadline - time.monotonic())
+    
+    def read(self, pane_ids: Optional[List[str]] = None, timeout: Optional[float] = None,
+             due: Optional[Collection[str]] = None,
+             cursors: Optional[Dict[str, PaneCursor]] = None) -> Dict[str, ScrollbackRead]:
+        """
+        Read new lines from the given panes, or from every pane, within timeout
+        With due given, other panes whose fingerprint has not moved are left
+        out of the result without being captured. cursors just listed by the
+        caller, e.g. with LISTING, save listing them again
+        """
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        if cursors is None:
+            try:
+                cursors = self.poll_cursors(timeout)
+            except TmuxTimeoutError:
+                return self._timed_out(pane_ids)
+        reads = self._prepare(cursors, pane_ids, due)
+        try:
+            results = self._run_captures(cursors, reads, self._remaining(deadline))
+        except TmuxCommandError as e:
+            logger.debug(f"Scrollback capture failed: {e}")
+            return {read.pane_id: ScrollbackRead(read.pane_id, error=str(e)) for read in reads}
+        return self._apply_results(cursors, reads, results)
+    
+    async def read_async(self, pane_ids: Optional[List[str]] = None,
+                         timeout: Optional[float] = None,
+                         due: Optional[Collection[str]] = None,
+                         cursors: Optional[Dict[str, PaneCursor]] = None) -> Dict[str, ScrollbackRead]:
+        """Async counterpart of read; captures run in a worker thread"""
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        if cursors is None:
+            try:
+                result = await self.tmux_cmd.execute_command_async(
+                    ['tmux', 'list-panes', '-a', '-F', self.CURSOR_FORMAT], check=False,
+                    timeout=timeout
+                )
+            except TmuxTimeoutError:
+                return self._timed_out(pane_ids)
+            cursors = self.parse_cursors(result.stdout) if result.returncode == 0 else {}
+        reads = self._prepare(cursors, pane_ids, due)
+        loop = asyncio.get_running_loop()
+        try:
+            results = await loop.run_in_executor(
+                None, self._run_captures, cursors, reads, self._remaining(deadline)
+            )
+        except TmuxCommandError as e:
+            logger.debug(f"Scrollback capture failed: {e}")
+            return {read.pane_id: ScrollbackRead(read.pane_id, error=str(e)) for read in reads}
+        return self._apply_results(cursors, reads, results)
@@ -0,0 +1,282 @@
+"""
+Tmux Taps - Streamed pane output through pipe-pane
+Attaches `tmux pipe-pane -o` to a FIFO per pane so output arrives as it
+is written, including lines that scroll past between two polls, instead
+of being polled with capture-pane
+"""
+
+import asyncio
+import logging
+import os
+import re
+import shlex
+import shutil
+import tempfile
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set
+
+from tmux_core import TmuxCommand
+
+
+logger = logging.getLogger(__name__)
+
+# CSI, OSC and two-byte escape sequences
+ANSI_PATTERN = re.compile(r'\x1b(?:\[[0-?]*[ -/]*[@-~]|\][^\x07\x1b]*(?:\x07|\x1b\\)|[@-Z\\-_])')
+
+
+class PaneTap:
+    """
+    Output stream of one pane, split into plain-text lines
+    Streams fed from elsewhere, such as control-mode %output, have no FIFO
+    """
+    
+    def __init__(self, pane_id: str, path: Optional[str] = None, fd: Optional[int] = None,
+                 lines: int = 10):
+        self.pane_id = pane_id
+        self.path = path
+        self.fd = fd
+        self.tail: Deque[str] = deque(maxlen=lines)
+        self.lines_seen = 0
+        self._buffer = b""
+    
+    @staticmethod
+    def clean_line(raw: bytes) -> str:
+        """Drop escape sequences and keep what a carriage return left visible"""
+        text = ANSI_PATTERN.sub('', raw.decode(errors='replace')).rstrip('\r')
+        return text.rsplit('\r', 1)[-1]
+    
+    def feed(self, data: bytes) -> List[str]:
+        """Add raw output, returning the lines it completed"""
+        self._buffer += data
+        *complete, self._buffer = self._buffer.split(b'\n')
+        lines = [self.clean_line(raw) for raw in complete]
+        self.tail.extend(lines)
+        self.lines_seen += len(lines)
+        return lines
+    
+    def seed(self, captured: str) -> None:
+        """Start the tail from a capture-pane of the pane, less its blank bottom rows"""
+        lines = captured.rstrip('\n').split('\n')
+        while lines and not lines[-1]:
+            lines.pop()
+        self.tail.extend(lines)
+    
+    @property
+    def text(self) -> str:
+        return '\n'.join(self.tail)
+
+
+class TmuxPaneTaps:
+    """
+    Manages pipe-pane taps and dispatches their output
+    Panes that already have a pipe (for example the user's logging) are
+    left alone and keep being polled
+    """
+    
+    def __init__(self, tmux_cmd: TmuxCommand, lines: int = 10):
+        self.tmux_cmd = tmux_cmd
+        self.lines = lines
+        self.taps: Dict[str, PaneTap] = {}
+        # Panes already piped elsewhere; not retried until they disappear
+        self.untappable: Set[str] = set()
+        self.fifo_dir: Optional[str] = None
+        self._callbacks: List[Callable[[str, List[str]], None]] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+    
+    def __contains__(self, pane_id: str) -> bool:
+        return pane_id in self.taps
+    
+    def add_callback(self, callback: Callable[[str, List[str]], None]) -> None:
+        """Register a callback invoked with (pane_id, new lines)"""
+        self._callbacks.append(callback)
+    
+    @staticmethod
+    def pipe_command(path: str) -> str:
+        """Shell command tmux feeds the pane's output to"""
+        # `1<>` opens read-write, so cat never blocks waiting for a reader
+        return f"exec cat 1<> {shlex.quote(path)}"
+    
+    def _open_fifo(self, pane_id: str) -> Optional[PaneTap]:
+        if self.fifo_dir is None:
+            self.fifo_dir = tempfile.mkdtemp(prefix='tmux-orchestrator-taps-')
+        path = os.path.join(self.fifo_dir, f"pane-{pane_id.lstrip('%')}.fifo")
+        try:
+            os.mkfifo(path, 0o600)
+            fd = os.open(path, os.O_RDWR | os.O_NONBLOCK)
+        except OSError as e:
+            logger.warning(f"Could not create tap FIFO for {pane_id}: {e}")
+            return None
+        return PaneTap(pane_id, path, fd, self.lines)
+    
+    def start(self, pane_ids: Iterable[str], timeout: Optional[float] = None) -> List[str]:
+        """
+        Tap the given panes with one tmux invocation; returns the panes tapped
+        Each tap's tail starts from a capture taken once its pipe is open, so
+        the first output it streams is compared against what was on screen
+        """
+        pending = []
+        batch = self.tmux_cmd.batch()
+        for pane_id in pane_ids:
+            if pane_id in self.taps:
+                continue
+            tap = self._open_fifo(pane_id)
+            if tap is None:
+                continue
+            pending.append(tap)
+            # pipe-pane -o does nothing if the pane already has a pipe
+            batch.add('display-message', '-p', '-t', pane_id, '#{pane_pipe}')
+            batch.add('pipe-pane', '-o', '-t', pane_id, self.pipe_command(tap.path))
+            batch.capture_pane(pane_id, self.lines)
+        if not pending:
+            return []
+        
+        try:
+            results = batch.execute(continue_on_error=True, timeout=timeout)
+        except Exception as e:
+            logger.warning(f"Could not start pane taps: {e}")
+            results = []
+        
+        started = []
+        for i, tap in enumerate(pending):
+            pair = results[3 * i:3 * i + 2]
+            already_piped = len(pair) < 2 or pair[0].stdout.strip() == '1'
+            if already_piped or any(result.returncode != 0 for result in pair):
+                if len(pair) == 2 and pair[0].returncode == 0:
+                    self.untappable.add(tap.pane_id)
+                self._close_tap(tap)
+                continue
+            capture = results[3 * i + 2] if len(results) > 3 * i + 2 else None
+            if capture is not None and capture.returncode == 0:
+                tap.seed(capture.stdout)
+            self.taps[tap.pane_id] = tap
+            self._on_loop(self._watch, self._loop, tap)
+            started.append(tap.pane_id)
+        
+        if started:
+            logger.info(f"Tapped {len(started)} panes with pipe-pane")
+        return started
+    
+    def stop(self, pane_ids: Optional[Iterable[str]] = None,
+             timeout: Optional[float] = None) -> None:
+        """Close our pipes on the given panes, or on every tapped pane"""
+        pane_ids = [p for p in (self.taps if pane_ids is None else pane_ids) if p in self.taps]
+        if not pane_ids:
+            return
+        batch = self.tmux_cmd.batch()
+        for pane_id in pane_ids:
+            # Without a command, pipe-pane closes the pane's pipe
+            batch.add('pipe-pane', '-t', pane_id)
+        try:
+            batch.execute(continue_on_error=True, timeout=timeout)
+        except Exception as e:
+            logger.debug(f"Could not stop pane taps: {e}")
+        for pane_id in pane_ids:
+            self.discard(pane_id)
+    
+    def discard(self, pane_id: str) -> None:
+        """Forget a tap without calling tmux, e.g. after the pane closed"""
+        tap = self.taps.pop(pane_id, None)
+        if tap is not None:
+            self._on_loop(self._release, self._loop, tap)
+    
+    def sync(self, pane_ids: Iterable[str], existing: Iterable[str],
+             timeout: Optional[float] = None) -> List[str]:
+        """
+        Tap exactly the given panes, returning the ones newly tapped
+        Taps of panes missing from existing are discarded, the others stopped;
+        this blocks on tmux, so the collector runs it in a worker thread
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        wanted = set(pane_ids)
+        existing = set(existing)
+        self.untappable &= existing
+        unwanted = set(self.taps) - wanted
+        self.stop(unwanted & existing, timeout)
+        for pane_id in unwanted - existing:
+            self.discard(pane_id)
+        if deadline is not None:
+            timeout = max(0.0, deadline - time.monotonic())
+        return self.start(sorted(wanted - set(self.taps) - self.untappable), timeout)
+    
+    def attach(self, loop: Optional[asyncio.AbstractEventLoop] = None) -> None:
+        """Dispatch output from the event loop as soon as it arrives"""
+        self._loop = loop or asyncio.get_running_loop()
+        for pane_id, tap in self.taps.items():
+            self._loop.add_reader(tap.fd, self.dispatch, pane_id)
+    
+    def _on_loop(self, callback: Callable, *args) -> None:
+        """
+        Run callback on the dispatching loop, at once when already on it
+        Readers must not be added or removed from another thread, so calls
+        from sync in a worker thread are handed back to the loop
+        """
+        loop = self._loop
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if loop is None or running is loop or loop.is_closed():
+            callback(*args)
+        else:
+            loop.call_soon_threadsafe(callback, *args)
+    
+    def _watch(self, loop: Optional[asyncio.AbstractEventLoop], tap: PaneTap) -> None:
+        """Dispatch a tap's output from loop, unless it was dropped meanwhile"""
+        if loop is not None and loop is self._loop and self.taps.get(tap.pane_id) is tap:
+            loop.add_reader(tap.fd, self.dispatch, tap.pane_id)
+    
+    def _release(self, loop: Optional[asyncio.AbstractEventLoop], tap: PaneTap) -> None:
+        """Stop reading a tap on loop, then close its FIFO"""
+        if loop is not None and not loop.is_closed():
+            loop.remove_reader(tap.fd)
+        self._close_tap(tap)
+    
+    def close(self) -> None:
+        """Stop every tap and remove the FIFO directory"""
+        self.stop()
+        self._loop = None
+        if self.fifo_dir:
+            shutil.rmtree(self.fifo_dir, ignore_errors=True)
+            self.fifo_dir = None
+    
+    def read(self, pane_id: str) -> List[str]:
+        """Read pending output of a tap, returning the completed lines"""
+        tap = self.taps.get(pane_id)
+        if tap is None:
+            return []
+        lines = []
+        while True:
+            try:
+                chunk = os.read(tap.fd, 65536)
+            except BlockingIOError:
+                break
+            except OSError as e:
+                logger.debug(f"Tap read failed for {pane_id}: {e}")
+                break
+            if not chunk:
+                break
+            lines.extend(tap.feed(chunk))
+        return lines
+    
+    def dispatch(self, pane_id: str) -> None:
+        """Notify callbacks of new lines from a pane"""
+        lines = self.read(pane_id)
+        if not lines:
+            return
+        for callback in list(self._callbacks):
+            try:
+                callback(pane_id, lines)
+            except Exception as e:
+                logger.error(f"Tap callback failed: {e}")
+    
+    @staticmethod
+    def _close_tap(tap: PaneTap) -> None:
+        try:
+            os.close(tap.fd)
+        except OSError:
+            pass
+        try:
+            os.unlink(tap.path)
+        except OSError:
+            pass
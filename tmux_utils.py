@@ -59,6 +59,7 @@ class TmuxManager(TmuxCommand):
         
         try:
             self.execute_command(cmd)
+            self.invalidate_snapshot()
             self.logger.info(f"Created session: {name}")
             return True
         except TmuxCommandError as e:
@@ -78,6 +79,7 @@ class TmuxManager(TmuxCommand):
         
         try:
             result = self.execute_command(cmd)
+            self.invalidate_snapshot()
             window_index = int(result.stdout.strip())
             self.logger.info(f"Created window {window_index} in session {session_name}")
             return window_index
@@ -101,6 +103,8 @@ class TmuxManager(TmuxCommand):
         
         try:
             self.execute_command(["tmux", "send-keys", "-t", target, sanitized_keys])
+            # Keys can start or stop processes, changing pane commands
+            self.invalidate_snapshot()
             return True
         except TmuxCommandError as e:
             self.logger.error(f"Failed to send keys to {target}: {e}")
@@ -109,20 +113,30 @@ class TmuxManager(TmuxCommand):
     def send_message(self, session_name: str, window_index: int, message: str,
                     enter: bool = True) -> bool:
         """Send a message to a window with optional Enter key"""
-        # First send the message
-        if not self.send_keys_to_window(session_name, window_index, message):
+        if not enter:
+            return self.send_keys_to_window(session_name, window_index, message)
+        
+        if not TmuxValidation.validate_session_name(session_name):
+            self.logger.error(f"Invalid session name: {session_name}")
+            return False
+            
+        if not TmuxValidation.validate_window_index(window_index):
+            self.logger.error(f"Invalid window index: {window_index}")
             return False
         
-        # Then send Enter if requested
-        if enter:
-            target = f"{session_name}:{window_index}"
-            try:
-                self.execute_command(["tmux", "send-keys", "-t", target, "Enter"])
-                return True
-            except TmuxCommandError:
-                return False
+        # Message and Enter in a single tmux invocation
+        target = f"{session_name}:{window_index}"
+        batch = self.batch()
+        batch.send_keys(target, TmuxValidation.sanitize_keys(message))
+        batch.send_keys(target, "Enter")
         
-        return True
+        try:
+            batch.execute(check=True)
+            self.invalidate_snapshot()
+            return True
+        except TmuxCommandError as e:
+            self.logger.error(f"Failed to send message to {target}: {e}")
+            return False
     
     def get_all_sessions(self) -> List[TmuxSession]:
         """
@@ -203,26 +217,24 @@ class TmuxManager(TmuxCommand):
             self.logger.error(f"Project path does not exist: {project_path}")
             return False
         
+        # Session, first-window rename and standard windows in one invocation
+        batch = self.batch()
+        batch.add("new-session", "-d", "-s", project_name, "-c", project_path)
+        batch.rename_window(f"{project_name}:0", "Claude-Agent")
+        batch.new_window(project_name, "Shell", project_path)
+        batch.new_window(project_name, "Dev-Server", project_path)
+        
         try:
-            # Create session
-            if not self.create_session(project_name, project_path):
-                return False
-            
-            # Rename first window
-            self.execute_command([
-                "tmux", "rename-window", "-t", f"{project_name}:0", "Claude-Agent"
-            ])
-            
-            # Add standard windows
-            self.add_window(project_name, "Shell", project_path)
-            self.add_window(project_name, "Dev-Server", project_path)
-            
+            batch.execute(check=True)
             self.logger.info(f"Created project session: {project_name}")
             return True
             
         except TmuxCommandError as e:
             self.logger.error(f"Failed to create project session: {e}")
             return False
+        finally:
+            # Part of the batch may have run even if a later command failed
+            self.invalidate_snapshot()
 
 
 def main():
@@ -12,7 +12,8 @@ import sys
 from pathlib import Path
 
 from websocket_server import WebSocketServer
-from event_collector import TmuxEventCollector
+from event_collector import TmuxEventCollector, MultiServerCollector
+from tmux_core import TmuxServerPool
 from auth_manager import AuthManager, TokenGenerator
 
 # Configure logging
@@ -33,7 +34,12 @@ class WebSocketMonitor:
         
         # Initialize components
         self.server = WebSocketServer(host, port)
-        self.collector = TmuxEventCollector(poll_interval)
+        # TMUX_SOCKETS lists several tmux servers to monitor from one process
+        sockets = TmuxServerPool.sockets_from_env()
+        if len(sockets) > 1:
+            self.collector = MultiServerCollector(poll_interval, sockets)
+        else:
+            self.collector = TmuxEventCollector(poll_interval, socket_name=sockets[0])
         self.auth_manager = AuthManager()
         
         # Wire components together
@@ -13,6 +13,9 @@ from typing import Set, Dict, Any, Optional
 from dataclasses import dataclass, asdict, field
 from datetime import datetime
 
+from event_buffer import EventRingBuffer
+from event_requests import RequestChannel
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -39,18 +42,22 @@ class WebSocketServer:
         self.port = port
         self.clients: Dict[str, WebSocketClient] = {}
         self.event_queue = asyncio.Queue()
+        # Snapshot requests to the collector, kept off the event queue
+        self.requests = RequestChannel()
+        # Recent events, replayed to clients that reconnect
+        self.history = EventRingBuffer()
         self.running = False
         self.auth_manager = None  # Will be injected
         self.event_collector = None  # Will be injected
-        
+    
     def set_auth_manager(self, auth_manager):
         """Inject authentication manager"""
         self.auth_manager = auth_manager
-        
+    
     def set_event_collector(self, event_collector):
         """Inject event collector"""
         self.event_collector = event_collector
-        
+    
     async def start(self):
         """Start the WebSocket server"""
         self.running = True
@@ -60,7 +67,7 @@ class WebSocketServer:
         collector_task = None
         if self.event_collector:
             collector_task = asyncio.create_task(
-                self.event_collector.start_collecting(self.event_queue)
+                self.event_collector.start_collecting(self.event_queue, self.requests)
             )
         
         # Start the WebSocket server
@@ -94,7 +101,8 @@ class WebSocketServer:
         await self.send_to_client(client, {
             "type": "connection.established",
             "client_id": client_id,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": datetime.now().isoformat(),
+            "latest": dict(self.history.latest)
         })
         
         try:
@@ -127,11 +135,13 @@ class WebSocketServer:
                 await self.handle_unsubscribe(client, data)
             elif action == "snapshot":
                 await self.handle_snapshot(client, data)
+            elif action == "replay":
+                await self.handle_replay(client, data)
             elif action == "ping":
                 await self.handle_ping(client)
             else:
                 await self.send_error(client, f"Unknown action: {action}", "UNKNOWN_ACTION")
-                
+        
         except json.JSONDecodeError:
             await self.send_error(client, "Invalid JSON", "INVALID_JSON")
         except Exception as e:
@@ -242,13 +252,46 @@ class WebSocketServer:
             "timestamp": datetime.now().isoformat()
         }
         
-        # Queue the snapshot request for the event collector
-        await self.event_queue.put(snapshot_event)
-        
         await self.send_to_client(client, {
             "type": "snapshot.acknowledged",
             "target": target
         })
+        
+        # Answered to this client only, without waiting for a collector tick
+        try:
+            events = await self.requests.request(snapshot_event)
+        except asyncio.TimeoutError:
+            await self.send_error(client, "Snapshot timed out", "SNAPSHOT_TIMEOUT")
+            return
+        for event in events:
+            await self.send_to_client(client, event.to_dict())
+    
+    async def handle_replay(self, client: WebSocketClient, data: Dict):
+        """Resend buffered events after the last seq a client saw per server"""
+        if not client.authenticated:
+            await self.send_error(client, "Authentication required", "AUTH_REQUIRED")
+            return
+        
+        since = data.get("since", {})
+        if not isinstance(since, dict) or any(type(seq) is not int for seq in since.values()):
+            await self.send_error(client, "since must map server names to seq numbers", "INVALID_JSON")
+            return
+        
+        for server, seq in since.items():
+            events = self.history.since(server, seq)
+            if events is None:
+                # Too old to replay; the client needs a snapshot instead
+                await self.send_error(client, f"Events after {seq} from {server} are no longer buffered",
+                                      "REPLAY_GAP")
+                continue
+            for event in events:
+                if self.is_subscribed(client, event):
+                    await self.send_to_client(client, event)
+        
+        await self.send_to_client(client, {
+            "type": "replay.complete",
+            "latest": dict(self.history.latest)
+        })
     
     async def handle_ping(self, client: WebSocketClient):
         """Handle ping request"""
@@ -263,42 +306,43 @@ class WebSocketServer:
             try:
                 # Wait for events with timeout to allow checking running status
                 event = await asyncio.wait_for(self.event_queue.get(), timeout=1.0)
-                await self.broadcast_event(event)
+                # Serialized once for the history and every recipient
+                message = json.dumps(event)
+                self.history.append(event, len(message))
+                await self.broadcast_event(event, message)
             except asyncio.TimeoutError:
                 continue
             except Exception as e:
                 logger.error(f"Error in event broadcaster: {e}")
     
-    async def broadcast_event(self, event: Dict):
-        """Broadcast an event to all subscribed clients"""
-        event_type = event.get("type", "")
+    def is_subscribed(self, client: WebSocketClient, event: Dict) -> bool:
+        """Whether a client's subscriptions cover an event"""
         session = event.get("session", "")
-        
+        return ("*" in client.subscriptions
+                or f"type:{event.get('type', '')}" in client.subscriptions
+                or bool(session and f"session:{session}" in client.subscriptions))
+    
+    async def broadcast_event(self, event: Dict, message: Optional[str] = None):
+        """Broadcast an event to all subscribed clients"""
         # Determine which clients should receive this event
-        recipients = []
-        for client_id, client in self.clients.items():
-            if not client.authenticated:
-                continue
-            
-            # Check if client is subscribed to this event
-            if "*" in client.subscriptions:
-                recipients.append(client)
-            elif f"type:{event_type}" in client.subscriptions:
-                recipients.append(client)
-            elif session and f"session:{session}" in client.subscriptions:
-                recipients.append(client)
+        recipients = [client for client in self.clients.values()
+                      if client.authenticated and self.is_subscribed(client, event)]
         
         # Send to all recipients
+        if recipients and message is None:
+            message = json.dumps(event)
         for client in recipients:
             try:
-                await self.send_to_client(client, event)
+                await self.send_to_client(client, event, message)
             except Exception as e:
                 logger.error(f"Failed to send event to client {client.client_id}: {e}")
     
-    async def send_to_client(self, client: WebSocketClient, data: Dict):
-        """Send data to a specific client"""
+    async def send_to_client(self, client: WebSocketClient, data: Dict,
+                             message: Optional[str] = None):
+        """Send data to a specific client, as message if already serialized"""
         try:
-            message = json.dumps(data)
+            if message is None:
+                message = json.dumps(data)
             await client.connection.send(message)
         except Exception as e:
             logger.error(f"Failed to send to client {client.client_id}: {e}")